@@ -0,0 +1,123 @@
+"""Benchmark: a burst of API submissions with and without admission control.
+
+Serves the HTTP API (``api.py``) with uvicorn on a local port, backed by the
+fake OpenAI-compatible server and the in-memory Google Docs fake, and fires
+``clients`` x ``per_client`` distinct submissions at once. Unbounded, every
+submission is queued and the last ones wait behind the whole burst. Bounded
+(``max_pending`` and a per-client limit), the overflow gets an immediate 429
+with ``Retry-After`` and accepted jobs finish in bounded time.
+
+Usage:
+    PYTHONPATH=src python benchmarks/api_backpressure.py [clients] [per_client] [workers]
+"""
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+os.environ["OUTPUT_SAVE_RUNS"] = "false"
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from problem_solving_research_agent.api import create_app  # noqa: E402
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.jobs import FINISHED_STATES, JobQueue, JobStore  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_api(queue: JobQueue, max_jobs_per_client: int):
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        create_app(queue, max_jobs_per_client=max_jobs_per_client, retry_after=5),
+        host="127.0.0.1", port=port, log_level="warning",
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, f"http://127.0.0.1:{port}"
+
+
+def measure(label: str, clients: int, per_client: int, workers: int, max_pending: int, per_client_limit: int) -> dict:
+    queue = JobQueue(JobStore(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")), workers=workers,
+                     max_pending=max_pending)
+    server, base_url = start_api(queue, per_client_limit)
+    # One shared client: creating one per request costs more than the API call
+    http = httpx.Client(base_url=base_url, timeout=60, limits=httpx.Limits(max_connections=clients * per_client))
+    started = time.perf_counter()
+
+    def submit_and_wait(n: int):
+        sent = time.perf_counter()
+        response = http.post("/jobs", json={"problem_statement": f"Problem {label} {n}"},
+                             headers={"X-Client-ID": f"tool-{n % clients}"})
+        if response.status_code != 202:
+            return response.status_code, time.perf_counter() - sent
+        job_id = response.json()["id"]
+        while http.get(f"/jobs/{job_id}").json()["status"] not in FINISHED_STATES:
+            time.sleep(0.05)
+        return 202, time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=clients * per_client) as pool:
+        outcomes = list(pool.map(submit_and_wait, range(clients * per_client)))
+
+    server.config.app.state.draining = True
+    draining = (http.get("/healthz").status_code, http.post("/jobs", json={"problem_statement": "x"}).status_code)
+    http.close()
+    server.should_exit = True
+    queue.shutdown()
+    accepted = [seconds for status, seconds in outcomes if status == 202]
+    rejected = [seconds for status, seconds in outcomes if status == 429]
+    return {
+        "accepted": len(accepted),
+        "rejected": len(rejected),
+        "p50": statistics.median(accepted) if accepted else 0.0,
+        "max": max(accepted) if accepted else 0.0,
+        "reject_ms": statistics.median(rejected) * 1000 if rejected else 0.0,
+        "draining": draining,
+    }
+
+
+def main():
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+    server = FakeLLMServer(token_delay=0.001, first_token_delay=0.2).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        run_problem("Warm-up")
+        results = {
+            "unbounded": measure("unbounded", clients, per_client, workers, max_pending=0, per_client_limit=0),
+            "bounded": measure("bounded", clients, per_client, workers, max_pending=workers * 2, per_client_limit=2),
+        }
+    finally:
+        server.stop()
+
+    print(f"\n{clients} clients x {per_client} submissions at once, {workers} workers")
+    for mode, result in results.items():
+        print(
+            f"  {mode:<9}: {result['accepted']:2} accepted (done after {result['p50']:5.2f} s median, "
+            f"{result['max']:5.2f} s max), {result['rejected']:2} refused with 429 "
+            f"in {result['reject_ms']:.0f} ms"
+        )
+    health, submit = results["bounded"]["draining"]
+    print(f"  while draining: /healthz {health}, POST /jobs {submit}")
+
+
+if __name__ == "__main__":
+    main()
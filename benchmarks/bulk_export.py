@@ -0,0 +1,62 @@
+"""Benchmark: bulk PDF export throughput by number of worker processes.
+
+Stores ``documents`` generated reports in a temporary output store and
+exports them all with ``run_export`` at 1, 2, 4, ... workers up to the CPU
+count, printing docs/sec and the speedup over one worker. Rendering is
+CPU-bound, so throughput should grow with workers until the cores run out.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bulk_export.py [documents] [sections]
+"""
+import os
+import sys
+import tempfile
+
+from problem_solving_research_agent.export import run_export
+from problem_solving_research_agent.tools.output_store import OutputStore
+
+
+def report(n: int, sections: int) -> str:
+    parts = [f"# Report {n}: Scaling a Multi-Agent Pipeline\n"]
+    for section in range(1, sections + 1):
+        parts.append(f"""
+## {section}. Finding {section}
+
+The **primary constraint** in area {section} is latency under load; see
+[the reference](https://example.com/{section}) and `config_{section}.yaml`.
+
+- Observation {section}.1 with *emphasis*
+  - Detail {section}.1.a
+- Observation {section}.2
+
+| Metric | Before | After |
+| --- | --- | --- |
+| p50 latency | {n + section} ms | {section} ms |
+| Throughput | {section} rps | {n + section} rps |
+""")
+    return "".join(parts)
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sections = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    cpus = os.cpu_count() or 1
+    root = tempfile.mkdtemp()
+    store = OutputStore(os.path.join(root, "store"), write_behind=False)
+    for n in range(documents):
+        store.save(report(n, sections), f"report_{n}", title=f"Report {n}")
+
+    counts = sorted({1, cpus} | {2 ** power for power in range(1, cpus.bit_length()) if 2 ** power <= cpus})
+    results = {}
+    for workers in counts:
+        summary = run_export(os.path.join(root, "store"), os.path.join(root, f"exports-{workers}"), workers=workers)
+        assert summary["ok"] == documents, summary
+        results[workers] = summary["docs_per_second"]
+
+    print(f"\n{documents} documents of {sections} sections, {cpus} CPUs")
+    for workers, rate in results.items():
+        print(f"  {workers:3} workers: {rate:7.2f} docs/s  ({rate / results[1]:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark: publisher tokens with the context budget on and off.
+
+Runs the full crew through ``run_problem`` against the local fake
+OpenAI-compatible server and the in-memory Google Docs fake with a long
+research answer. With ``CONTEXT_MAX_TOKENS=0`` the publisher receives the whole
+research output and sends it back as the Docs tool argument; with a budget it
+sees a trimmed digest and refers to the full document by its artifact handle.
+
+Usage:
+    PYTHONPATH=src python benchmarks/context_budget.py [sections] [budget_tokens]
+"""
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from problem_solving_research_agent import fake_llm_server  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+
+replies = []
+
+
+def recording_responder(body: dict):
+    reply = fake_llm_server.default_responder(body)
+    replies.append(reply)
+    return reply
+
+
+def measure(server, budget: int) -> dict:
+    os.environ["CONTEXT_MAX_TOKENS"] = str(budget)
+    server.requests.clear()
+    replies.clear()
+    started = time.perf_counter()
+    result = run_problem(f"How do we scale customer support with agents? (budget {budget})")
+    # Estimated at four characters per token, like the fake server's usage numbers
+    return {
+        "seconds": time.perf_counter() - started,
+        "prompt": sum(len(json.dumps(request["messages"])) for request in server.requests) // 4,
+        "completion": sum(len(json.dumps(reply)) for reply in replies) // 4,
+        "complete": fake_llm_server.RESEARCH_ANSWER[-200:] in result,
+    }
+
+
+def main():
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    fake_llm_server.RESEARCH_ANSWER = "\n\n".join(
+        f"## Section {n}\n\n" + "Findings and recommendations for the problem. " * 120 for n in range(1, sections + 1)
+    )
+    server = fake_llm_server.FakeLLMServer(recording_responder, token_delay=0.0005, first_token_delay=0.05).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports and client setup are not timed
+        measure(server, budget)
+        results = {"by value": measure(server, 0), "budgeted": measure(server, budget)}
+    finally:
+        server.stop()
+
+    print(f"\nOne run, {sections} research sections, budget {budget} tokens")
+    for mode, result in results.items():
+        print(
+            f"  {mode:<9}: {result['seconds']:5.2f} s  {result['prompt']:6} prompt + "
+            f"{result['completion']:6} completion tokens  "
+            f"full document in result: {result['complete']}"
+        )
+    before, after = results["by value"], results["budgeted"]
+    total_before = before["prompt"] + before["completion"]
+    total_after = after["prompt"] + after["completion"]
+    print(f"  tokens   : {1 - total_after / total_before:.0%} fewer")
+    print(f"  latency  : {before['seconds'] / after['seconds']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
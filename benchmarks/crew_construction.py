@@ -0,0 +1,48 @@
+"""Microbenchmark: crew construction cost before and after the crew factory.
+
+Usage:
+    PYTHONPATH=src python benchmarks/crew_construction.py [iterations]
+
+No API calls are made; only object construction is timed.
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+
+from problem_solving_research_agent import factory  # noqa: E402
+from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew  # noqa: E402
+
+
+def build_uncached():
+    """What every request paid before: fresh YAML parse, LLMs and tools."""
+    factory._shared_llms.clear()
+    factory._shared_tools.clear()
+    return ProblemSolvingResearchAgentCrew().crew()
+
+
+def build_pooled():
+    return factory.get_crew_factory().build()
+
+
+def measure(fn, iterations):
+    fn()  # warm up imports and the shared definitions
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1000
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    before = measure(build_uncached, iterations)
+    after = measure(build_pooled, iterations)
+    print(f"Crew construction over {iterations} iterations")
+    print(f"  per-request CrewBase build : {before:8.2f} ms")
+    print(f"  CrewFactory.build          : {after:8.2f} ms")
+    print(f"  speedup                    : {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
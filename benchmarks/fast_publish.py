@@ -0,0 +1,109 @@
+"""Benchmark: two-agent pipeline vs fast publish mode, with a scripted fake LLM.
+
+Both pipelines run end to end through ``run_problem`` against the in-memory
+Google Docs fake. The fake LLM sleeps a fixed latency per call and answers
+like a cooperative model would: markdown research, a Google Docs tool call
+and final answer for the publisher, or a JSON report for the structured task.
+Tokens are estimated at four characters each.
+
+Usage:
+    PYTHONPATH=src python benchmarks/fast_publish.py [runs] [latency_seconds]
+"""
+import json
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from crewai.llms.base_llm import BaseLLM  # noqa: E402
+
+from problem_solving_research_agent import factory  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+RESEARCH_MARKDOWN = "\n\n".join(
+    f"## Section {n}\n\n" + "Findings and recommendations for the problem. " * 40 for n in range(1, 8)
+)
+REPORT = {
+    "title": "Scaling Customer Support with Agents",
+    "executive_summary": "Findings and recommendations for the problem. " * 20,
+    "problem_analysis": "Findings and recommendations for the problem. " * 40,
+    "research_summary": "Findings and recommendations for the problem. " * 40,
+    "solution_steps": ["Findings and recommendations for the problem. " * 3] * 8,
+    "technical_recommendations": ["Use CrewAI with a sequential process"] * 4,
+    "implementation_timeline": [
+        {"phase": f"Phase {n}", "duration": "2 weeks", "milestones": ["Milestone A", "Milestone B"]}
+        for n in range(1, 4)
+    ],
+    "resources": ["[CrewAI docs](https://docs.crewai.com)"] * 3,
+    "next_steps": ["Findings and recommendations for the problem."] * 4,
+}
+
+
+# Shared by every ScriptedLLM instance: seconds per call and usage counters
+settings = {"latency": 0.5}
+usage = {"calls": 0, "chars": 0}
+_lock = threading.Lock()
+
+
+class ScriptedLLM(BaseLLM):
+    """Answers each prompt like a well-behaved model, after a fixed delay."""
+
+    def call(self, messages, *args, **kwargs):
+        time.sleep(settings["latency"])
+        prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+        if "executive_summary" in prompt:
+            answer = "Thought: I now know the final answer\nFinal Answer: " + json.dumps(REPORT)
+        elif "Google Docs Creator" in prompt and not any(
+            isinstance(m, dict) and m.get("role") == "assistant" for m in messages
+        ):
+            answer = (
+                "Thought: I will publish the formatted document\nAction: Google Docs Creator\n"
+                "Action Input: " + json.dumps({"title": REPORT["title"], "content": RESEARCH_MARKDOWN})
+            )
+        else:
+            answer = "Thought: I now know the final answer\nFinal Answer: " + RESEARCH_MARKDOWN
+        with _lock:
+            usage["calls"] += 1
+            usage["chars"] += len(prompt) + len(answer)
+        return answer
+
+
+def measure(pipeline: str, runs: int) -> dict:
+    usage.update(calls=0, chars=0)
+    started = time.perf_counter()
+    for n in range(runs):
+        run_problem(f"How do we scale customer support with agents? ({pipeline} {n})", pipeline=pipeline)
+    elapsed = time.perf_counter() - started
+    return {
+        "seconds": elapsed / runs,
+        "calls": usage["calls"] / runs,
+        "tokens": usage["chars"] / 4 / runs,
+    }
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    settings["latency"] = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    for name in factory.AGENT_NAMES:
+        factory._shared_llms[name] = ScriptedLLM(model="scripted")
+
+    results = {pipeline: measure(pipeline, runs) for pipeline in ("full", "fast")}
+    print(f"\nPer request, {runs} runs, {settings['latency']:.2f} s per LLM call")
+    for pipeline, result in results.items():
+        print(
+            f"  {pipeline:<5}: {result['seconds']:6.2f} s  "
+            f"{result['calls']:4.1f} LLM calls  ~{result['tokens']:8.0f} tokens"
+        )
+    full, fast = results["full"], results["fast"]
+    print(f"  latency  : {full['seconds'] / fast['seconds']:.2f}x faster")
+    print(f"  tokens   : {1 - fast['tokens'] / full['tokens']:.0%} fewer")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Import-time report for the entry points.
+
+Runs ``python -X importtime -c "import <module>"`` in a fresh interpreter,
+parses the per-module timings from stderr and lists where each entry point's
+startup time goes. The budgets and lazy-import rules themselves are enforced
+by ``tests/test_import_time.py``.
+
+Usage:
+    PYTHONPATH=src python benchmarks/import_time.py            # report
+    PYTHONPATH=src python benchmarks/import_time.py --top 20   # more detail
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ENTRY_POINTS = (
+    "problem_solving_research_agent.main",
+    "problem_solving_research_agent.jobs",
+    "problem_solving_research_agent.tools.google_docs",
+)
+# Heavy dependencies worth spotting in a report
+HEAVY = ("crewai", "googleapiclient", "google.oauth2", "reportlab", "markdown_it")
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> dict:
+    """Return {module_name: (self_us, cumulative_us)} for a fresh import."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "import-time-placeholder")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{completed.stderr[-2000:]}")
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            timings[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return timings
+
+
+def report(module: str, top: int) -> None:
+    timings = measure(module)
+    total_ms = timings.get(module, (0, 0))[1] / 1000
+    print(f"\n{module}: {total_ms:.1f} ms cumulative")
+    heaviest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    for name, (self_us, _) in heaviest:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+    loaded = [name for name in HEAVY if name in timings]
+    if loaded:
+        print(f"  loads: {', '.join(loaded)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=ENTRY_POINTS, help="Modules to import (the entry points by default)")
+    parser.add_argument("--top", type=int, default=8, help="Slowest modules to list per entry point")
+    options = parser.parse_args()
+
+    for module in options.modules:
+        report(module, options.top)
+
+
+if __name__ == "__main__":
+    main()
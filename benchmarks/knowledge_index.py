@@ -0,0 +1,97 @@
+"""Benchmark: knowledge retrieval cost as the corpus grows.
+
+Generates synthetic playbooks into a temporary directory and measures, per
+corpus size: the initial index build, a no-op refresh, an incremental refresh
+after editing one file, query latency, and the prompt size of the retrieved
+context compared with injecting the whole corpus.
+
+Usage:
+    PYTHONPATH=src python benchmarks/knowledge_index.py [sizes...]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from problem_solving_research_agent.knowledge import KnowledgeIndex, format_context
+
+TOPICS = [
+    "billing", "escalation", "onboarding", "latency", "caching", "retrieval", "agents", "crewai",
+    "support", "triage", "pricing", "compliance", "security", "observability", "deployment", "railway",
+    "streaming", "pdf", "google", "docs", "batch", "checkpoint", "queue", "retry", "budget", "routing",
+]
+WORDS = (
+    "team customer workflow incident runbook owner metric review rollout cost threshold policy "
+    "customer handoff schedule sprint backlog release dashboard alert vendor contract renewal"
+).split()
+QUERIES = [
+    "How do we reduce LLM latency with caching and streaming?",
+    "Escalation playbook for billing disputes in customer support",
+    "Deploying a CrewAI agent pipeline to Railway with observability",
+]
+
+
+def generate(directory: Path, documents: int, seed: int = 7) -> int:
+    rng = random.Random(seed)
+    total = 0
+    for n in range(documents):
+        topics = rng.sample(TOPICS, 3)
+        paragraphs = [f"# Playbook {n}: {' / '.join(topics)}"]
+        for _ in range(6):
+            words = rng.choices(WORDS + topics * 3, k=60)
+            paragraphs.append(" ".join(words).capitalize() + ".")
+        text = "\n\n".join(paragraphs)
+        (directory / f"playbook_{n:05d}.md").write_text(text, encoding="utf-8")
+        total += len(text)
+    return total
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def measure(documents: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "knowledge"
+        source.mkdir()
+        corpus_chars = generate(source, documents)
+        index = KnowledgeIndex(str(source), str(Path(tmp) / "index"))
+        _, build = timed(index.refresh)
+        _, noop = timed(index.refresh)
+        edited = source / "playbook_00000.md"
+        edited.write_text(edited.read_text(encoding="utf-8") + "\n\nUpdated escalation owner.", encoding="utf-8")
+        _, incremental = timed(index.refresh)
+        search_total = 0.0
+        context_chars = 0
+        for query in QUERIES:
+            hits, elapsed = timed(lambda: index.search(query, 4))
+            search_total += elapsed
+            context_chars = max(context_chars, len(format_context(hits)))
+        return {
+            "build": build,
+            "noop": noop,
+            "incremental": incremental,
+            "search": search_total / len(QUERIES),
+            "context_chars": context_chars,
+            "corpus_chars": corpus_chars,
+            "index_bytes": index.index_path.stat().st_size,
+        }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [100, 1000, 5000]
+    print(f"{'docs':>6} {'build':>8} {'no-op':>8} {'1 edit':>8} {'query':>8} {'prompt':>9} {'corpus':>11} {'index':>10}")
+    for documents in sizes:
+        r = measure(documents)
+        print(
+            f"{documents:>6} {r['build']:7.2f}s {r['noop'] * 1000:6.1f}ms {r['incremental']:7.2f}s "
+            f"{r['search'] * 1000:6.1f}ms {r['context_chars']:>7}ch {r['corpus_chars']:>9}ch "
+            f"{r['index_bytes'] / 1024:8.0f}KB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: repeated evaluation runs with and without the LLM response cache.
+
+Runs the same problem statement ``iterations`` times through ``run_problem``
+(as ``train``/``test`` do) against the local fake OpenAI-compatible server,
+first with ``LLM_CACHE_MODE=off`` and then with ``readwrite`` on an empty
+store. The publisher's call after its tool call still misses: the tool result
+carries a new document ID every run.
+
+Usage:
+    PYTHONPATH=src python benchmarks/llm_cache.py [iterations] [first_token_delay]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+os.environ["LLM_CACHE_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "llm_responses.sqlite3")
+
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+PROBLEM = "How do we scale customer support with agents?"
+
+
+def measure(server, mode: str, iterations: int) -> dict:
+    os.environ["LLM_CACHE_MODE"] = mode
+    before = len(server.requests)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        run_problem(PROBLEM, use_cache=False)
+    return {"seconds": (time.perf_counter() - started) / iterations, "requests": len(server.requests) - before}
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    server = FakeLLMServer(token_delay=0.005, first_token_delay=delay).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        measure(server, "off", 1)
+        results = {mode: measure(server, mode, iterations) for mode in ("off", "readwrite")}
+    finally:
+        server.stop()
+
+    print(f"\nPer run, {iterations} iterations, {delay:.2f} s to first token")
+    for mode, result in results.items():
+        print(f"  {mode:<9}: {result['seconds']:6.2f} s  {result['requests']:3} LLM requests in total")
+    print(f"  readwrite: {results['off']['seconds'] / results['readwrite']['seconds']:.1f}x faster than off")
+
+
+if __name__ == "__main__":
+    main()
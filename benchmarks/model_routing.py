@@ -0,0 +1,125 @@
+"""Benchmark: publish-step latency with every agent pinned to gpt-4o vs routed.
+
+Serves "gpt-4o" and "gpt-4o-mini" from two local fake OpenAI-compatible
+servers with different injected latencies (``LLM_ROUTING_BASE_URLS``) and
+runs crews end to end against the in-memory Google Docs fake. Pinned
+(``LLM_ROUTING_ENABLED=false``) every call goes to the slow endpoint; routed,
+the document publisher follows its ``routing`` config in ``agents.yaml``.
+
+A second pass routes calls between a hanging endpoint and a fast one with a
+short timeout: the first call cascades after the timeout, and the recorded
+latencies send the following calls straight to the fast model.
+
+Usage:
+    PYTHONPATH=src python benchmarks/model_routing.py [runs] [slow_seconds] [fast_seconds]
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+os.environ["OUTPUT_SAVE_RUNS"] = "false"
+os.environ["PUBLISH_OUTBOX_ENABLED"] = "false"
+
+from crewai import LLM  # noqa: E402
+
+from problem_solving_research_agent import factory, routing  # noqa: E402
+from problem_solving_research_agent.events import TASK_COMPLETED, event_bus  # noqa: E402
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.routing import LatencyTracker, ModelOption, RoutedLLM, RoutePolicy  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+PUBLISH_TASK = "publish_solution_as_document"
+
+
+def measure(mode: str, runs: int) -> dict:
+    os.environ["LLM_ROUTING_ENABLED"] = "true" if mode == "routed" else "false"
+    factory._shared_llms.clear()
+    routing._tracker = None
+    durations = {}
+    unsubscribe = event_bus.subscribe(
+        lambda event: durations.setdefault(event.data.get("task"), []).append(event.data["duration_s"])
+        if event.type == TASK_COMPLETED and event.data.get("duration_s") is not None else None
+    )
+    try:
+        for n in range(runs):
+            run_problem(f"How do we scale customer support with agents? ({mode} {n})")
+    finally:
+        unsubscribe()
+    return durations
+
+
+def cascade(calls: int, timeout: float) -> list:
+    """Route ``calls`` calls between a hanging gpt-4o and a fast gpt-4o-mini."""
+    hanging = FakeLLMServer(token_delay=0.001, first_token_delay=timeout * 10).start()
+    fast = FakeLLMServer(token_delay=0.001, first_token_delay=0.1).start()
+    policy = RoutePolicy(
+        models=(ModelOption("gpt-4o", base_url=hanging.base_url), ModelOption("gpt-4o-mini", base_url=fast.base_url)),
+        latency_budget_seconds=timeout,
+        timeout_seconds=timeout,
+    )
+    candidates = {
+        option.model: LLM(model=option.model, base_url=option.base_url, timeout=timeout, max_retries=0)
+        for option in policy.models
+    }
+    llm = RoutedLLM("benchmark", policy, candidates, LatencyTracker())
+    seconds = []
+    try:
+        for _ in range(calls):
+            started = time.perf_counter()
+            llm.call([{"role": "user", "content": "Summarize the plan."}])
+            seconds.append(time.perf_counter() - started)
+    finally:
+        hanging.stop()
+        fast.stop()
+    return seconds
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    slow = float(sys.argv[2]) if len(sys.argv) > 2 else 0.8
+    fast = float(sys.argv[3]) if len(sys.argv) > 3 else 0.15
+    servers = {
+        "gpt-4o": FakeLLMServer(token_delay=0.004, first_token_delay=slow).start(),
+        "gpt-4o-mini": FakeLLMServer(token_delay=0.001, first_token_delay=fast).start(),
+    }
+    os.environ["OPENAI_BASE_URL"] = servers["gpt-4o"].base_url
+    os.environ["LLM_ROUTING_BASE_URLS"] = ",".join(f"{model}={server.base_url}" for model, server in servers.items())
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        run_problem("Warm-up")
+        results = {mode: measure(mode, runs) for mode in ("pinned", "routed")}
+        stats = routing.get_latency_tracker().stats()
+    finally:
+        for server in servers.values():
+            server.stop()
+    cascaded = cascade(calls=5, timeout=0.5)
+
+    print(f"\n{runs} runs; gpt-4o answers after {slow:.2f} s, gpt-4o-mini after {fast:.2f} s")
+    for mode, durations in results.items():
+        publish = durations.get(PUBLISH_TASK) or [0.0]
+        research = [seconds for task, values in durations.items() if task != PUBLISH_TASK for seconds in values]
+        print(
+            f"  {mode:<6}: publish step {statistics.median(publish):5.2f} s p50 ({max(publish):5.2f} s max), "
+            f"research {statistics.median(research or [0.0]):5.2f} s p50"
+        )
+    for route, models in stats.items():
+        for model, model_stats in models.items():
+            print(
+                f"  {route} -> {model}: {model_stats['calls']} calls, p50 {model_stats['p50']:.2f} s, "
+                f"p90 {model_stats['p90']:.2f} s"
+            )
+    print(
+        "\nHanging gpt-4o, 0.5 s timeout: "
+        + ", ".join(f"{seconds:.2f} s" for seconds in cascaded)
+        + " (first call cascades, later calls go straight to gpt-4o-mini)"
+    )
+
+
+if __name__ == "__main__":
+    main()
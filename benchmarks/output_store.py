@@ -0,0 +1,84 @@
+"""Benchmark: finding and saving reports in a large output directory.
+
+Fills a temporary directory with ``documents`` reports twice: once the old
+way (``output/{timestamp}_{filename}.md``, found by listing the directory and
+opening candidates) and once through :class:`OutputStore` (found through its
+SQLite index). Then times looking up the reports for a few problem
+statements, and how long a crew waits to save its result with and without
+write-behind.
+
+Usage:
+    PYTHONPATH=src python benchmarks/output_store.py [documents] [lookups]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from problem_solving_research_agent.tools.output_store import OutputStore, problem_hash
+
+REPORT = "# Report {n}\n\n" + "Findings and recommendations. " * 200
+
+
+def problem(n: int) -> str:
+    return f"How do we solve problem {n}?"
+
+
+def fill_legacy(root: str, documents: int) -> None:
+    os.makedirs(root, exist_ok=True)
+    for n in range(documents):
+        # The problem has to be recovered from the file itself
+        with open(os.path.join(root, f"20250101_{n:06d}_report_{n}.md"), "w", encoding="utf-8") as f:
+            f.write(f"<!-- problem: {problem_hash(problem(n))} -->\n" + REPORT.format(n=n))
+
+
+def find_legacy(root: str, problem_statement: str) -> list:
+    wanted = f"<!-- problem: {problem_hash(problem_statement)} -->"
+    found = []
+    for name in sorted(os.listdir(root), reverse=True):
+        with open(os.path.join(root, name), encoding="utf-8") as f:
+            if f.readline().strip() == wanted:
+                found.append(name)
+    return found
+
+
+def fill_store(store: OutputStore, documents: int) -> None:
+    for n in range(documents):
+        store.save(REPORT.format(n=n), f"report_{n}", title=f"Report {n}", problem_statement=problem(n))
+
+
+def timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    root = tempfile.mkdtemp()
+    legacy_root = os.path.join(root, "legacy")
+    fill_legacy(legacy_root, documents)
+    store = OutputStore(os.path.join(root, "store"), write_behind=True)
+    fill_store(store, documents)
+    targets = [problem(n * documents // lookups) for n in range(lookups)]
+
+    legacy = [timed(find_legacy, legacy_root, target) for target in targets]
+    indexed = [timed(store.find, target) for target in targets]
+    assert all(store.find(target) for target in targets)
+
+    report = REPORT.format(n="new") + "\n" + "x" * 200_000
+    sync = [timed(store.save, report + str(n), "new_report") for n in range(20)]
+    behind = [timed(store.save_async, report + f"async {n}", "new_report") for n in range(20)]
+    store.flush()
+
+    print(f"\n{documents} documents in the output directory")
+    print(f"  find by problem, directory scan: {statistics.median(legacy) * 1000:9.2f} ms median")
+    print(f"  find by problem, SQLite index  : {statistics.median(indexed) * 1000:9.2f} ms median")
+    print(f"  save 200 KB report, synchronous : {statistics.median(sync) * 1000:8.2f} ms median")
+    print(f"  save 200 KB report, write-behind: {statistics.median(behind) * 1000:8.2f} ms median")
+
+
+if __name__ == "__main__":
+    main()
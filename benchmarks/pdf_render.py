@@ -0,0 +1,138 @@
+"""Throughput benchmark: markdown-to-PDF rendering on large generated reports.
+
+Compares the previous renderer (markdown -> HTML -> BeautifulSoup ->
+``find_all``) with the single-pass token renderer in ``pdf_renderer``.
+
+Usage:
+    PYTHONPATH=src python benchmarks/pdf_render.py [sections] [iterations]
+
+The legacy renderer needs the ``markdown`` and ``beautifulsoup4`` packages; it
+is skipped when they are not installed.
+"""
+import sys
+import time
+from io import BytesIO
+
+from problem_solving_research_agent.pdf_renderer import iter_flowables, render_pdf
+
+
+def generate_report(sections: int, full: bool = True) -> str:
+    """A report shaped like crew output.
+
+    With ``full=False`` only headings, prose and nested lists are generated,
+    which the legacy renderer also handles; the full report adds
+    code blocks, tables and block quotes.
+    """
+    parts = ["# Research Report: Scaling a Multi-Agent Pipeline\n"]
+    for n in range(1, sections + 1):
+        parts.append(f"""
+## {n}. Finding {n}
+
+The **primary constraint** in area {n} is latency under load; see
+[the reference](https://example.com/{n}) and `config_{n}.yaml` for details
+and caveats. Throughput improved by 10% after tuning.
+
+- Observation {n}.1 with *emphasis*
+  - Detail {n}.1.a
+    - Sub-detail with `inline code`
+    - Another sub-detail
+  - Detail {n}.1.b
+    - Sub-detail
+- Observation {n}.2
+  - Detail {n}.2.a
+
+1. Step one for {n}
+2. Step two for {n}
+   1. Nested step
+""")
+        if full:
+            parts.append(f"""
+```python
+def handler_{n}(request):
+    return process(request, retries={n}, timeout=30.0)
+```
+
+| Metric | Before | After |
+|--------|--------|-------|
+| p50 ms | {100 + n} | {60 + n} |
+| p95 ms | {400 + n} | {180 + n} |
+
+> Note {n}: results measured on a single worker & <1% variance.
+""")
+    return "".join(parts)
+
+
+def legacy_render(markdown_content: str) -> BytesIO:
+    """The renderer streamlit_app.py used before the token-stream renderer."""
+    import markdown
+    from bs4 import BeautifulSoup
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+    soup = BeautifulSoup(markdown.markdown(markdown_content), 'html.parser')
+    for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'li']):
+        if element.name.startswith('h'):
+            level = int(element.name[1])
+            style = styles[{1: 'Title', 2: 'Heading1', 3: 'Heading2'}.get(level, 'Heading3')]
+            story.append(Paragraph(element.get_text(), style))
+            story.append(Spacer(1, 12))
+        elif element.name == 'p':
+            story.append(Paragraph(element.get_text(), styles['Normal']))
+            story.append(Spacer(1, 12))
+        elif element.name in ['ul', 'ol']:
+            for li in element.find_all('li'):
+                story.append(Paragraph(f"• {li.get_text()}", styles['Normal']))
+            story.append(Spacer(1, 12))
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def measure(fn, source: str, iterations: int):
+    fn(source)  # warm up imports and cached styles
+    started = time.perf_counter()
+    for _ in range(iterations):
+        size = len(fn(source).getvalue())
+    return (time.perf_counter() - started) / iterations, size
+
+
+def main():
+    sections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    try:
+        import bs4  # noqa: F401
+        import markdown  # noqa: F401
+        has_legacy = True
+    except ImportError:
+        has_legacy = False
+
+    workloads = (
+        ("prose + nested lists", generate_report(sections, full=False)),
+        ("full report (code, tables, quotes)", generate_report(sections)),
+    )
+    for label, source in workloads:
+        kb = len(source.encode("utf-8")) / 1024
+        flowables = sum(1 for _ in iter_flowables(source))
+        print(f"\n{label}: {sections} sections, {kb:.0f} KiB of markdown, {flowables} flowables")
+        results = {}
+        if has_legacy:
+            results["legacy"] = measure(legacy_render, source, iterations)
+        else:
+            print("  legacy renderer   : skipped (markdown/beautifulsoup4 not installed)")
+        results["single-pass"] = measure(render_pdf, source, iterations)
+        for name, (seconds, size) in results.items():
+            print(f"  {name:<18}: {seconds * 1000:8.1f} ms  {kb / seconds:8.1f} KiB/s  ({size / 1024:.0f} KiB PDF)")
+        if "legacy" in results:
+            print(f"  speedup           : {results['legacy'][0] / results['single-pass'][0]:8.2f}x")
+    if has_legacy:
+        print("\nThe legacy renderer flattens code blocks and tables into plain paragraphs and")
+        print("repeats nested list items, so its PDFs are not comparable on the full report.")
+
+
+if __name__ == "__main__":
+    main()
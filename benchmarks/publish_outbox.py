@@ -0,0 +1,112 @@
+"""Benchmark: publishing Google Docs inline vs through the publish outbox.
+
+Runs crews end to end against the local fake OpenAI-compatible server and the
+in-memory Google Docs fake, which here takes ``google_latency`` seconds per
+call like a real round trip. Inline, the publisher's tool call waits for
+``create``, every ``batchUpdate`` and the permission grant; with the outbox
+it returns a handle and the workers publish afterwards.
+
+A second pass injects transient failures (503s and 429s) into the fake and
+checks that every job still ends up as exactly one document.
+
+Usage:
+    PYTHONPATH=src python benchmarks/publish_outbox.py [runs] [google_latency_seconds]
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+os.environ["OUTPUT_SAVE_RUNS"] = "false"
+
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+from problem_solving_research_agent.tools import publish_outbox  # noqa: E402
+from problem_solving_research_agent.tools.google_clients import get_client_pool  # noqa: E402
+from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp  # noqa: E402
+from problem_solving_research_agent.tools.publish_outbox import PENDING, PUBLISHED, RUNNING, PublishOutbox  # noqa: E402
+
+
+def use_fake(fake: FakeGoogleHttp) -> None:
+    get_client_pool().use_transport(lambda: fake)
+
+
+def measure(mode: str, runs: int, latency: float) -> dict:
+    fake = FakeGoogleHttp(latency=latency)
+    use_fake(fake)
+    os.environ["PUBLISH_OUTBOX_ENABLED"] = "true" if mode == "outbox" else "false"
+    crew_seconds, published_seconds = [], []
+    for n in range(runs):
+        # The fake LLM publishes the same document every run; a fresh outbox
+        # keeps its idempotency key from returning the previous run's document
+        if publish_outbox._outbox is not None:
+            publish_outbox._outbox.stop()
+        publish_outbox._outbox = None
+        os.environ["PUBLISH_OUTBOX_DB_PATH"] = os.path.join(tempfile.mkdtemp(), "outbox.sqlite3")
+        started = time.perf_counter()
+        run_problem(f"How do we scale customer support with agents? ({mode} {n})")
+        crew_seconds.append(time.perf_counter() - started)
+        if mode == "outbox":
+            outbox = publish_outbox.get_publish_outbox()
+            while any(outbox.stats()[status] for status in (PENDING, RUNNING)):
+                time.sleep(0.01)
+        published_seconds.append(time.perf_counter() - started)
+    return {"crew": crew_seconds, "published": published_seconds, "documents": len(fake.documents)}
+
+
+def flaky(jobs: int) -> dict:
+    """Publish ``jobs`` documents while the fake fails a third of its calls."""
+    pick = random.Random(0)
+    fake = FakeGoogleHttp(fail_with=[pick.choice((503, 429, 200, 200, 200, 200)) for _ in range(jobs * 20)])
+    use_fake(fake)
+    outbox = PublishOutbox(
+        os.path.join(tempfile.mkdtemp(), "outbox.sqlite3"), base_delay=0.05, max_delay=0.5, writes_per_minute=0
+    ).start()
+    keys = [outbox.enqueue("markdown", f"Report {n}", f"# Report {n}\n\nBody {n}")["key"] for n in range(jobs)]
+    # Submitting the same documents again is a no-op
+    for n in range(jobs):
+        outbox.enqueue("markdown", f"Report {n}", f"# Report {n}\n\nBody {n}")
+    finished = [outbox.wait(key, timeout=60) for key in keys]
+    outbox.stop()
+    return {
+        "published": sum(1 for job in finished if job["status"] == PUBLISHED),
+        "documents": len(fake.documents),
+        "calls": len(fake.calls),
+    }
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    server = FakeLLMServer(token_delay=0.001, first_token_delay=0.1).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        use_fake(FakeGoogleHttp())
+        run_problem("Warm-up")
+        results = {mode: measure(mode, runs, latency) for mode in ("inline", "outbox")}
+    finally:
+        server.stop()
+    retried = flaky(10)
+
+    print(f"\n{runs} runs, {latency:.2f} s per Google API call")
+    for mode, result in results.items():
+        print(
+            f"  {mode:<7}: crew {statistics.median(result['crew']):5.2f} s median, "
+            f"document published after {statistics.median(result['published']):5.2f} s, "
+            f"{result['documents']} documents"
+        )
+    print(
+        f"\nFlaky API (503/429 on a third of calls): {retried['published']}/10 published, "
+        f"{retried['documents']} documents created, {retried['calls']} API calls"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark: concurrent crews against a rate-limited API, with and without the limiter.
+
+Runs ``batch`` batch-priority and ``interactive`` interactive crews at once
+against the local fake OpenAI-compatible server, which answers 429 once more
+than ``limit`` requests arrive within a second. Without the limiter, requests
+burst, get rejected and fall back on the client's retries. With it, requests
+wait for the shared bucket (sized to the same limit) and interactive crews go
+first.
+
+Usage:
+    PYTHONPATH=src python benchmarks/rate_limit.py [batch] [interactive] [limit_per_second]
+"""
+import os
+import statistics
+import sys
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from problem_solving_research_agent import factory, rate_limit  # noqa: E402
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.rate_limit import BATCH, INTERACTIVE, priority_context  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+
+def measure(server, enabled: bool, batch: int, interactive: int) -> dict:
+    os.environ["LLM_RATE_LIMIT_ENABLED"] = "true" if enabled else "false"
+    # LLMs pick up the interceptor when created; start from a fresh limiter
+    factory._shared_llms.clear()
+    rate_limit._limiter = None
+    rejected_before = server.rejected
+    timings = {BATCH: [], INTERACTIVE: []}
+    failures = []
+
+    def run(n: int, priority: str):
+        started = time.perf_counter()
+        try:
+            with priority_context(priority):
+                run_problem(f"How do we scale customer support with agents? ({priority} {n}, {enabled})")
+        except Exception as e:
+            failures.append(str(e)[:80])
+            return
+        timings[priority].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=run, args=(n, BATCH)) for n in range(batch)]
+    threads += [threading.Thread(target=run, args=(n, INTERACTIVE)) for n in range(interactive)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = rate_limit.get_rate_limiter().stats() if enabled else {}
+    return {
+        "seconds": time.perf_counter() - started,
+        "rejected": server.rejected - rejected_before,
+        "failed": len(failures),
+        "timings": timings,
+        "max_wait": stats.get("max_wait_seconds", 0.0),
+        "mean_wait": stats.get("mean_wait_seconds", 0.0),
+    }
+
+
+def describe(values: list) -> str:
+    if not values:
+        return "   n/a"
+    return f"{statistics.median(values):5.2f} s median, {max(values):5.2f} s max"
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    interactive = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+    os.environ["LLM_RATE_LIMIT_RPM"] = str(limit * 60)
+    server = FakeLLMServer(token_delay=0.001, first_token_delay=0.2, rate_limit=limit, rate_window=1.0).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        run_problem("Warm-up")
+        results = {"no limiter": measure(server, False, batch, interactive), "limiter": measure(server, True, batch, interactive)}
+    finally:
+        server.stop()
+
+    print(f"\n{batch} batch + {interactive} interactive crews, API limit {limit} requests/s")
+    for mode, result in results.items():
+        print(
+            f"  {mode:<10}: {result['seconds']:6.2f} s in total  {result['rejected']:3} 429s  "
+            f"{result['failed']} runs failed"
+        )
+        print(f"    interactive: {describe(result['timings'][INTERACTIVE])}")
+        print(f"    batch      : {describe(result['timings'][BATCH])}")
+        if mode == "limiter":
+            print(f"    queue wait : {result['mean_wait']:5.2f} s mean, {result['max_wait']:5.2f} s max")
+
+
+if __name__ == "__main__":
+    main()
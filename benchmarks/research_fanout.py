@@ -0,0 +1,137 @@
+"""Benchmark: one research task vs parallel sub-question fan-out.
+
+Runs the full pipeline end to end through ``run_problem`` against the
+in-memory Google Docs fake with a scripted, latency-injecting fake LLM: every
+call waits a fixed round-trip latency plus a delay per generated token, so a
+long answer costs proportionally more. The single research task writes the
+whole document in one answer; with ``RESEARCH_FANOUT`` each sub-question's
+share is written in parallel and merged locally. Both produce the same amount
+of research text.
+
+Usage:
+    PYTHONPATH=src python benchmarks/research_fanout.py [width] [concurrency] [seconds_per_token]
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from crewai.llms.base_llm import BaseLLM  # noqa: E402
+
+from problem_solving_research_agent import factory  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+PARAGRAPH = "Findings and recommendations for this part of the architecture, with sources. "
+TOPICS = ["data ingestion", "orchestration", "storage", "serving", "observability", "security", "cost", "rollout"]
+_HANDLE_RE = re.compile(r"artifact://[0-9a-f]{64}")
+
+# Shared by every ScriptedLLM instance
+settings = {"latency": 0.3, "token_delay": 0.002, "width": 4}
+usage = {"calls": 0, "chars": 0, "in_flight": 0, "peak": 0}
+_lock = threading.Lock()
+
+
+def findings(topic: str, share: int) -> dict:
+    return {
+        "analysis": f"{topic.title()}: " + PARAGRAPH * share,
+        "findings": PARAGRAPH * share,
+        "steps": [f"Design the {topic} layer", f"Roll out the {topic} layer"],
+        "recommendations": ["Use CrewAI with a sequential process"],
+        "resources": ["[CrewAI docs](https://docs.crewai.com)"],
+    }
+
+
+def answer_for(messages) -> str:
+    prompt = messages if isinstance(messages, str) else "\n".join(str(m.get("content", "")) for m in messages)
+    width = settings["width"]
+    if "researched independently and in parallel" in prompt:
+        answer = json.dumps({"questions": [f"How should we handle {topic}?" for topic in TOPICS[:width]]})
+    elif "You are researching one part" in prompt:
+        topic = next((topic for topic in TOPICS if f"handle {topic}?" in prompt), TOPICS[0])
+        # Each sub-question writes its share of the same total research text
+        answer = json.dumps(findings(topic, 96 // width // 2))
+    elif "Google Docs Creator" in prompt and not any(
+        isinstance(m, dict) and m.get("role") == "assistant" for m in messages
+    ):
+        handle = _HANDLE_RE.search(prompt)
+        content = f"## Executive Summary\n\nA staged plan.\n\n{handle.group(0)}" if handle else "Plan"
+        return (
+            "Thought: I will publish the formatted document\nAction: Google Docs Creator\n"
+            "Action Input: " + json.dumps({"title": "Architecture Plan", "content": content})
+        )
+    elif "Google Docs Creator" in prompt:
+        handle = _HANDLE_RE.search(prompt)
+        answer = f"## Executive Summary\n\nPublished.\n\n{handle.group(0) if handle else ''}"
+    else:
+        answer = "\n\n".join(f"## {topic.title()}\n\n" + PARAGRAPH * (96 // width) for topic in TOPICS[:width])
+    return "Thought: I now know the final answer\nFinal Answer: " + answer
+
+
+class ScriptedLLM(BaseLLM):
+    """Answers like a cooperative model, taking longer for longer answers."""
+
+    def call(self, messages, *args, **kwargs):
+        answer = answer_for(messages)
+        with _lock:
+            usage["calls"] += 1
+            usage["in_flight"] += 1
+            usage["peak"] = max(usage["peak"], usage["in_flight"])
+        try:
+            # Round trip plus about four characters per generated token
+            time.sleep(settings["latency"] + len(answer) / 4 * settings["token_delay"])
+        finally:
+            with _lock:
+                usage["in_flight"] -= 1
+        return answer
+
+
+def measure(width: int, concurrency: int) -> dict:
+    os.environ["RESEARCH_FANOUT"] = str(width)
+    os.environ["RESEARCH_FANOUT_CONCURRENCY"] = str(concurrency)
+    usage.update(calls=0, peak=0)
+    started = time.perf_counter()
+    result = run_problem(f"How should we architect our data platform? (fan-out {width})")
+    return {
+        "seconds": time.perf_counter() - started,
+        "calls": usage["calls"],
+        "peak": usage["peak"],
+        "chars": len(result),
+    }
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    if len(sys.argv) > 3:
+        settings["token_delay"] = float(sys.argv[3])
+    settings["width"] = width
+    for name in factory.AGENT_NAMES:
+        factory._shared_llms[name] = ScriptedLLM(model="scripted")
+        factory._shared_llms[f"{name}:buffered"] = ScriptedLLM(model="scripted")
+
+    # Warm-up run so crewAI's imports are not timed
+    measure(0, 1)
+    results = {"single": measure(0, 1), f"fan-out {width}": measure(width, concurrency)}
+    print(
+        f"\nOne request, {settings['latency']:.2f} s per call + {settings['token_delay'] * 1000:.1f} ms per token, "
+        f"concurrency {concurrency}"
+    )
+    for mode, result in results.items():
+        print(
+            f"  {mode:<10}: {result['seconds']:6.2f} s  {result['calls']:2} LLM calls  "
+            f"{result['peak']} at once  {result['chars']:6} chars in result"
+        )
+    single, fanned = results["single"], results[f"fan-out {width}"]
+    print(f"  latency   : {single['seconds'] / fanned['seconds']:.2f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark: a burst of identical submissions with and without coalescing.
+
+Submits the same problem statement ``requests`` times at once against the
+local fake OpenAI-compatible server and the in-memory Google Docs fake. With
+coalescing, the submissions go through :class:`JobQueue`, which starts one
+crew and hands every submitter its job; without it, each submission runs its
+own crew, as the UI did before. The result cache is off so that only
+coalescing can save work.
+
+Usage:
+    PYTHONPATH=src python benchmarks/singleflight.py [requests] [workers]
+"""
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.jobs import FINISHED_STATES, JobQueue, JobStore  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+PROBLEM = "How do we scale customer support with agents?"
+
+
+def independent(requests: int, workers: int) -> list:
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda _: run_problem(PROBLEM), range(requests)))
+
+
+def coalesced(requests: int, workers: int) -> list:
+    queue = JobQueue(JobStore(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3")), workers=workers)
+    # Whitespace and case differences still coalesce
+    job_ids = [queue.submit(PROBLEM.upper() if n % 2 else f"  {PROBLEM}") for n in range(requests)]
+    while not all(queue.get(job_id)["status"] in FINISHED_STATES for job_id in job_ids):
+        time.sleep(0.01)
+    queue.shutdown()
+    return [queue.get(job_id)["result"] for job_id in job_ids]
+
+
+def measure(server, fn, requests: int, workers: int) -> dict:
+    before = len(server.requests)
+    started = time.perf_counter()
+    results = fn(requests, workers)
+    return {
+        "seconds": time.perf_counter() - started,
+        "requests": len(server.requests) - before,
+        "answered": sum(1 for result in results if result),
+    }
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    server = FakeLLMServer(token_delay=0.002, first_token_delay=0.3).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports are not timed
+        run_problem(PROBLEM)
+        results = {
+            "independent": measure(server, independent, requests, workers),
+            "coalesced": measure(server, coalesced, requests, workers),
+        }
+    finally:
+        server.stop()
+
+    print(f"\n{requests} identical submissions, {workers} workers")
+    for mode, result in results.items():
+        print(
+            f"  {mode:<11}: {result['seconds']:6.2f} s until all answered  "
+            f"{result['requests']:3} LLM requests  {result['answered']} answered"
+        )
+    before, after = results["independent"], results["coalesced"]
+    print(f"  LLM requests: {1 - after['requests'] / before['requests']:.0%} fewer")
+    print(f"  latency     : {before['seconds'] / after['seconds']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
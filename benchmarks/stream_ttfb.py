@@ -0,0 +1,81 @@
+"""Benchmark: time to first answer token with and without LLM streaming.
+
+Runs the full crew through ``run_problem`` against the local fake
+OpenAI-compatible server (``fake_llm_server``) and the in-memory Google Docs
+fake, once with ``LLM_STREAMING`` off and once on. The reader-visible latency
+is the time until the first answer text reaches an :class:`AnswerFilter`
+subscriber (what the CLI prints and the UI shows); without streaming that is
+the end of the run.
+
+Usage:
+    PYTHONPATH=src python benchmarks/stream_ttfb.py [runs] [token_delay_seconds]
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark-placeholder")
+os.environ["GOOGLE_API_FAKE_TRANSPORT"] = "true"
+os.environ["GOOGLE_SERVICE_ACCOUNT_PATH"] = os.devnull
+os.environ["RESULT_CACHE_ENABLED"] = "false"
+os.environ["CHECKPOINTS_ENABLED"] = "false"
+
+from problem_solving_research_agent import factory  # noqa: E402
+from problem_solving_research_agent.events import LLM_CHUNK, LLM_COMPLETED, event_bus  # noqa: E402
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+from problem_solving_research_agent.streaming import AnswerFilter  # noqa: E402
+
+
+def measure(streaming: bool, runs: int) -> dict:
+    os.environ["LLM_STREAMING"] = "true" if streaming else "false"
+    # LLMs read the flag when created
+    factory._shared_llms.clear()
+    first, total = [], []
+    for n in range(runs):
+        answer = AnswerFilter()
+        seen = {}
+
+        def on_event(event):
+            if event.type == LLM_CHUNK:
+                text = answer.feed(event.data.get("call_id"), event.data.get("chunk") or "")
+            elif event.type == LLM_COMPLETED:
+                text = answer.finish(event.data.get("call_id"))
+            else:
+                return
+            if text and "first" not in seen:
+                seen["first"] = time.perf_counter()
+
+        unsubscribe = event_bus.subscribe(on_event)
+        started = time.perf_counter()
+        try:
+            run_problem(f"How do we scale customer support with agents? ({streaming} {n})")
+        finally:
+            unsubscribe()
+        ended = time.perf_counter()
+        total.append(ended - started)
+        first.append(seen.get("first", ended) - started)
+    return {"first": sum(first) / runs, "total": sum(total) / runs}
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    token_delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    server = FakeLLMServer(token_delay=token_delay, first_token_delay=0.2).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+    try:
+        # Warm-up run so crewAI's imports and crew construction are not timed
+        measure(False, 1)
+        results = {mode: measure(mode == "streaming", runs) for mode in ("buffered", "streaming")}
+    finally:
+        server.stop()
+
+    print(f"\nPer request, {runs} runs, {token_delay * 1000:.0f} ms per token")
+    for mode, result in results.items():
+        print(f"  {mode:<9}: first answer text {result['first']:6.2f} s  full answer {result['total']:6.2f} s")
+    buffered, streaming = results["buffered"], results["streaming"]
+    print(f"  time to first text: {buffered['first'] / streaming['first']:.1f}x sooner")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Headless HTTP API for submitting problems and following their runs.
+
+An ASGI app (Starlette) over the same :class:`~jobs.JobQueue` the Streamlit UI
+uses, for internal tools and for running several instances behind a load
+balancer. Start it with ``serve`` (see :func:`serve`).
+
+* ``POST /jobs`` with ``{"problem_statement": "..."}`` returns 202 and the
+  job; identical submissions still in flight share one job. A submission gets
+  429 with ``Retry-After`` when ``JOB_MAX_PENDING`` jobs are already queued or
+  running, or when its client has ``API_MAX_JOBS_PER_CLIENT`` unfinished jobs.
+* ``GET /jobs/{id}`` returns status, progress and stage.
+* ``GET /jobs/{id}/result`` returns 200 with the result, 202 while unfinished.
+  Google Docs the run queued appear as their URLs once published, and each
+  one's status is listed under ``publishes`` (poll again while any is pending).
+* ``GET /jobs/{id}/stream`` sends the answer as server-sent ``token`` events
+  while it is generated (``LLM_STREAMING=true``), then an ``end`` event.
+* ``GET /healthz`` returns 200, or 503 while the instance drains.
+
+Clients are told apart by their ``X-Client-ID`` header, or their address when
+they send none. On SIGTERM the server first drains: it refuses new jobs with
+503 and fails its health check, so the load balancer stops routing work to
+it. It keeps answering status, result and stream requests until its running
+jobs finish (at most ``API_DRAIN_SECONDS``) and only then shuts down. Jobs
+still unfinished are re-queued by the next process using the same
+``JOB_DB_PATH``. Job state is local to an instance, so a load balancer should
+route ``/jobs/{id}`` requests to the instance that accepted the job.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import threading
+import time
+from typing import AsyncIterator, Callable, Dict, Optional, Set
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from problem_solving_research_agent.jobs import FINISHED_STATES, JobQueue, QueueFull, get_job_queue
+from problem_solving_research_agent.metrics import API_SUBMISSIONS
+from problem_solving_research_agent.streaming import get_answer_streams
+
+CLIENT_HEADER = "x-client-id"
+# Seconds between keep-alive comments on an idle event stream
+KEEPALIVE_SECONDS = 15.0
+# Seconds between checks of an event stream for new text, and of its job's status
+POLL_SECONDS = 0.05
+JOB_POLL_SECONDS = 1.0
+JOB_FIELDS = ("id", "status", "progress", "stage", "error", "created_at", "started_at", "finished_at")
+
+
+class ClientLimitReached(RuntimeError):
+    """The client already has its maximum number of unfinished jobs."""
+
+
+class ClientLimits:
+    """Caps the unfinished jobs each client may have.
+
+    Args:
+        max_jobs: Unfinished jobs per client (0 for no limit)
+    """
+
+    def __init__(self, max_jobs: int):
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, client: str, submit: Callable[[], str], finished: Callable[[str], bool]) -> str:
+        """Call ``submit`` for ``client`` if it is under its limit; returns the job ID.
+
+        Raises:
+            ClientLimitReached: The client's earlier jobs are still unfinished
+        """
+        with self._lock:
+            jobs = self._jobs.setdefault(client, set())
+            jobs.difference_update([job_id for job_id in jobs if finished(job_id)])
+            if self.max_jobs and len(jobs) >= self.max_jobs:
+                raise ClientLimitReached(f"{len(jobs)} jobs of this client are still unfinished")
+            job_id = submit()
+            jobs.add(job_id)
+            return job_id
+
+
+def _job_view(job: dict) -> dict:
+    view = {field: job[field] for field in JOB_FIELDS}
+    view["links"] = {
+        "self": f"/jobs/{job['id']}",
+        "result": f"/jobs/{job['id']}/result",
+        "stream": f"/jobs/{job['id']}/stream",
+    }
+    return view
+
+
+def _result_view(job: dict) -> dict:
+    """A finished job's result with its publish:// handles resolved."""
+    view = {"id": job["id"], "status": job["status"], "result": job["result"], "error": job["error"], "publishes": []}
+    if job["result"] and "publish://" in job["result"]:
+        from problem_solving_research_agent.tools.publish_outbox import (
+            get_publish_outbox,
+            handles,
+            publish_status,
+            resolve_publish_handles,
+        )
+
+        outbox = get_publish_outbox()
+        if outbox is not None:
+            publishes = [outbox.get(key) for key in handles(job["result"])]
+            view["publishes"] = [publish_status(publish) for publish in publishes if publish is not None]
+            view["result"] = resolve_publish_handles(job["result"], outbox)
+    return view
+
+
+def _error(status: int, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+def _event(name: str, data: str) -> str:
+    lines = "".join(f"data: {line}\n" for line in data.split("\n"))
+    return f"event: {name}\n{lines}\n"
+
+
+async def _events(queue: JobQueue, job_id: str) -> AsyncIterator[str]:
+    """Server-sent events for a job: its answer text, then its final status.
+
+    Polls the run's stream on the event loop instead of blocking a worker
+    thread per connection; the job's status is read every ``JOB_POLL_SECONDS``
+    and as soon as the run ended.
+    """
+    job = await run_in_threadpool(queue.get, job_id)
+    streams = get_answer_streams()
+    # A finished job's stream may be gone; don't create one and evict a live run's
+    finished = job is None or job["status"] in FINISHED_STATES
+    stream = streams.find(job_id) if finished else streams.get(job_id)
+    sent = 0
+    checked = idle_since = time.monotonic()
+    while True:
+        if stream is not None and len(stream) > sent:
+            text = stream.text()
+            yield _event("token", text[sent:])
+            sent = len(text)
+            idle_since = time.monotonic()
+        now = time.monotonic()
+        if not finished and (stream.done or now - checked >= JOB_POLL_SECONDS):
+            job = await run_in_threadpool(queue.get, job_id)
+            finished = job is None or job["status"] in FINISHED_STATES
+            checked = now
+        if finished:
+            if stream is not None and len(stream) > sent:
+                continue
+            final = {"status": job["status"], "error": job["error"]} if job else {"status": None, "error": None}
+            yield _event("end", json.dumps(final))
+            return
+        if now - idle_since >= KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            idle_since = now
+        await asyncio.sleep(POLL_SECONDS)
+
+
+def create_app(
+    queue: Optional[JobQueue] = None,
+    max_jobs_per_client: Optional[int] = None,
+    retry_after: Optional[float] = None,
+) -> Starlette:
+    """Build the API app.
+
+    Args:
+        queue: Job queue to run submissions on (defaults to :func:`get_job_queue`)
+        max_jobs_per_client: Unfinished jobs per client (``API_MAX_JOBS_PER_CLIENT``, 0 for no limit)
+        retry_after: Seconds a refused client is told to wait (``API_RETRY_AFTER_SECONDS``)
+    """
+    if max_jobs_per_client is None:
+        max_jobs_per_client = int(os.getenv("API_MAX_JOBS_PER_CLIENT", "4"))
+    if retry_after is None:
+        retry_after = float(os.getenv("API_RETRY_AFTER_SECONDS", "10"))
+    limits = ClientLimits(max_jobs_per_client)
+    busy_headers = {"Retry-After": str(int(retry_after))}
+
+    def job_queue() -> JobQueue:
+        return app.state.queue
+
+    def finished(job_id: str) -> bool:
+        job = job_queue().get(job_id)
+        return job is None or job["status"] in FINISHED_STATES
+
+    async def submit(request: Request) -> JSONResponse:
+        if app.state.draining:
+            API_SUBMISSIONS.inc(labels={"result": "draining"})
+            return _error(503, "This instance is shutting down", busy_headers)
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error(400, "Body must be JSON")
+        problem_statement = body.get("problem_statement") if isinstance(body, dict) else None
+        if not isinstance(problem_statement, str) or not problem_statement.strip():
+            return _error(400, "problem_statement is required")
+
+        client = request.headers.get(CLIENT_HEADER) or (request.client.host if request.client else "unknown")
+        try:
+            job_id = await run_in_threadpool(
+                limits.submit, client, lambda: job_queue().submit(problem_statement.strip()), finished
+            )
+        except QueueFull as e:
+            API_SUBMISSIONS.inc(labels={"result": "queue_full"})
+            return _error(429, f"Server busy: {e}", busy_headers)
+        except ClientLimitReached as e:
+            API_SUBMISSIONS.inc(labels={"result": "client_limit"})
+            return _error(429, f"Too many jobs: {e}", busy_headers)
+        API_SUBMISSIONS.inc(labels={"result": "accepted"})
+        job = await run_in_threadpool(job_queue().get, job_id)
+        return JSONResponse(_job_view(job), status_code=202, headers={"Location": f"/jobs/{job_id}"})
+
+    async def status(request: Request) -> JSONResponse:
+        job = await run_in_threadpool(job_queue().get, request.path_params["job_id"])
+        if job is None:
+            return _error(404, "Unknown job")
+        return JSONResponse(_job_view(job))
+
+    async def result(request: Request) -> JSONResponse:
+        job = await run_in_threadpool(job_queue().get, request.path_params["job_id"])
+        if job is None:
+            return _error(404, "Unknown job")
+        if job["status"] not in FINISHED_STATES:
+            return JSONResponse(_job_view(job), status_code=202)
+        return JSONResponse(await run_in_threadpool(_result_view, job))
+
+    async def stream(request: Request):
+        job_id = request.path_params["job_id"]
+        if await run_in_threadpool(job_queue().get, job_id) is None:
+            return _error(404, "Unknown job")
+        return StreamingResponse(
+            _events(job_queue(), job_id),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    async def health(request: Request) -> JSONResponse:
+        body = {
+            "status": "draining" if app.state.draining else "ok",
+            "pending": job_queue().pending(),
+            "max_pending": job_queue().max_pending,
+            "workers": job_queue().workers,
+        }
+        return JSONResponse(body, status_code=503 if app.state.draining else 200)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        app.state.queue = queue or get_job_queue()
+        # Buffer streamed tokens from the start of every run
+        get_answer_streams()
+        yield
+        app.state.queue.shutdown(wait=False)
+
+    app = Starlette(
+        routes=[
+            Route("/jobs", submit, methods=["POST"]),
+            Route("/jobs/{job_id}", status),
+            Route("/jobs/{job_id}/result", result),
+            Route("/jobs/{job_id}/stream", stream),
+            Route("/healthz", health),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.draining = False
+    return app
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, drain_seconds: Optional[float] = None) -> None:
+    """Run the API with uvicorn, draining running jobs on SIGTERM/SIGINT.
+
+    A second signal stops the server without waiting.
+    """
+    import uvicorn
+
+    if drain_seconds is None:
+        drain_seconds = float(os.getenv("API_DRAIN_SECONDS", "600"))
+    app = create_app()
+
+    class DrainingServer(uvicorn.Server):
+        def handle_exit(self, sig, frame):
+            if app.state.draining:
+                return super().handle_exit(sig, frame)
+            app.state.draining = True
+            print(f"🛑 Draining: refusing new jobs, waiting up to {drain_seconds:.0f}s for running ones")
+
+            def drain():
+                queue = getattr(app.state, "queue", None)
+                if queue is not None and not queue.drain(drain_seconds):
+                    print("⚠️ Drain timed out; unfinished jobs are re-queued on the next start")
+                super(DrainingServer, self).handle_exit(sig, None)
+
+            threading.Thread(target=drain, name="api-drain", daemon=True).start()
+
+    # Open event streams may keep connections alive; stop waiting for them after the drain
+    config = uvicorn.Config(app, host=host, port=port, timeout_graceful_shutdown=5)
+    DrainingServer(config).run()
@@ -0,0 +1,236 @@
+"""Content-addressed cache for rendered download artifacts (PDFs, exports).
+
+Artifacts are keyed by a hash of the artifact kind, its render options and the
+source content, so every session viewing the same result shares one rendering.
+Recently used artifacts stay in a byte-bounded memory LRU; entries evicted from
+memory spill to disk and are promoted back on the next hit; the disk is
+written outside the cache lock, so a slow disk does not stall lookups of
+other keys. Concurrent requests for the same key render once: the first
+caller renders while the others wait for its result.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from problem_solving_research_agent.metrics import ARTIFACT_LOOKUPS
+
+
+def artifact_key(kind: str, content: str, options: Optional[dict] = None) -> str:
+    """Hash an artifact's kind, render options and source content."""
+    digest = hashlib.sha256()
+    digest.update(kind.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(json.dumps(options or {}, sort_keys=True).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ArtifactCache:
+    """Byte-bounded memory LRU of rendered artifacts with disk spill.
+
+    Args:
+        cache_dir: Directory evicted artifacts spill to, or None to drop them
+        max_memory_bytes: Total size of artifacts kept in memory
+        max_disk_bytes: Total size cap for the spill directory
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = ".cache/artifacts",
+        max_memory_bytes: int = 64 * 1024 * 1024,
+        max_disk_bytes: int = 512 * 1024 * 1024,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        # key -> lock held by the thread currently rendering that key
+        self._rendering: Dict[str, threading.Lock] = {}
+        # Evicted from memory, not yet on disk; still served from here
+        self._spilling: Dict[str, bytes] = {}
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "renders": 0, "spills": 0, "evictions": 0}
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str, kind: str = "artifact") -> Optional[bytes]:
+        """Return a cached artifact without rendering it, or None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                ARTIFACT_LOOKUPS.inc(labels={"kind": kind, "result": "memory"})
+                return data
+            data = self._spilling.get(key)
+
+        if data is None:
+            data = self._read_disk(key)
+        if data is None:
+            return None
+        with self._lock:
+            self._stats["disk_hits"] += 1
+            spilled = self._remember(key, data)
+        self._spill(spilled)
+        ARTIFACT_LOOKUPS.inc(labels={"kind": kind, "result": "disk"})
+        return data
+
+    def get_or_render(
+        self,
+        kind: str,
+        content: str,
+        render: Callable[[str], bytes],
+        options: Optional[dict] = None,
+    ) -> bytes:
+        """Return the artifact for ``content``, rendering it on first request.
+
+        Args:
+            kind: Artifact type, e.g. ``"pdf"``
+            content: Source the artifact is rendered from
+            render: Called with ``content`` on a miss; returns the artifact bytes
+            options: Render settings that change the output (part of the key)
+
+        Returns:
+            The artifact bytes
+        """
+        key = artifact_key(kind, content, options)
+        data = self.get(key, kind)
+        if data is not None:
+            return data
+
+        with self._lock:
+            render_lock = self._rendering.setdefault(key, threading.Lock())
+        with render_lock:
+            # Another session may have rendered it while we waited
+            data = self.get(key, kind)
+            if data is not None:
+                return data
+            try:
+                data = render(content)
+                with self._lock:
+                    self._stats["renders"] += 1
+                    spilled = self._remember(key, data)
+                self._spill(spilled)
+            finally:
+                with self._lock:
+                    self._rendering.pop(key, None)
+        ARTIFACT_LOOKUPS.inc(labels={"kind": kind, "result": "rendered"})
+        return data
+
+    def stats(self) -> dict:
+        """Return hit/render counters and the current memory footprint."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_bytes
+        return stats
+
+    def _remember(self, key: str, data: bytes) -> List[Tuple[str, bytes]]:
+        """Add an entry to memory; returns the entries evicted for :meth:`_spill`."""
+        # Caller holds the lock
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        spilled = []
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            old_key, old_data = self._memory.popitem(last=False)
+            self._memory_bytes -= len(old_data)
+            spilled.append((old_key, old_data))
+            if self.cache_dir:
+                self._spilling[old_key] = old_data
+        return spilled
+
+    def _spill(self, spilled: List[Tuple[str, bytes]]) -> None:
+        """Write entries evicted from memory to disk; called without the lock."""
+        if not spilled:
+            return
+        for key, data in spilled:
+            written = self._write_disk(key, data)
+            with self._lock:
+                self._stats["spills" if written else "evictions"] += 1
+                if self._spilling.get(key) is data:
+                    del self._spilling[key]
+        if self.cache_dir:
+            self._evict_disk()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.bin"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def _write_disk(self, key: str, data: bytes) -> bool:
+        if not self.cache_dir:
+            return False
+        path = self._path(key)
+        if path.exists():
+            return True
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _evict_disk(self) -> None:
+        files = []
+        total = 0
+        for path in self.cache_dir.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Return the process-wide artifact cache.
+
+    Configured through ``ARTIFACT_CACHE_DIR``, ``ARTIFACT_CACHE_MAX_MEMORY_BYTES``
+    and ``ARTIFACT_CACHE_MAX_DISK_BYTES``.
+    """
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache(
+                cache_dir=os.getenv("ARTIFACT_CACHE_DIR", ".cache/artifacts"),
+                max_memory_bytes=int(os.getenv("ARTIFACT_CACHE_MAX_MEMORY_BYTES", str(64 * 1024 * 1024))),
+                max_disk_bytes=int(os.getenv("ARTIFACT_CACHE_MAX_DISK_BYTES", str(512 * 1024 * 1024))),
+            )
+        return _artifact_cache
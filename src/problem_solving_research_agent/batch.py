@@ -0,0 +1,168 @@
+"""Run many problem statements from a JSONL file with bounded concurrency.
+
+Each input line is a JSON object with an ``id`` (or ``request_id``) and a
+``problem_statement`` (or ``title``/``body``). Results are appended to the
+output JSONL file as soon as each run finishes, so a crashed or interrupted
+batch can be resumed: IDs that already have an ``ok`` record are skipped.
+Duplicate problem statements running at the same time share one crew run,
+and the batch's LLM requests yield to interactive ones (see ``rate_limit``).
+Google Docs a run queued are waited for (up to ``PUBLISH_WAIT_SECONDS``)
+before its record is written, so records carry document URLs rather than
+``publish://`` handles, plus each document's status under ``publishes``.
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Set, Tuple
+
+from problem_solving_research_agent.rate_limit import BATCH, priority_context
+from problem_solving_research_agent.runner import crew_fingerprint, pipeline_mode, run_problem
+from problem_solving_research_agent.singleflight import SingleFlight, request_key
+
+
+def problem_from_record(record: dict) -> str:
+    """Extract the problem statement from an input record."""
+    if record.get('problem_statement'):
+        return str(record['problem_statement']).strip()
+    parts = [str(record[field]).strip() for field in ('title', 'body') if record.get(field)]
+    return '\n\n'.join(parts)
+
+
+def read_problems(input_path: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+    """Stream (id, problem_statement, error) triples from a JSONL file.
+
+    A line that is not a JSON object is yielded with its line number as ID,
+    an empty problem statement and the parse error, so one bad line does not
+    stop the batch.
+    """
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"expected a JSON object, got {type(record).__name__}")
+            except ValueError as e:
+                yield str(line_number), '', f"Line {line_number} is not valid input: {e}"
+                continue
+            record_id = str(record.get('id') or record.get('request_id') or line_number)
+            problem_statement = problem_from_record(record)
+            if problem_statement:
+                yield record_id, problem_statement, None
+
+
+def _settle_publishes(result: str) -> Tuple[str, list]:
+    from problem_solving_research_agent.tools.publish_outbox import settle_publishes
+
+    return settle_publishes(result, float(os.getenv("PUBLISH_WAIT_SECONDS", "120")))
+
+
+def completed_ids(output_path: str) -> Set[str]:
+    """Return IDs that already have a successful result in the output file."""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A partially written last line from an interrupted run
+                continue
+            if record.get('status') == 'ok':
+                done.add(str(record.get('id')))
+    return done
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    workers: int = 4,
+    resume: bool = True,
+    use_cache: bool = True,
+    run_fn: Optional[Callable[[str], str]] = None,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Run every problem in ``input_path`` and stream results to ``output_path``.
+
+    Args:
+        input_path: JSONL file of problem statements
+        output_path: JSONL file results are appended to
+        workers: Maximum number of crews running at once
+        resume: Skip IDs that already have an ``ok`` record in the output
+        use_cache: Serve repeated problem statements from the result cache
+        run_fn: Override the function that solves one problem statement
+        on_result: Called with each result record as it is written
+
+    Returns:
+        Summary counts for the batch
+    """
+    run_fn = run_fn or (lambda problem: run_problem(problem, use_cache=use_cache))
+    flights = SingleFlight("batch")
+    fingerprint = crew_fingerprint(pipeline_mode())
+    skip = completed_ids(output_path) if resume else set()
+    summary = {'ok': 0, 'error': 0, 'skipped': 0}
+    write_lock = threading.Lock()
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    def solve(record_id: str, problem_statement: str) -> dict:
+        started = time.perf_counter()
+        record = {'id': record_id, 'problem_statement': problem_statement}
+        try:
+            # Batch runs queue behind interactive ones for the shared OpenAI rate limit
+            with priority_context(BATCH):
+                record['result'] = flights.do(
+                    request_key(problem_statement, fingerprint), lambda: run_fn(problem_statement)
+                )
+            record['status'] = 'ok'
+            if 'publish://' in record['result']:
+                record['result'], record['publishes'] = _settle_publishes(record['result'])
+        except Exception as e:
+            record['error'] = str(e)
+            record['status'] = 'error'
+        record['duration_s'] = round(time.perf_counter() - started, 3)
+        record['finished_at'] = datetime.now().isoformat(timespec='seconds')
+        return record
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        def write(record: dict) -> None:
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + '\n')
+                out.flush()
+                summary[record['status']] += 1
+            if on_result:
+                on_result(record)
+
+        pending = set()
+        for record_id, problem_statement, error in read_problems(input_path):
+            if record_id in skip:
+                summary['skipped'] += 1
+                continue
+            if error is not None:
+                write({
+                    'id': record_id,
+                    'status': 'error',
+                    'error': error,
+                    'duration_s': 0.0,
+                    'finished_at': datetime.now().isoformat(timespec='seconds'),
+                })
+                continue
+            # Keep only a bounded window of work queued so huge inputs stream
+            while len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            pending.add(pool.submit(solve, record_id, problem_statement))
+
+        for future in as_completed(pending):
+            write(future.result())
+
+    return summary
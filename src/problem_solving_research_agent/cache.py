@@ -0,0 +1,263 @@
+"""Result cache for crew kickoffs.
+
+Repeated problem statements are served from a two-tier cache instead of
+running the full crew again:
+
+* an in-memory LRU tier for the current process, and
+* an on-disk tier (one JSON file per entry) with a TTL and a total size cap,
+  so results survive restarts and are shared between the CLI and the UI.
+
+Keys combine a normalized problem statement with a fingerprint of the agent
+and task configuration, so editing ``agents.yaml``/``tasks.yaml``, the model
+settings or anything else the caller folds into the fingerprint (the runner
+adds the knowledge base version and the research fan-out width) naturally
+invalidates stale results.
+"""
+import hashlib
+import json
+import os
+import re
+import string
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional
+
+CONFIG_DIR = Path(__file__).parent / "config"
+CONFIG_FILES = ("agents.yaml", "tasks.yaml", "report_template.md")
+
+_PUNCTUATION_RE = re.compile(f"[{re.escape(string.punctuation)}]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_problem_statement(problem_statement: str) -> str:
+    """Normalize a problem statement so trivially different inputs share a key.
+
+    Case, punctuation and runs of whitespace are ignored.
+    """
+    text = problem_statement.casefold()
+    text = _PUNCTUATION_RE.sub(" ", text)
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def config_fingerprint(extra: Iterable[str] = ()) -> str:
+    """Hash the agent/task configuration plus any extra model settings."""
+    digest = hashlib.sha256()
+    for name in CONFIG_FILES:
+        path = CONFIG_DIR / name
+        digest.update(name.encode("utf-8"))
+        if path.exists():
+            digest.update(path.read_bytes())
+    for part in extra:
+        digest.update(b"\0")
+        digest.update(str(part).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of crew results.
+
+    Args:
+        cache_dir: Directory for the on-disk tier, or None to disable it
+        fingerprint: Configuration fingerprint mixed into every key
+        max_memory_entries: Capacity of the in-memory LRU tier
+        ttl_seconds: Entries older than this are treated as misses
+        max_disk_bytes: Total size cap for the on-disk tier
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = ".cache/results",
+        fingerprint: str = "",
+        max_memory_entries: int = 128,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.fingerprint = fingerprint
+        self.max_memory_entries = max_memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def key_for(self, problem_statement: str) -> str:
+        """Return the cache key for a problem statement."""
+        normalized = normalize_problem_statement(problem_statement)
+        raw = f"{self.fingerprint}\0{normalized}".encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, problem_statement: str) -> Optional[str]:
+        """Return the cached result for a problem statement, or None."""
+        key = self.key_for(problem_statement)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry["created"] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry["result"]
+                del self._memory[key]
+                self._stats["expired"] += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, entry)
+        return entry["result"]
+
+    def put(self, problem_statement: str, result: str) -> None:
+        """Store a result in both tiers."""
+        key = self.key_for(problem_statement)
+        entry = {
+            "key": key,
+            "created": time.time(),
+            "problem_statement": problem_statement,
+            "fingerprint": self.fingerprint,
+            "result": result,
+        }
+        with self._lock:
+            self._remember(key, entry)
+            self._stats["stores"] += 1
+        self._write_disk(key, entry)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if self.cache_dir:
+            for path in self.cache_dir.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current tier sizes."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key: str, entry: dict) -> None:
+        # Caller holds the lock
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[dict]:
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if now - entry.get("created", 0) > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._stats["expired"] += 1
+            return None
+        # Touch so size-based eviction drops the least recently used files first
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _write_disk(self, key: str, entry: dict) -> None:
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        now = time.time()
+        files = []
+        total = 0
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.ttl_seconds:
+                path.unlink(missing_ok=True)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            with self._lock:
+                self._stats["evictions"] += 1
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache(extra_fingerprint: Iterable[str] = ()) -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when disabled.
+
+    The cache is rebuilt when the fingerprint of the configuration and
+    ``extra_fingerprint`` changed since the last call, so its memory tier
+    never serves results computed under other settings.
+
+    Configured through ``RESULT_CACHE_ENABLED``, ``RESULT_CACHE_DIR``,
+    ``RESULT_CACHE_TTL_SECONDS``, ``RESULT_CACHE_MAX_ENTRIES`` and
+    ``RESULT_CACHE_MAX_BYTES``.
+    """
+    global _result_cache
+    if not _env_flag("RESULT_CACHE_ENABLED", True):
+        return None
+    fingerprint = config_fingerprint(extra_fingerprint)
+    with _result_cache_lock:
+        if _result_cache is None or _result_cache.fingerprint != fingerprint:
+            _result_cache = ResultCache(
+                cache_dir=os.getenv("RESULT_CACHE_DIR", ".cache/results"),
+                fingerprint=fingerprint,
+                max_memory_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "128")),
+                ttl_seconds=float(os.getenv("RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+                max_disk_bytes=int(os.getenv("RESULT_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            )
+        return _result_cache
@@ -0,0 +1,192 @@
+"""Task-level checkpoints so a failed run resumes without redoing finished tasks.
+
+Every completed task's output is persisted under the run's ID together with a
+hash of the run's inputs and crew configuration. When a run with the same
+inputs failed part-way, the next run for those inputs restarts from the first
+task without a checkpoint; earlier tasks are restored from the store instead
+of calling the LLM again. This is what makes a Google API quota failure in the
+publish step cheap to recover from.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from problem_solving_research_agent.context import resolve_handles
+from problem_solving_research_agent.events import TASK_COMPLETED, event_bus
+from problem_solving_research_agent.leases import PROCESS_OWNER, Heartbeat, expired
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    input_hash TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    status TEXT NOT NULL,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_input_hash ON runs (input_hash, updated_at);
+CREATE TABLE IF NOT EXISTS task_outputs (
+    run_id TEXT NOT NULL,
+    task_name TEXT NOT NULL,
+    agent TEXT,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (run_id, task_name)
+);
+"""
+
+
+def input_hash(inputs: dict, fingerprint: str = "") -> str:
+    """Hash crew inputs together with the configuration fingerprint."""
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{fingerprint}\0{payload}".encode("utf-8")).hexdigest()
+
+
+class CheckpointStore:
+    """SQLite store of runs and their completed task outputs.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = ".cache/checkpoints.sqlite3"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        # A running run's updated_at is its lease (see leases.py)
+        self.heartbeat = Heartbeat(self._renew, name="checkpoint-lease-heartbeat")
+
+    def start_run(self, inputs: dict, fingerprint: str = "", run_id: Optional[str] = None) -> str:
+        """Record a new run and return its ID."""
+        run_id = run_id or uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (run_id, input_hash, inputs, status, owner, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, input_hash(inputs, fingerprint), json.dumps(inputs), RUNNING, PROCESS_OWNER, now, now),
+            )
+        self.heartbeat.hold(run_id)
+        return run_id
+
+    def set_status(self, run_id: str, status: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE runs SET status = ?, owner = ?, updated_at = ? WHERE run_id = ?",
+                (status, PROCESS_OWNER, time.time(), run_id),
+            )
+        if status == RUNNING:
+            self.heartbeat.hold(run_id)
+        else:
+            self.heartbeat.release(run_id)
+
+    def save_task(self, run_id: str, task_name: str, output: str, agent: Optional[str] = None) -> None:
+        """Persist one task's output for a run."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO task_outputs (run_id, task_name, agent, output, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, task_name, agent, output, time.time()),
+            )
+            self._conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def completed_tasks(self, run_id: str) -> Dict[str, str]:
+        """Return {task_name: output} for the tasks a run finished."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT task_name, output FROM task_outputs WHERE run_id = ?", (run_id,)
+            ).fetchall()
+        return dict(rows)
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT run_id, inputs, status FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"run_id": row[0], "inputs": json.loads(row[1]), "status": row[2]}
+
+    def resumable_run(self, inputs: dict, fingerprint: str = "") -> Optional[str]:
+        """Claim the most recent failed or interrupted run for these inputs, if any.
+
+        A run still marked running is only interrupted once its lease expired
+        (its process exited or stopped renewing it), so runs in progress here
+        or in another process sharing the database are never taken over. The
+        claim is conditional, so two requests for the same inputs never
+        resume the same run.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id, status, owner, updated_at FROM runs WHERE input_hash = ? "
+                "AND status IN (?, ?) ORDER BY updated_at DESC",
+                (input_hash(inputs, fingerprint), FAILED, RUNNING),
+            ).fetchall()
+            now = time.time()
+            for run_id, status, owner, updated_at in rows:
+                if status == RUNNING and not expired(owner, updated_at, now):
+                    continue
+                claimed = self._conn.execute(
+                    "UPDATE runs SET status = ?, owner = ?, updated_at = ? "
+                    "WHERE run_id = ? AND status = ? AND owner IS ? AND updated_at = ?",
+                    (RUNNING, PROCESS_OWNER, now, run_id, status, owner, updated_at),
+                ).rowcount
+                if claimed:
+                    self.heartbeat.hold(run_id)
+                    return run_id
+        return None
+
+    def _renew(self, run_ids, now: float) -> None:
+        run_ids = list(run_ids)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE runs SET updated_at = ? WHERE owner = ? AND status = ? "
+                f"AND run_id IN ({', '.join('?' * len(run_ids))})",
+                (now, PROCESS_OWNER, RUNNING, *run_ids),
+            )
+
+    @contextmanager
+    def recording(self, checkpoint_run_id: str, event_run_id: str):
+        """Persist task outputs published for ``event_run_id`` while the block runs."""
+        def record(event):
+            if event.type == TASK_COMPLETED and event.data.get("output") is not None:
+                # artifact:// documents live in this host's document store; store
+                # them inline so a resume on another host can still expand them
+                output = resolve_handles(event.data["output"])
+                self.save_task(checkpoint_run_id, event.data.get("task"), output, event.data.get("agent"))
+
+        unsubscribe = event_bus.subscribe(record, run_id=event_run_id)
+        try:
+            yield
+        finally:
+            unsubscribe()
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> Optional[CheckpointStore]:
+    """Return the process-wide checkpoint store, or None when ``CHECKPOINTS_ENABLED`` is off."""
+    global _store
+    if os.getenv("CHECKPOINTS_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    with _store_lock:
+        if _store is None:
+            _store = CheckpointStore(os.getenv("CHECKPOINT_DB_PATH", ".cache/checkpoints.sqlite3"))
+        return _store
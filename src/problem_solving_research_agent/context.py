@@ -0,0 +1,256 @@
+"""Token-budgeted context passed between tasks, with documents by reference.
+
+Without this stage the publisher sees the full research output as context,
+re-emits it as its formatted answer, and sends it once more as the Docs
+tool's ``content`` argument. :func:`prepare_context` instead:
+
+* stores the full output in the document store (SQLite, so it outlives
+  memory pressure and restarts) and hands the next task an ``artifact://``
+  handle to it, which :func:`resolve_handles` expands locally (in the Docs
+  tool and in the final result) wherever it stands on its own line. A handle
+  that cannot be expanded raises :class:`UnknownDocument` rather than being
+  published as text;
+* trims sections that exceed ``CONTEXT_SECTION_MAX_TOKENS`` and, if the
+  whole context is still over ``CONTEXT_MAX_TOKENS``, tightens every section
+  until it fits, so the agent still sees the document's structure and gist.
+
+Tokens are counted with ``tiktoken`` when it is installed, otherwise estimated
+at four characters per token.
+"""
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from problem_solving_research_agent.artifacts import artifact_key
+from problem_solving_research_agent.events import CONTEXT_PREPARED, event_bus
+
+HANDLE_PREFIX = "artifact://"
+DOCUMENT_KIND = "document"
+# Smallest piece of a paragraph worth keeping when trimming
+MIN_CUT_TOKENS = 24
+# Allowance for the "[... N more tokens ...]" note on a trimmed section
+NOTE_TOKENS = 12
+
+_HANDLE_RE = re.compile(r"artifact://([0-9a-f]{64})")
+_HANDLE_LINE_RE = re.compile(r"^[ \t]*`?artifact://([0-9a-f]{64})`?[ \t]*$", re.MULTILINE)
+_HEADING_RE = re.compile(r"^#{1,6} ", re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # The encoding file is downloaded on first use; estimate when offline
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Return the token count of ``text`` (estimated without ``tiktoken``)."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def split_sections(markdown: str) -> List[str]:
+    """Split markdown before each heading; text before the first heading is its own section."""
+    starts = [match.start() for match in _HEADING_RE.finditer(markdown)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    sections = (markdown[start:end].strip() for start, end in zip(starts, starts[1:] + [len(markdown)]))
+    return [section for section in sections if section]
+
+
+def trim_section(section: str, max_tokens: int) -> str:
+    """Keep a section's heading and leading blocks up to ``max_tokens``.
+
+    Paragraphs and list items are kept in order, the last one cut at a word
+    boundary, followed by a note saying how much was left out.
+    """
+    total = count_tokens(section)
+    if total <= max_tokens:
+        return section
+    blocks = re.split(r"\n\s*\n|\n(?=\s*(?:[-*+]|\d+[.)]) )", section)
+    kept: List[str] = []
+    used = 0
+    for block in blocks:
+        cost = count_tokens(block) + 1
+        if used + cost > max_tokens:
+            room = max_tokens - used
+            if room >= MIN_CUT_TOKENS or not kept:
+                # Fill the rest of the budget with the start of this block, cut at a word
+                cut = block[:max(room, 1) * 4].rsplit(" ", 1)[0]
+                kept.append(cut)
+                used += count_tokens(cut)
+            break
+        kept.append(block)
+        used += cost
+    return "\n\n".join(kept) + f" [... {max(total - used, 0)} more tokens in the full document]"
+
+
+def fit_to_budget(markdown: str, max_tokens: int, section_max_tokens: Optional[int] = None) -> str:
+    """Trim a markdown document section by section until it fits ``max_tokens``.
+
+    Args:
+        markdown: The document
+        max_tokens: Budget for the whole document
+        section_max_tokens: Cap applied to every section first (None for no cap)
+    """
+    sections = split_sections(markdown)
+    if not sections:
+        return markdown
+    cap = section_max_tokens or max_tokens
+    sizes = sorted(min(count_tokens(section), cap) for section in sections)
+    if sum(sizes) > max_tokens:
+        # Share the budget evenly; short sections give their unused share to the rest
+        remaining = max_tokens
+        for n, size in enumerate(sizes):
+            share = remaining // (len(sizes) - n)
+            if size > share:
+                cap = min(cap, max(share - NOTE_TOKENS, MIN_CUT_TOKENS))
+                break
+            remaining -= size
+    return "\n\n".join(trim_section(section, cap) for section in sections)
+
+
+class UnknownDocument(LookupError):
+    """An ``artifact://`` handle refers to a document the store does not have."""
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at);
+"""
+
+
+class DocumentStore:
+    """SQLite store of the documents behind ``artifact://`` handles.
+
+    Unlike the artifact cache, nothing is evicted while runs may still refer
+    to a document; documents older than ``retention_seconds`` are pruned when
+    the store is opened.
+
+    Args:
+        path: Database file path
+        retention_seconds: How long documents are kept
+    """
+
+    def __init__(self, path: str = ".cache/documents.sqlite3", retention_seconds: float = 30 * 24 * 3600):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.execute("DELETE FROM documents WHERE created_at < ?", (time.time() - retention_seconds,))
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (key, text, created_at) VALUES (?, ?, ?)", (key, text, time.time())
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM documents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+
+_document_store: Optional[DocumentStore] = None
+_document_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Return the process-wide document store (``DOCUMENT_STORE_PATH``, ``DOCUMENT_RETENTION_DAYS``)."""
+    global _document_store
+    with _document_store_lock:
+        if _document_store is None:
+            _document_store = DocumentStore(
+                os.getenv("DOCUMENT_STORE_PATH", ".cache/documents.sqlite3"),
+                retention_seconds=float(os.getenv("DOCUMENT_RETENTION_DAYS", "30")) * 24 * 3600,
+            )
+        return _document_store
+
+
+def store_document(text: str) -> str:
+    """Store a document in the document store and return its handle."""
+    key = artifact_key(DOCUMENT_KIND, text)
+    get_document_store().put(key, text)
+    return f"{HANDLE_PREFIX}{key}"
+
+
+def load_document(handle: str) -> Optional[str]:
+    """Return the document behind a handle, or None when it is unknown."""
+    match = _HANDLE_RE.fullmatch(handle.strip().strip("`"))
+    if match is None:
+        return None
+    return get_document_store().get(match.group(1))
+
+
+def resolve_handles(text: str) -> str:
+    """Expand every ``artifact://`` handle that stands on its own line.
+
+    Raises:
+        UnknownDocument: A handle's document is not in the store (pruned, or
+            stored by a process using another ``DOCUMENT_STORE_PATH``)
+    """
+    if HANDLE_PREFIX not in text:
+        return text
+
+    def expand(match: "re.Match") -> str:
+        document = load_document(HANDLE_PREFIX + match.group(1))
+        if document is None:
+            raise UnknownDocument(f"No stored document for {HANDLE_PREFIX}{match.group(1)}")
+        return document
+
+    return _HANDLE_LINE_RE.sub(expand, text)
+
+
+def context_budget() -> Tuple[int, int]:
+    """``(CONTEXT_MAX_TOKENS, CONTEXT_SECTION_MAX_TOKENS)``; 0 disables the stage."""
+    return (
+        int(os.getenv("CONTEXT_MAX_TOKENS", "3000")),
+        int(os.getenv("CONTEXT_SECTION_MAX_TOKENS", "800")),
+    )
+
+
+def prepare_context(task_name: str, output: str) -> str:
+    """Build what downstream tasks see of ``task_name``'s output.
+
+    Returns the output unchanged when ``CONTEXT_MAX_TOKENS`` is 0.
+    """
+    max_tokens, section_max_tokens = context_budget()
+    if max_tokens <= 0:
+        return output
+    handle = store_document(output)
+    source_tokens = count_tokens(output)
+    digest = fit_to_budget(output, max_tokens, section_max_tokens)
+    context = (
+        f"{digest}\n\n"
+        f"The complete document ({source_tokens} tokens) is stored as {handle}\n"
+        "Do not copy it out. Wherever the complete document belongs in text you "
+        "write or send to a tool, put the handle on a line by itself; it is "
+        "replaced with the full document when published."
+    )
+    event_bus.publish(
+        CONTEXT_PREPARED,
+        task=task_name,
+        handle=handle,
+        source_tokens=source_tokens,
+        context_tokens=count_tokens(context),
+    )
+    return context
@@ -1,12 +1,9 @@
-import os
 from dotenv import load_dotenv
-from crewai import LLM
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 # Removed external API tools to avoid API key requirements
 # from crewai_tools import SerperDevTool, CrewaiEnterpriseTools
-from problem_solving_research_agent.tools.file_writer import save_document_to_file
-from problem_solving_research_agent.tools.google_docs import GoogleDocsCreatorTool, SimpleGoogleDocsCreatorTool
+from problem_solving_research_agent.factory import agent_options, crew_options
 
 # Load environment variables
 load_dotenv()
@@ -22,26 +19,14 @@ class ProblemSolvingResearchAgentCrew:
         
         return Agent(
             config=self.agents_config["problem_solving_research_specialist"],
-            tools=[],
-            reasoning=False,
-            inject_date=True,
-            llm=LLM(
-                model="gpt-4o",
-                temperature=0.7,
-            ),
+            **agent_options("problem_solving_research_specialist"),
         )
     
     @agent
     def document_publisher(self) -> Agent:
         return Agent(
             config=self.agents_config["document_publisher"],
-            tools=[GoogleDocsCreatorTool()],
-            reasoning=False,
-            inject_date=True,
-            llm=LLM(
-                model="gpt-4o",
-                temperature=0.7,
-            ),
+            **agent_options("document_publisher"),
         )
     
 
@@ -65,6 +50,5 @@ class ProblemSolvingResearchAgentCrew:
         return Crew(
             agents=self.agents,  # Automatically created by the @agent decorator
             tasks=self.tasks,  # Automatically created by the @task decorator
-            process=Process.sequential,
-            verbose=True,
+            **crew_options(),
         )
@@ -0,0 +1,369 @@
+"""In-process event bus for crew progress and timing.
+
+Crew runs publish structured :class:`Event` objects (task start/end, agent
+steps, tool calls, LLM call latency, token usage) that the Streamlit UI, the
+CLI and other components can subscribe to. Events are tagged with the run ID
+active in the publishing context (see :func:`run_context`), so subscribers can
+follow a single run even when several crews execute concurrently.
+
+crewAI's own event bus is bridged in by :func:`install_crewai_listeners`; the
+crew's ``step_callback``/``task_callback`` hooks publish through
+:func:`step_callback` and :func:`task_callback`.
+"""
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+# Event types
+RUN_STARTED = "run.started"
+RUN_COMPLETED = "run.completed"
+RUN_FAILED = "run.failed"
+RUN_CACHE_HIT = "run.cache_hit"
+RUN_RESUMED = "run.resumed"
+TASK_STARTED = "task.started"
+TASK_COMPLETED = "task.completed"
+TASK_FAILED = "task.failed"
+AGENT_STEP = "agent.step"
+TOOL_STARTED = "tool.started"
+TOOL_COMPLETED = "tool.completed"
+TOOL_FAILED = "tool.failed"
+LLM_STARTED = "llm.started"
+LLM_COMPLETED = "llm.completed"
+LLM_FAILED = "llm.failed"
+LLM_CHUNK = "llm.chunk"
+LLM_CACHE_HIT = "llm.cache_hit"
+TOKEN_USAGE = "tokens"
+CONTEXT_PREPARED = "context.prepared"
+
+current_run_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_run_id", default=None)
+
+
+@dataclass
+class Event:
+    """A single structured event published on the bus."""
+    type: str
+    run_id: Optional[str]
+    timestamp: float
+    data: dict = field(default_factory=dict)
+
+
+class EventBus:
+    """Thread-safe publish/subscribe bus.
+
+    Handlers run synchronously in the publishing thread and must be quick;
+    exceptions raised by a handler are swallowed so they never break a run.
+    """
+
+    def __init__(self):
+        self._subscribers: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, handler: Callable[[Event], None], run_id: Optional[str] = None) -> Callable[[], None]:
+        """
+        Register a handler and return a function that unsubscribes it.
+
+        Args:
+            handler: Called with every matching event
+            run_id: Only deliver events for this run (None for all runs)
+        """
+        entry = (handler, run_id)
+        with self._lock:
+            self._subscribers = self._subscribers + [entry]
+
+        def unsubscribe():
+            with self._lock:
+                self._subscribers = [s for s in self._subscribers if s is not entry]
+        return unsubscribe
+
+    def publish(self, event_type: str, run_id: Optional[str] = None, timestamp: Optional[float] = None, **data) -> Event:
+        """Publish an event, tagging it with the current run ID by default."""
+        event = Event(
+            type=event_type,
+            run_id=run_id if run_id is not None else current_run_id.get(),
+            timestamp=timestamp if timestamp is not None else time.time(),
+            data=data,
+        )
+        # Copy-on-write subscriber list: no lock needed while dispatching
+        for handler, wanted_run in self._subscribers:
+            if wanted_run is None or wanted_run == event.run_id:
+                try:
+                    handler(event)
+                except Exception:
+                    pass
+        return event
+
+
+event_bus = EventBus()
+
+
+@contextmanager
+def run_context(run_id: str):
+    """Tag every event published inside the block with ``run_id``."""
+    token = current_run_id.set(run_id)
+    try:
+        yield run_id
+    finally:
+        current_run_id.reset(token)
+
+
+def step_callback(step) -> None:
+    """Crew ``step_callback``: publish one agent reasoning/tool step."""
+    event_bus.publish(
+        AGENT_STEP,
+        kind=type(step).__name__,
+        tool=getattr(step, "tool", None),
+        thought=str(getattr(step, "thought", "") or "")[:200],
+    )
+
+
+_task_started: Dict[tuple, float] = {}
+_task_started_lock = threading.Lock()
+
+
+def _mark_task_started(task_name: Optional[str], at: float) -> None:
+    with _task_started_lock:
+        _task_started[(current_run_id.get(), task_name)] = at
+
+
+def task_callback(output) -> None:
+    """Crew ``task_callback``: publish the end of a task with its duration and output."""
+    task_name = getattr(output, "name", None)
+    now = time.time()
+    with _task_started_lock:
+        started = _task_started.pop((current_run_id.get(), task_name), None)
+    event_bus.publish(
+        TASK_COMPLETED,
+        timestamp=now,
+        task=task_name,
+        agent=getattr(output, "agent", None),
+        duration_s=round(now - started, 4) if started is not None else None,
+        output=getattr(output, "raw", None),
+    )
+
+
+def _event_time(event) -> float:
+    timestamp = getattr(event, "timestamp", None)
+    return timestamp.timestamp() if hasattr(timestamp, "timestamp") else time.time()
+
+
+def _task_name(task) -> Optional[str]:
+    return getattr(task, "name", None) if task is not None else None
+
+
+def _agent_role(event) -> Optional[str]:
+    agent = getattr(event, "agent", None) or getattr(event, "from_agent", None)
+    role = getattr(agent, "role", None)
+    return role or getattr(event, "agent_role", None)
+
+
+class _CrewAIBridge:
+    """Translates crewAI's internal events into bus events with durations."""
+
+    def __init__(self):
+        self._started: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, key, at):
+        with self._lock:
+            self._started[key] = at
+
+    def _elapsed(self, key, at) -> Optional[float]:
+        with self._lock:
+            started = self._started.pop(key, None)
+        return round(at - started, 4) if started is not None else None
+
+    def task_started(self, source, event):
+        task = getattr(event, "task", None)
+        at = _event_time(event)
+        _mark_task_started(_task_name(task), at)
+        agent = getattr(getattr(task, "agent", None), "role", None)
+        event_bus.publish(TASK_STARTED, timestamp=at, task=_task_name(task), agent=agent)
+
+    def task_failed(self, source, event):
+        # Successful completions are published by the crew's task_callback
+        task = getattr(event, "task", None)
+        at = _event_time(event)
+        with _task_started_lock:
+            started = _task_started.pop((current_run_id.get(), _task_name(task)), None)
+        agent = getattr(getattr(task, "agent", None), "role", None)
+        event_bus.publish(TASK_FAILED, timestamp=at, task=_task_name(task), agent=agent,
+                          duration_s=round(at - started, 4) if started is not None else None,
+                          error=str(getattr(event, "error", "")))
+
+    def tool_started(self, source, event):
+        at = _event_time(event)
+        self._start(("tool", event.tool_name, _agent_role(event), current_run_id.get()), at)
+        event_bus.publish(TOOL_STARTED, timestamp=at, tool=event.tool_name, agent=_agent_role(event))
+
+    def tool_finished(self, source, event):
+        at = _event_time(event)
+        duration = self._elapsed(("tool", event.tool_name, _agent_role(event), current_run_id.get()), at)
+        failed = getattr(event, "error", None) is not None
+        event_bus.publish(
+            TOOL_FAILED if failed else TOOL_COMPLETED,
+            timestamp=at, tool=event.tool_name, agent=_agent_role(event), duration_s=duration,
+            from_cache=getattr(event, "from_cache", False),
+            **({"error": str(event.error)} if failed else {}),
+        )
+
+    def llm_started(self, source, event):
+        at = _event_time(event)
+        self._start(("llm", getattr(event, "call_id", None) or threading.get_ident()), at)
+        event_bus.publish(LLM_STARTED, timestamp=at, model=getattr(event, "model", None), agent=_agent_role(event))
+
+    def llm_finished(self, source, event):
+        at = _event_time(event)
+        duration = self._elapsed(("llm", getattr(event, "call_id", None) or threading.get_ident()), at)
+        failed = getattr(event, "error", None) is not None
+        usage = getattr(event, "usage", None) or {}
+        event_bus.publish(
+            LLM_FAILED if failed else LLM_COMPLETED,
+            timestamp=at, model=getattr(event, "model", None), agent=_agent_role(event),
+            duration_s=duration, call_id=getattr(event, "call_id", None),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            **({"error": str(event.error)} if failed else {}),
+        )
+
+    def llm_chunk(self, source, event):
+        # Native tool-call argument deltas are not answer text
+        if getattr(event, "tool_call", None) is not None:
+            return
+        event_bus.publish(LLM_CHUNK, chunk=event.chunk, agent=_agent_role(event),
+                          call_id=getattr(event, "call_id", None) or getattr(event, "response_id", None))
+
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_crewai_listeners() -> bool:
+    """Bridge crewAI's event bus into :data:`event_bus` (idempotent).
+
+    Returns False when the installed crewAI version exposes no event bus.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return True
+        try:
+            import crewai.events as crewai_events
+        except ImportError:
+            try:
+                import crewai.utilities.events as crewai_events
+            except ImportError:
+                return False
+
+        bridge = _CrewAIBridge()
+        handlers = {
+            "TaskStartedEvent": bridge.task_started,
+            "TaskFailedEvent": bridge.task_failed,
+            "ToolUsageStartedEvent": bridge.tool_started,
+            "ToolUsageFinishedEvent": bridge.tool_finished,
+            "ToolUsageErrorEvent": bridge.tool_finished,
+            "LLMCallStartedEvent": bridge.llm_started,
+            "LLMCallCompletedEvent": bridge.llm_finished,
+            "LLMCallFailedEvent": bridge.llm_finished,
+            # Emitted synchronously on the calling thread, so chunks stay in order
+            "LLMStreamChunkEvent": bridge.llm_chunk,
+        }
+        for name, handler in handlers.items():
+            event_class = getattr(crewai_events, name, None)
+            if event_class is not None:
+                crewai_events.crewai_event_bus.on(event_class)(handler)
+        _installed = True
+        return True
+
+
+def flush_crewai_events(timeout: Optional[float] = 5.0) -> bool:
+    """Wait for crewAI's pending event handlers, which run on its own threads.
+
+    A run's last LLM events may still be in flight when ``kickoff`` returns;
+    returns False on timeout or when crewAI has no event bus.
+    """
+    try:
+        from crewai.events import crewai_event_bus
+    except ImportError:
+        return False
+    flush = getattr(crewai_event_bus, "flush", None)
+    return bool(flush(timeout)) if flush is not None else False
+
+
+class RunUsage:
+    """Subscriber that sums the token usage of one run's LLM calls.
+
+    Subscribe it with the run's ID: shared LLM instances count every run's
+    calls, while each LLM event carries the run it was made for.
+    """
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        if event.type != LLM_COMPLETED:
+            return
+        with self._lock:
+            self.prompt_tokens += event.data.get("prompt_tokens") or 0
+            self.completion_tokens += event.data.get("completion_tokens") or 0
+            self.requests += 1
+
+    def totals(self) -> dict:
+        with self._lock:
+            return {
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens,
+                "requests": self.requests,
+            }
+
+
+class RunTimings:
+    """Subscriber that aggregates where time went during a run.
+
+    Collects task durations, per-agent LLM latency and token counts, and
+    per-tool durations, for printing at the end of a CLI run.
+    """
+
+    def __init__(self):
+        self.tasks: Dict[str, float] = {}
+        self.llm = defaultdict(lambda: {"calls": 0, "seconds": 0.0, "prompt_tokens": 0, "completion_tokens": 0})
+        self.tools = defaultdict(lambda: {"calls": 0, "seconds": 0.0})
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        data = event.data
+        with self._lock:
+            if event.type in (TASK_COMPLETED, TASK_FAILED) and data.get("duration_s") is not None:
+                self.tasks[data.get("task") or "?"] = data["duration_s"]
+            elif event.type in (LLM_COMPLETED, LLM_FAILED):
+                stats = self.llm[data.get("agent") or data.get("model") or "?"]
+                stats["calls"] += 1
+                stats["seconds"] += data.get("duration_s") or 0.0
+                stats["prompt_tokens"] += data.get("prompt_tokens") or 0
+                stats["completion_tokens"] += data.get("completion_tokens") or 0
+            elif event.type in (TOOL_COMPLETED, TOOL_FAILED):
+                stats = self.tools[data.get("tool") or "?"]
+                stats["calls"] += 1
+                stats["seconds"] += data.get("duration_s") or 0.0
+
+    def summary(self) -> str:
+        """Human-readable breakdown of the collected timings."""
+        lines = []
+        with self._lock:
+            for task, seconds in self.tasks.items():
+                lines.append(f"  task  {task}: {seconds:.1f}s")
+            for agent, stats in self.llm.items():
+                lines.append(
+                    f"  llm   {agent}: {stats['calls']} calls, {stats['seconds']:.1f}s, "
+                    f"{stats['prompt_tokens']} prompt / {stats['completion_tokens']} completion tokens"
+                )
+            for tool, stats in self.tools.items():
+                lines.append(f"  tool  {tool}: {stats['calls']} calls, {stats['seconds']:.1f}s")
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+"""Bulk export of stored results to PDF and markdown files.
+
+The source is a directory of markdown files (``*.md``, searched recursively)
+or an output store (its directory or its ``index.sqlite3``, see
+``tools/output_store.py``), of which every markdown document is exported once.
+
+Rendering is CPU-bound and holds the GIL, so documents are rendered in a pool
+of worker processes. The parent only hands out paths: each worker reads its
+document, renders it and writes each file to a temporary name in the output
+directory before renaming it into place, so an interrupted export never
+leaves a truncated file behind. At most two documents per worker are in
+flight, and each worker process is replaced after ``max_tasks_per_child``
+documents, so memory stays bounded however many documents are exported.
+Files newer than their source are skipped, which makes a re-run resume where
+an interrupted export stopped.
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from problem_solving_research_agent.tools.output_store import OutputStore, read_object, slugify, write_atomic
+
+PDF = "pdf"
+MARKDOWN = "md"
+FORMATS = (PDF, MARKDOWN)
+INDEX_FILE = "index.sqlite3"
+
+# (name, source path, compression, source modification time)
+Source = Tuple[str, str, str, float]
+
+
+def find_sources(source: str, exclude: Optional[str] = None) -> List[Source]:
+    """List the markdown documents to export from a directory or an output store.
+
+    Args:
+        source: Directory of markdown files, or an output store directory or index
+        exclude: Directory whose files are left out (the export's own output)
+    """
+    path = Path(source)
+    excluded = Path(exclude).resolve() if exclude else None
+    if path.is_file() and path.name == INDEX_FILE:
+        path = path.parent
+    if not path.is_dir():
+        raise FileNotFoundError(f"No directory or output store index at {source}")
+    if not (path / INDEX_FILE).exists():
+        return [
+            (file.relative_to(path).with_suffix("").as_posix(), str(file), "none", file.stat().st_mtime)
+            for file in sorted(path.rglob("*.md"))
+            if file.is_file() and (excluded is None or excluded not in file.resolve().parents)
+        ]
+    store = OutputStore(str(path), write_behind=False)
+    return [
+        (
+            f"{slugify(record['title'] or record['filename'])}_{record['content_hash'][:12]}",
+            str(path / record["path"]),
+            record["compression"],
+            record["created_at"],
+        )
+        for record in store.documents(MARKDOWN)
+    ]
+
+
+def export_document(source: Source, targets: Tuple[Tuple[str, str], ...]) -> dict:
+    """Render one document into each ``(format, path)`` target; runs in a worker process."""
+    from problem_solving_research_agent.pdf_renderer import render_pdf
+
+    started = time.perf_counter()
+    name, path, compression, _ = source
+    content = read_object(Path(path), compression)
+    written = 0
+    for file_format, target in targets:
+        data = render_pdf(content).getvalue() if file_format == PDF else content.encode("utf-8")
+        write_atomic(Path(target), data)
+        written += len(data)
+    return {"name": name, "bytes": written, "seconds": round(time.perf_counter() - started, 3)}
+
+
+def _targets(source: Source, output_dir: Path, formats: Iterable[str], force: bool) -> Tuple[Tuple[str, str], ...]:
+    """The files still to write for ``source`` (all of them with ``force``)."""
+    name, _, _, modified = source
+    targets = []
+    for file_format in formats:
+        target = output_dir / f"{name}.{file_format}"
+        if force or not target.exists() or target.stat().st_mtime < modified:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            targets.append((file_format, str(target)))
+    return tuple(targets)
+
+
+def run_export(
+    source: str,
+    output_dir: str,
+    formats: Iterable[str] = (PDF,),
+    workers: Optional[int] = None,
+    max_tasks_per_child: int = 50,
+    force: bool = False,
+    on_result: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Export every document in ``source`` to ``output_dir``.
+
+    Args:
+        source: Directory of markdown files, or an output store directory or index
+        output_dir: Directory the exported files are written to
+        formats: Any of :data:`FORMATS`
+        workers: Worker processes (defaults to the number of CPUs)
+        max_tasks_per_child: Documents a worker renders before it is replaced
+            (Python 3.11+; 0 keeps workers for the whole export)
+        force: Export documents whose files are already up to date
+        on_result: Called with each document's record as it finishes
+
+    Returns:
+        Counts plus throughput: ``documents``, ``seconds``, ``docs_per_second``, ``workers``, ``cpus``
+    """
+    formats = tuple(formats)
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"formats must be among {', '.join(FORMATS)}, got {', '.join(sorted(unknown))}")
+    workers = workers or os.cpu_count() or 1
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    sources = find_sources(source, exclude=output_dir)
+    summary = {"ok": 0, "error": 0, "skipped": 0, "total": len(sources)}
+
+    # spawn: fork is unsafe in a process with threads and incompatible with max_tasks_per_child
+    options = {"mp_context": multiprocessing.get_context("spawn")}
+    if max_tasks_per_child and sys.version_info >= (3, 11):
+        options["max_tasks_per_child"] = max_tasks_per_child
+
+    def report(record: dict) -> None:
+        summary[record["status"]] += 1
+        record["done"] = summary["ok"] + summary["error"] + summary["skipped"]
+        record["total"] = summary["total"]
+        if on_result:
+            on_result(record)
+
+    def collect(futures) -> None:
+        for future in futures:
+            name = pending.pop(future)
+            try:
+                record = dict(future.result(), status="ok")
+            except Exception as e:
+                record = {"name": name, "status": "error", "error": str(e)}
+            report(record)
+
+    started = time.perf_counter()
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers, **options) as pool:
+        for item in sources:
+            targets = _targets(item, output, formats, force)
+            if not targets:
+                report({"name": item[0], "status": "skipped"})
+                continue
+            # Keep only a bounded window of documents in flight
+            while len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending[pool.submit(export_document, item, targets)] = item[0]
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    seconds = time.perf_counter() - started
+    exported = summary["ok"]
+    summary.update(
+        documents=exported,
+        seconds=round(seconds, 3),
+        docs_per_second=round(exported / seconds, 2) if seconds > 0 else 0.0,
+        workers=workers,
+        cpus=os.cpu_count() or 1,
+    )
+    return summary
@@ -0,0 +1,372 @@
+"""Crew factory that builds per-request crews from shared definitions.
+
+Constructing ``ProblemSolvingResearchAgentCrew`` re-parses both YAML files and
+creates new ``LLM`` and tool objects on every request, which dominates crew
+construction time. :class:`CrewFactory` parses the configuration once and
+shares the LLMs and tools, so each request only pays for fresh
+``Agent``/``Task``/``Crew`` objects (which hold the run state). The one thing a
+shared LLM accumulates across runs is its token usage: a crew's
+``token_usage`` therefore covers every run since the LLM was created, including
+runs going on at the same time. The runner instead sums the LLM call events
+tagged with each run's ID (see ``runner.py``).
+
+``crew.py`` uses :func:`agent_options` and :func:`crew_options` as well, so
+both construction paths describe the same crew.
+
+crewAI and the tools are imported on first use, so modules that only need
+the constants here (the result cache fingerprint, the Streamlit page) start
+without loading the agent stack.
+"""
+import functools
+import importlib
+import os
+import threading
+import weakref
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import yaml
+from dotenv import load_dotenv
+
+from problem_solving_research_agent.context import context_budget, prepare_context
+from problem_solving_research_agent.events import install_crewai_listeners, step_callback, task_callback
+from problem_solving_research_agent.streaming import streaming_enabled
+
+if TYPE_CHECKING:
+    from crewai import LLM, Crew
+
+# Load environment variables
+load_dotenv()
+
+CONFIG_DIR = Path(__file__).parent / "config"
+
+DEFAULT_MODEL = "gpt-4o"
+DEFAULT_TEMPERATURE = 0.7
+
+# Agents and tasks in the order the sequential process runs them
+AGENT_NAMES = ("problem_solving_research_specialist", "document_publisher")
+TASK_NAMES = ("research_problem_and_create_solution_approach", "publish_solution_as_document")
+AGENT_TOOLS = {
+    "problem_solving_research_specialist": (),
+    "document_publisher": ("problem_solving_research_agent.tools.google_docs:GoogleDocsCreatorTool",),
+}
+# Agents whose identical LLM calls are replayed from the response cache
+# (LLM_CACHE_MODE, see llm_cache.py)
+AGENT_LLM_CACHE = {
+    "problem_solving_research_specialist": True,
+    "document_publisher": True,
+}
+# Tasks each pipeline mode runs. "fast" asks the research agent for structured
+# sections and publishes them from a local template (see publishing.py)
+# instead of running the document_publisher agent.
+PIPELINES = {
+    "full": TASK_NAMES,
+    "fast": ("research_structured_report",),
+}
+# Single-task crews run outside the pipelines by the research fan-out
+# (RESEARCH_FANOUT, see fanout.py); they buffer rather than stream answers
+STAGES = {
+    "decompose": ("decompose_problem",),
+    "sub_question": ("research_sub_question",),
+}
+TASK_OUTPUT_MODELS = {
+    "research_structured_report": "problem_solving_research_agent.publishing:ResearchReport",
+    "decompose_problem": "problem_solving_research_agent.fanout:SubQuestions",
+    "research_sub_question": "problem_solving_research_agent.fanout:SubQuestionFindings",
+}
+
+_shared_lock = threading.Lock()
+_shared_llms: Dict[str, "LLM"] = {}
+_shared_tools: Dict[str, object] = {}
+
+
+def _import_object(path: str):
+    module_name, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def shared_llm(agent_name: str, stream: Optional[bool] = None, task_name: Optional[str] = None) -> "LLM":
+    """
+    Return the process-wide LLM for an agent, creating it on first use.
+
+    Its token usage counters are cumulative over every run that used it.
+
+    With ``routing`` configured for the agent in ``agents.yaml`` (and
+    ``LLM_ROUTING_ENABLED`` on), this routes each call among the agent's
+    models; see ``routing.py``.
+
+    Args:
+        agent_name: Agent key in ``agents.yaml``
+        stream: False for an LLM that never streams, whatever ``LLM_STREAMING`` says
+        task_name: Task the LLM is for, selecting the agent's per-task routing overrides
+    """
+    key = ":".join(
+        [agent_name] + ([task_name] if task_name else []) + ([] if stream is None else ["stream" if stream else "buffered"])
+    )
+    with _shared_lock:
+        llm = _shared_llms.get(key)
+        if llm is None:
+            from crewai import LLM
+            from problem_solving_research_agent.rate_limit import http_interceptor
+            from problem_solving_research_agent.routing import parse_policy, routed_llm
+
+            interceptor = http_interceptor()
+
+            def make_llm(option, cascades: bool) -> "LLM":
+                options = {}
+                if policy.timeout_seconds:
+                    options["timeout"] = policy.timeout_seconds
+                if cascades:
+                    # Timeouts and 5xx responses move on to the next model (see RoutedLLM.call)
+                    # instead of being retried against the same one
+                    options["max_retries"] = 0
+                if option.base_url:
+                    options["base_url"] = option.base_url
+                return LLM(
+                    model=option.model,
+                    temperature=DEFAULT_TEMPERATURE,
+                    stream=streaming_enabled() if stream is None else stream,
+                    # Every agent's requests share the process-wide rate limiter
+                    **({"interceptor": interceptor} if interceptor is not None else {}),
+                    **options,
+                )
+
+            routing = agent_routing(agent_name) if routing_enabled() else None
+            policy = parse_policy(routing, DEFAULT_MODEL, task_name)
+            route = f"{agent_name}:{task_name}" if task_name else agent_name
+            llm = _shared_llms[key] = routed_llm(route, policy, make_llm)
+        return llm
+
+
+def routing_enabled() -> bool:
+    """Whether ``LLM_ROUTING_ENABLED`` is on (the default); off pins every agent to :data:`DEFAULT_MODEL`."""
+    return os.getenv("LLM_ROUTING_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def agent_routing(agent_name: str) -> Optional[dict]:
+    """The agent's ``routing`` config from ``agents.yaml``, if any."""
+    return (_agents_config().get(agent_name) or {}).get("routing")
+
+
+def task_routed(agent_name: str, task_name: str) -> bool:
+    """Whether the agent's routing has overrides for ``task_name``."""
+    return task_name in ((agent_routing(agent_name) or {}).get("tasks") or {})
+
+
+def shared_tool(tool_path: str):
+    """Return the process-wide instance of a tool class given as ``module:Class``."""
+    with _shared_lock:
+        tool = _shared_tools.get(tool_path)
+        if tool is None:
+            tool = _shared_tools[tool_path] = _import_object(tool_path)()
+        return tool
+
+
+def shared_tools(agent_name: str) -> List[object]:
+    """Return the process-wide tool instances for an agent."""
+    return [shared_tool(tool_path) for tool_path in AGENT_TOOLS.get(agent_name, ())]
+
+
+def agent_options(
+    agent_name: str, llm_cache: Optional[bool] = None, stream: Optional[bool] = None, task_name: Optional[str] = None
+) -> dict:
+    """
+    Keyword arguments for ``Agent`` besides its YAML config.
+
+    Args:
+        agent_name: Agent key in ``agents.yaml``
+        llm_cache: Route the agent's LLM calls through the response cache
+            (only has an effect when ``LLM_CACHE_MODE`` is not ``off``);
+            defaults to the agent's entry in :data:`AGENT_LLM_CACHE`
+        stream: Override ``LLM_STREAMING`` for this agent's LLM
+        task_name: Task the agent is built for, when its routing has overrides for it
+    """
+    llm = shared_llm(agent_name, stream, task_name)
+    if llm_cache is None:
+        llm_cache = AGENT_LLM_CACHE.get(agent_name, True)
+    if llm_cache:
+        from problem_solving_research_agent.llm_cache import cached_llm
+        llm = cached_llm(agent_name, llm)
+    return {
+        "tools": shared_tools(agent_name),
+        "reasoning": False,
+        "inject_date": True,
+        "llm": llm,
+    }
+
+
+def crew_options() -> dict:
+    """Keyword arguments for ``Crew`` besides its agents and tasks."""
+    from crewai import Process
+
+    # Publish task/tool/LLM events on the in-process event bus
+    install_crewai_listeners()
+    return {
+        "process": Process.sequential,
+        "verbose": True,
+        "step_callback": step_callback,
+        "task_callback": task_callback,
+    }
+
+
+def load_config(name: str) -> dict:
+    with open(CONFIG_DIR / name, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f)
+
+
+@functools.lru_cache(maxsize=1)
+def _agents_config() -> dict:
+    return load_config("agents.yaml")
+
+
+class CrewFactory:
+    """Hands out isolated crew instances built from shared definitions.
+
+    Safe to use from several threads: the parsed configuration is never
+    mutated, and every call to :meth:`build` creates its own agents and tasks.
+    """
+
+    def __init__(self):
+        self.agents_config = load_config("agents.yaml")
+        self.tasks_config = load_config("tasks.yaml")
+
+    def build(
+        self,
+        verbose: Optional[bool] = None,
+        completed: Optional[Dict[str, str]] = None,
+        pipeline: str = "full",
+    ) -> "Crew":
+        """
+        Create a fresh crew for one request.
+
+        Args:
+            verbose: Override the crew's verbose setting
+            completed: {task_name: output} restored from a checkpoint; these
+                tasks are left out of the crew but still feed later tasks' context
+            pipeline: Key of :data:`PIPELINES` selecting which tasks to run, or
+                of :data:`STAGES` for a fan-out stage crew
+        """
+        from crewai import Agent, Crew, Task
+        from crewai.tasks.task_output import TaskOutput
+
+        completed = completed or {}
+        stage = pipeline in STAGES
+        task_names = STAGES[pipeline] if stage else PIPELINES[pipeline]
+
+        budgeted = context_budget()[0] > 0
+        context_names = {
+            context_name
+            for name in task_names
+            for context_name in self.tasks_config[name].get("context") or ()
+        }
+
+        agents = {}
+        tasks = {}
+        # task name -> stand-in task whose output is the budgeted context (see context.py)
+        views = {}
+        for name in task_names:
+            config = dict(self.tasks_config[name])
+            agent_name = config.pop("agent")
+            # A task with its own routing overrides gets its own agent instance
+            route_task = name if task_routed(agent_name, name) else None
+            agent_key = (agent_name, route_task)
+            if agent_key not in agents:
+                agent_config = dict(self.agents_config[agent_name])
+                agent_config.pop("routing", None)
+                agents[agent_key] = Agent(
+                    config=agent_config,
+                    **agent_options(agent_name, stream=False if stage else None, task_name=route_task),
+                )
+            context = [
+                views.get(context_name, tasks[context_name]) for context_name in config.pop("context", None) or ()
+            ]
+            output_model = TASK_OUTPUT_MODELS.get(name)
+            view = None
+            if budgeted and name in context_names:
+                view = views[name] = Task(
+                    description=config["description"],
+                    expected_output=config["expected_output"],
+                    name=f"{name}_context",
+                    agent=agents[agent_key],
+                )
+            tasks[name] = Task(
+                config=config,
+                name=name,
+                agent=agents[agent_key],
+                **({"context": context} if context else {}),
+                **({"output_pydantic": _import_object(output_model)} if output_model else {}),
+                **({"callback": update_context_view} if view is not None else {}),
+            )
+            if view is not None:
+                _register_context_view(tasks[name], view)
+            if name in completed:
+                tasks[name].output = TaskOutput(
+                    name=name,
+                    description=tasks[name].description,
+                    raw=completed[name],
+                    agent=agents[agent_key].role,
+                )
+                if view is not None:
+                    set_context_view(view, tasks[name].output)
+        options = crew_options()
+        if verbose is not None:
+            options["verbose"] = verbose
+        pending = [task for name, task in tasks.items() if name not in completed]
+        return Crew(agents=list(agents.values()), tasks=pending, **options)
+
+
+# id(task) -> (weak reference to the task, its context view). A task callback
+# only receives the output, and crewAI warns about callbacks it cannot
+# serialize (partials, closures), so the view is looked up here instead
+_context_views: Dict[int, tuple] = {}
+_context_views_lock = threading.Lock()
+
+
+def _register_context_view(task, view) -> None:
+    with _context_views_lock:
+        _context_views[id(task)] = (weakref.ref(task), view)
+    weakref.finalize(task, _forget_context_view, id(task))
+
+
+def _forget_context_view(key: int) -> None:
+    with _context_views_lock:
+        entry = _context_views.get(key)
+        if entry is not None and entry[0]() is None:
+            del _context_views[key]
+
+
+def update_context_view(output) -> None:
+    """Task callback: publish the finished task's budgeted output on its context view."""
+    with _context_views_lock:
+        entries = list(_context_views.values())
+    for task_ref, view in entries:
+        task = task_ref()
+        # crewAI stores the output on the task before calling its callback
+        if task is not None and task.output is output:
+            set_context_view(view, output)
+            return
+
+
+def set_context_view(view, output) -> None:
+    """Publish a task's budgeted output on its context ``view``."""
+    from crewai.tasks.task_output import TaskOutput
+
+    view.output = TaskOutput(
+        name=view.name,
+        description=output.description,
+        raw=prepare_context(output.name or view.name, output.raw),
+        agent=output.agent,
+    )
+
+
+_factory: Optional[CrewFactory] = None
+_factory_lock = threading.Lock()
+
+
+def get_crew_factory() -> CrewFactory:
+    """Return the process-wide crew factory."""
+    global _factory
+    with _factory_lock:
+        if _factory is None:
+            _factory = CrewFactory()
+        return _factory
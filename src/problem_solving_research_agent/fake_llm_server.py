@@ -0,0 +1,321 @@
+"""Local OpenAI-compatible chat completions server for offline testing.
+
+Serves ``POST /v1/chat/completions`` with scripted answers (native tool calls
+or crewAI's text ReAct format, matching the request), either as one JSON
+response or as a ``text/event-stream`` of chunks with a delay per token, so
+streaming, time-to-first-byte and the full crew can be exercised
+without network access or API keys:
+
+    server = FakeLLMServer(token_delay=0.01).start()
+    os.environ["OPENAI_BASE_URL"] = server.base_url
+
+or from a shell::
+
+    python -m problem_solving_research_agent.fake_llm_server --port 8899
+    OPENAI_BASE_URL=http://127.0.0.1:8899/v1 LLM_STREAMING=true ...
+
+Every request is recorded in ``server.requests``. With ``rate_limit`` set, the
+server also enforces a sliding-window request limit like the real API: excess
+requests get a 429 with ``retry-after-ms``, every response carries
+``x-ratelimit-*`` headers, and ``server.rejected`` counts the 429s.
+"""
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple, Union
+
+_TOKEN_RE = re.compile(r"\s*\S+|\s+")
+_HANDLE_RE = re.compile(r"artifact://[0-9a-f]{64}")
+
+RESEARCH_ANSWER = "\n\n".join(
+    [
+        "## Problem Analysis\n\nThe problem breaks down into data collection, orchestration "
+        "and delivery. Each part has distinct latency and reliability constraints.",
+        "## Research Summary\n\n- Sequential agent pipelines are simple to reason about\n"
+        "- Streaming reduces perceived latency\n- Caching avoids repeated work",
+        "## Step-by-Step Solution Approach\n\n1. Define the agents and tasks\n"
+        "2. Wire tools and credentials\n3. Stream results to the user\n4. Publish the document",
+        "## Additional Resources\n\n- [CrewAI documentation](https://docs.crewai.com)",
+    ]
+)
+
+
+def default_responder(body: dict) -> Union[str, dict]:
+    """Answer like a cooperative model: publish with the Docs tool once, then finish.
+
+    Requests that offer native ``tools`` get a ``tool_calls`` reply; prompts
+    using crewAI's text ReAct format get "Action:"/"Final Answer:" text.
+    """
+    messages = body.get("messages") or []
+    prompt = "\n".join(str(message.get("content", "")) for message in messages)
+    react = "Final Answer:" in prompt
+    has_tool_result = any(message.get("role") in ("tool", "assistant") for message in messages)
+    tool_names = [tool.get("function", {}).get("name", "") for tool in body.get("tools") or ()]
+    docs_tool = next((name for name in tool_names if "docs" in name.lower()), None)
+    # Refer to the research by handle when the context offers one, as instructed
+    handle = _HANDLE_RE.search(prompt)
+    answer = f"## Executive Summary\n\nA staged plan, detailed below.\n\n{handle.group(0)}" if handle else RESEARCH_ANSWER
+    if not has_tool_result and (docs_tool or (react and "Google Docs Creator" in prompt)):
+        arguments = {"title": "Solution Approach", "content": answer}
+        if docs_tool:
+            return {"tool_calls": [{"name": docs_tool, "arguments": json.dumps(arguments)}]}
+        return (
+            "Thought: The document is formatted, so I will publish it.\n"
+            f"Action: Google Docs Creator\nAction Input: {json.dumps(arguments)}"
+        )
+    if react:
+        return f"Thought: I now know the final answer\nFinal Answer: {answer}"
+    return answer
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into word-sized chunks, keeping whitespace attached."""
+    return _TOKEN_RE.findall(text)
+
+
+class FakeLLMServer:
+    """Threaded HTTP server speaking the chat completions API.
+
+    Args:
+        responder: Maps the request body to the answer text, or to
+            ``{"tool_calls": [{"name": ..., "arguments": ...}]}``
+        token_delay: Seconds per generated token (between streamed chunks)
+        first_token_delay: Seconds before the first chunk (or the whole response)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        rate_limit: Requests allowed per ``rate_window`` (None for no limit)
+        rate_window: Seconds of the sliding rate-limit window
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[dict], Union[str, dict]]] = None,
+        token_delay: float = 0.02,
+        first_token_delay: float = 0.2,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        rate_limit: Optional[int] = None,
+        rate_window: float = 60.0,
+    ):
+        self.responder = responder or default_responder
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.requests: List[dict] = []
+        self.rejected = 0
+        self._accepted: deque = deque()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-llm-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _admit(self) -> Tuple[bool, dict]:
+        """Apply the rate limit; return whether to serve and the headers to send."""
+        if self.rate_limit is None:
+            return True, {}
+        now = time.monotonic()
+        with self._lock:
+            while self._accepted and self._accepted[0] <= now - self.rate_window:
+                self._accepted.popleft()
+            admitted = len(self._accepted) < self.rate_limit
+            if admitted:
+                self._accepted.append(now)
+            else:
+                self.rejected += 1
+            reset = self._accepted[0] + self.rate_window - now if self._accepted else 0.0
+            remaining = self.rate_limit - len(self._accepted)
+        headers = {
+            "x-ratelimit-limit-requests": str(self.rate_limit),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{max(reset, 0) * 1000:.0f}ms",
+        }
+        if not admitted:
+            headers["retry-after-ms"] = f"{max(reset, 0) * 1000:.0f}"
+        return admitted, headers
+
+    def _completion(self, body: dict) -> dict:
+        with self._lock:
+            self.requests.append(body)
+            completion_id = f"chatcmpl-fake-{next(self._ids)}"
+        reply = self.responder(body)
+        tool_calls = reply.get("tool_calls") if isinstance(reply, dict) else None
+        text = reply if isinstance(reply, str) else reply.get("content", "")
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in body.get("messages") or []) // 4
+        return {
+            "id": completion_id,
+            "model": body.get("model", "fake"),
+            "created": int(time.time()),
+            "text": text,
+            "tool_calls": [
+                {"id": f"call_{completion_id}_{n}", "type": "function",
+                 "function": {"name": call["name"], "arguments": call["arguments"]}}
+                for n, call in enumerate(tool_calls or ())
+            ],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": prompt_tokens + len(text) // 4,
+            },
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting, e.g. a timeout in a routing cascade
+                    pass
+
+            def do_POST(self):
+                self.rate_headers = {}
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                admitted, self.rate_headers = server._admit()
+                if not admitted:
+                    self._send_json(429, {"error": {
+                        "message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded",
+                    }})
+                    return
+                completion = server._completion(body)
+                time.sleep(server.first_token_delay)
+                if body.get("stream"):
+                    self._stream(completion, body)
+                else:
+                    # Generation time is the same whether or not it is streamed
+                    time.sleep(server.token_delay * max(len(tokenize(completion["text"])) - 1, 0))
+                    self._send_json(200, {
+                        "id": completion["id"],
+                        "object": "chat.completion",
+                        "created": completion["created"],
+                        "model": completion["model"],
+                        "choices": [{
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": completion["text"] or None,
+                                **({"tool_calls": completion["tool_calls"]} if completion["tool_calls"] else {}),
+                            },
+                            "finish_reason": "tool_calls" if completion["tool_calls"] else "stop",
+                        }],
+                        "usage": completion["usage"],
+                    })
+
+            def _stream(self, completion: dict, body: dict):
+                self.send_response(200)
+                self._send_rate_headers()
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def chunk(delta: dict, finish_reason=None, usage=None):
+                    payload = {
+                        "id": completion["id"],
+                        "object": "chat.completion.chunk",
+                        "created": completion["created"],
+                        "model": completion["model"],
+                        "choices": [] if usage else [
+                            {"index": 0, "delta": delta, "finish_reason": finish_reason}
+                        ],
+                    }
+                    if usage:
+                        payload["usage"] = usage
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+
+                chunk({"role": "assistant", "content": ""})
+                for index, token in enumerate(tokenize(completion["text"])):
+                    if index:
+                        time.sleep(server.token_delay)
+                    chunk({"content": token})
+                for index, call in enumerate(completion["tool_calls"]):
+                    chunk({"tool_calls": [{"index": index, **call}]})
+                chunk({}, finish_reason="tool_calls" if completion["tool_calls"] else "stop")
+                if (body.get("stream_options") or {}).get("include_usage"):
+                    chunk({}, usage=completion["usage"])
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _send_json(self, status: int, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self._send_rate_headers()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_rate_headers(self):
+                for name, value in self.rate_headers.items():
+                    self.send_header(name, value)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI-compatible chat completions API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed chunks")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds before the first chunk")
+    parser.add_argument("--rate-limit", type=int, help="Requests per --rate-window before answering 429")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="Seconds of the rate-limit window")
+    options = parser.parse_args()
+
+    server = FakeLLMServer(
+        token_delay=options.token_delay,
+        first_token_delay=options.first_token_delay,
+        host=options.host,
+        port=options.port,
+        rate_limit=options.rate_limit,
+        rate_window=options.rate_window,
+    )
+    print(f"Fake LLM server on {server.base_url} (set OPENAI_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
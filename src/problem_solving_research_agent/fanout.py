@@ -0,0 +1,152 @@
+"""Parallel sub-question research for broad problems.
+
+With ``RESEARCH_FANOUT`` set to N > 1 (see ``runner.fanout_settings``), the
+``full`` pipeline's research task is replaced by three stages:
+
+1. ``decompose_problem`` splits the problem statement into at most N
+   independent sub-questions (one short LLM call);
+2. ``research_sub_question`` researches each of them in its own single-task
+   crew, at most ``RESEARCH_FANOUT_CONCURRENCY`` at a time;
+3. :func:`merge_findings` assembles the findings locally into the research
+   task's usual sections, which the publisher then receives as that task's
+   output (and the checkpoint store records).
+
+One long serial answer becomes a few shorter ones produced side by side. The
+stage crews buffer their answers instead of streaming them: their JSON would
+only interleave on the live answer stream.
+"""
+import contextvars
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel, Field
+
+from problem_solving_research_agent.factory import get_crew_factory
+from problem_solving_research_agent.publishing import bullet_list
+
+DECOMPOSE_TASK = "decompose_problem"
+SUB_QUESTION_TASK = "research_sub_question"
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+Model = TypeVar("Model", bound=BaseModel)
+
+
+class SubQuestions(BaseModel):
+    """Independent parts of a problem statement."""
+    questions: List[str] = Field(..., description="Self-contained sub-questions, most important first")
+
+
+class SubQuestionFindings(BaseModel):
+    """Research results for one sub-question."""
+    analysis: str = Field(..., description="What this part of the problem involves (markdown)")
+    findings: str = Field(..., description="Key research findings with sources (markdown)")
+    steps: List[str] = Field(..., description="Implementation steps for this part, in order")
+    recommendations: List[str] = Field(default_factory=list, description="Specific tools and approaches")
+    resources: List[str] = Field(default_factory=list, description="Links and references (markdown links)")
+
+
+def stage_task_names(width: int) -> List[str]:
+    """Tasks a fan-out of ``width`` runs at most, for progress reporting."""
+    return [DECOMPOSE_TASK] + [SUB_QUESTION_TASK] * width
+
+
+def _load(model: Type[Model], value: Union[BaseModel, str]) -> Model:
+    if isinstance(value, model):
+        return value
+    match = _FENCE_RE.match(value)
+    return model.model_validate_json(match.group(1) if match else value)
+
+
+def _kickoff(stage: str, inputs: dict) -> Union[BaseModel, str]:
+    output = get_crew_factory().build(pipeline=stage).kickoff(inputs=inputs)
+    return getattr(output, "pydantic", None) or output.raw
+
+
+def decompose(problem_statement: str, knowledge_context: str, width: int) -> List[str]:
+    """Split a problem statement into at most ``width`` sub-questions."""
+    result = _kickoff(
+        "decompose",
+        {
+            "problem_statement": problem_statement,
+            "knowledge_context": knowledge_context,
+            "sub_question_count": width,
+        },
+    )
+    questions = []
+    for question in _load(SubQuestions, result).questions:
+        question = question.strip()
+        if question and question not in questions:
+            questions.append(question)
+    return questions[:width] or [problem_statement]
+
+
+def research_sub_questions(
+    problem_statement: str,
+    knowledge_context: str,
+    questions: List[str],
+    concurrency: int,
+) -> List[Optional[SubQuestionFindings]]:
+    """Research sub-questions concurrently; failed ones come back as None.
+
+    Raises the first error when every sub-question failed.
+    """
+    def research(question: str) -> SubQuestionFindings:
+        inputs = {
+            "problem_statement": problem_statement,
+            "knowledge_context": knowledge_context,
+            "sub_question": question,
+        }
+        return _load(SubQuestionFindings, _kickoff("sub_question", inputs))
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(questions)), thread_name_prefix="research-fanout") as pool:
+        # Each worker keeps the caller's run ID so its events reach the run's subscribers
+        futures = [pool.submit(contextvars.copy_context().run, research, question) for question in questions]
+    results, errors = [], []
+    for future in futures:
+        error = future.exception()
+        results.append(None if error is not None else future.result())
+        if error is not None:
+            errors.append(error)
+    if len(errors) == len(questions):
+        raise errors[0]
+    return results
+
+
+def merge_findings(questions: List[str], findings: List[Optional[SubQuestionFindings]]) -> str:
+    """Assemble sub-question findings into the research task's markdown sections."""
+    answered = [(question, result) for question, result in zip(questions, findings) if result is not None]
+    missing = [question for question, result in zip(questions, findings) if result is None]
+
+    analysis = [f"### {question}\n\n{result.analysis.strip()}" for question, result in answered]
+    if missing:
+        analysis.append("Not researched because of errors:\n\n" + bullet_list(missing))
+    summary = [f"### {question}\n\n{result.findings.strip()}" for question, result in answered]
+    steps, number = [], 1
+    for n, (question, result) in enumerate(answered, 1):
+        numbered = []
+        for step in result.steps:
+            numbered.append(f"{number}. {step}")
+            number += 1
+        steps.append(f"### Phase {n}: {question}\n\n" + "\n".join(numbered))
+    recommendations = list(dict.fromkeys(item for _, result in answered for item in result.recommendations))
+    resources = list(dict.fromkeys(item for _, result in answered for item in result.resources))
+
+    sections = [
+        "## Problem Analysis\n\n" + "\n\n".join(analysis),
+        "## Research Summary\n\n" + "\n\n".join(summary),
+        "## Step-by-Step Solution Approach\n\n" + "\n\n".join(steps),
+    ]
+    if recommendations:
+        sections.append("## Technical Recommendations\n\n" + bullet_list(recommendations))
+    if resources:
+        sections.append("## Additional Resources\n\n" + bullet_list(resources))
+    return "\n\n".join(sections)
+
+
+def fan_out_research(problem_statement: str, knowledge_context: str, width: int, concurrency: int) -> str:
+    """Research a problem as parallel sub-questions and return the merged document."""
+    questions = decompose(problem_statement, knowledge_context, width)
+    findings = research_sub_questions(problem_statement, knowledge_context, questions, concurrency)
+    return merge_findings(questions, findings)
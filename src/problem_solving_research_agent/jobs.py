@@ -0,0 +1,381 @@
+"""Background job queue for crew runs.
+
+Submissions are stored in a small SQLite database and executed by a fixed-size
+worker pool, so callers (the Streamlit UI in particular) get a job ID back
+immediately and poll for status instead of blocking on a multi-minute run.
+Because job state lives on disk, a browser refresh or reconnect can pick the
+job up again by ID. Each job is leased to the process that queued it (see
+:mod:`leases`); on startup and on every lease heartbeat after it, jobs whose
+process died or stopped renewing its lease are claimed and re-queued, while
+jobs of other live processes sharing the database are left to them.
+
+Submissions identical to a job that is still queued or running join it
+instead of starting another crew (see :mod:`singleflight`): they get the same
+job ID back and follow its progress and result.
+
+With ``max_pending`` set, a submission that would start a new crew while that
+many are already queued or running is refused with :class:`QueueFull`, so a
+burst of requests cannot build an unbounded backlog. Crews run on the pool's
+threads by default; with ``JOB_WORKER_MODE=processes`` each thread hands its
+run to a process pool instead (progress and streamed tokens then stay in the
+child process, only the result comes back).
+"""
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from problem_solving_research_agent.events import (
+    RUN_CACHE_HIT,
+    RUN_STARTED,
+    TASK_COMPLETED,
+    TASK_STARTED,
+    TOOL_STARTED,
+    event_bus,
+)
+from problem_solving_research_agent.leases import PROCESS_OWNER, Heartbeat, expired
+from problem_solving_research_agent.runner import crew_fingerprint, pipeline_mode, run_problem
+from problem_solving_research_agent.singleflight import Flight, SingleFlight, request_key
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+ERROR = "error"
+FINISHED_STATES = (DONE, ERROR)
+
+THREADS = "threads"
+PROCESSES = "processes"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    problem_statement TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    stage TEXT,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+# Added after the first release; databases created before get them on open
+_LEASE_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+
+class JobStore:
+    """SQLite-backed job state shared by all workers and sessions.
+
+    Args:
+        path: Database file path
+    """
+
+    def __init__(self, path: str = ".cache/jobs.sqlite3"):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in _LEASE_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self.heartbeat = Heartbeat(self._renew, name="job-lease-heartbeat")
+
+    @contextmanager
+    def _cursor(self):
+        with self._lock:
+            yield self._conn
+
+    def create(self, problem_statement: str) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._cursor() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, problem_statement, status, stage, created_at, owner, heartbeat_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, problem_statement, QUEUED, "Waiting for a free worker", now, PROCESS_OWNER, now),
+            )
+        self.heartbeat.hold(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._cursor() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def update(self, job_id: str, **fields) -> None:
+        if not fields:
+            return
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._cursor() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def unfinished(self) -> list:
+        with self._cursor() as conn:
+            rows = conn.execute(
+                "SELECT id, problem_statement, owner, heartbeat_at FROM jobs WHERE status IN (?, ?) "
+                "ORDER BY created_at",
+                (QUEUED, RUNNING),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def claim_expired(self) -> list:
+        """Take over the unfinished jobs whose lease expired and re-queue them.
+
+        The claim is conditional on the lease being unchanged, so when several
+        processes start at once each job is claimed by one of them.
+        """
+        claimed = []
+        now = time.time()
+        for job in self.unfinished():
+            if not expired(job["owner"], job["heartbeat_at"], now):
+                continue
+            with self._cursor() as conn:
+                taken = conn.execute(
+                    "UPDATE jobs SET status = ?, progress = 0, stage = ?, owner = ?, heartbeat_at = ? "
+                    "WHERE id = ? AND status IN (?, ?) AND owner IS ? AND heartbeat_at IS ?",
+                    (QUEUED, "Re-queued after restart", PROCESS_OWNER, now, job["id"], QUEUED, RUNNING,
+                     job["owner"], job["heartbeat_at"]),
+                ).rowcount
+            if taken:
+                self.heartbeat.hold(job["id"])
+                claimed.append(job)
+        return claimed
+
+    def release(self, job_id: str) -> None:
+        """Stop renewing the lease of a finished job."""
+        self.heartbeat.release(job_id)
+
+    def _renew(self, job_ids, now: float) -> None:
+        job_ids = list(job_ids)
+        with self._cursor() as conn:
+            conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND id IN ({', '.join('?' * len(job_ids))})",
+                (now, PROCESS_OWNER, *job_ids),
+            )
+
+    def counts(self) -> dict:
+        with self._cursor() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class QueueFull(RuntimeError):
+    """The queue already holds ``max_pending`` unfinished jobs."""
+
+
+class ProcessRunner:
+    """Runs :func:`run_problem` in a pool of worker processes.
+
+    Args:
+        workers: Processes in the pool
+    """
+
+    def __init__(self, workers: int):
+        # spawn: forking a process that already runs threads is not safe
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def __call__(self, problem_statement: str, run_id: Optional[str] = None) -> str:
+        return self._pool.submit(run_problem, problem_statement, run_id=run_id).result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+class JobQueue:
+    """Fixed-size worker pool that executes jobs recorded in a :class:`JobStore`.
+
+    Args:
+        store: Where job state is persisted
+        workers: Number of crews that may run at once
+        run_fn: Solves one problem statement and accepts a ``run_id`` keyword;
+            defaults to :func:`run_problem`
+        max_pending: Most jobs queued or running at once (0 for no limit)
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2,
+                 run_fn: Optional[Callable[[str], str]] = None, max_pending: int = 0):
+        self.store = store
+        self.workers = workers
+        self.run_fn = run_fn or run_problem
+        self.max_pending = max_pending
+        self.flights = SingleFlight("jobs")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="crew-job")
+        self._pending = 0
+        self._idle = threading.Condition()
+
+    def submit(self, problem_statement: str) -> str:
+        """Queue a problem statement and return its job ID.
+
+        If an identical submission is still queued or running, its job ID is
+        returned instead and no new crew is started.
+
+        Raises:
+            QueueFull: A new crew is needed but ``max_pending`` jobs are unfinished
+        """
+        flight, leader = self.flights.join(
+            self._key(problem_statement), owner=lambda: self._admit(problem_statement)
+        )
+        if leader:
+            self._executor.submit(self._execute, flight.owner, problem_statement, flight)
+        return flight.owner
+
+    def pending(self) -> int:
+        """Jobs of this queue that are queued or running."""
+        with self._idle:
+            return self._pending
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued and running job finished; False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def subscribers(self, job_id: str, problem_statement: str) -> int:
+        """Number of submissions sharing a job while it is in flight (1 otherwise)."""
+        flight = self.flights.get(self._key(problem_statement))
+        return flight.subscribers if flight is not None and flight.owner == job_id else 1
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return the current state of a job, or None if unknown."""
+        return self.store.get(job_id)
+
+    def recover(self) -> int:
+        """Re-queue jobs left queued or running by a process that is gone.
+
+        Keeps doing so on every lease heartbeat until :meth:`shutdown`, so the
+        jobs of a process that dies later are picked up as well.
+        """
+        self.store.heartbeat.sweep(self._requeue_expired)
+        return self._requeue_expired()
+
+    def _requeue_expired(self) -> int:
+        jobs = self.store.claim_expired()
+        for job in jobs:
+            with self._idle:
+                self._pending += 1
+            flight, leader = self.flights.join(self._key(job["problem_statement"]), owner=lambda: job["id"])
+            # A duplicate left over from before the restart still runs: its ID is
+            # all its submitters know
+            self._executor.submit(self._execute, job["id"], job["problem_statement"], flight if leader else None)
+        return len(jobs)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.store.heartbeat.sweep(None)
+        self._executor.shutdown(wait=wait)
+        shutdown = getattr(self.run_fn, "shutdown", None)
+        if shutdown is not None:
+            shutdown(wait=wait)
+
+    @staticmethod
+    def _key(problem_statement: str) -> tuple:
+        return request_key(problem_statement, crew_fingerprint(pipeline_mode()))
+
+    def _admit(self, problem_statement: str) -> str:
+        """Create the job for a new crew, if the queue has room for it."""
+        with self._idle:
+            if self.max_pending and self._pending >= self.max_pending:
+                raise QueueFull(f"{self._pending} jobs are already queued or running")
+            self._pending += 1
+        try:
+            return self.store.create(problem_statement)
+        except BaseException:
+            self._finished()
+            raise
+
+    def _finished(self) -> None:
+        with self._idle:
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def _execute(self, job_id: str, problem_statement: str, flight: Optional[Flight] = None) -> None:
+        try:
+            self._run(job_id, problem_statement, flight)
+        finally:
+            if flight is not None and not flight.done():
+                # Storing the outcome failed or the worker was interrupted: free the
+                # key so identical submissions do not join a run that never ends
+                self.flights.abandon(flight)
+            self.store.release(job_id)
+            self._finished()
+
+    def _run(self, job_id: str, problem_statement: str, flight: Optional[Flight] = None) -> None:
+        self.store.update(job_id, status=RUNNING, progress=0.0, stage="Starting crew", started_at=time.time())
+        unsubscribe = event_bus.subscribe(self._progress_tracker(job_id), run_id=job_id)
+        try:
+            result = self.run_fn(problem_statement, run_id=job_id)
+        except Exception as e:
+            self.store.update(job_id, status=ERROR, error=str(e), stage="Failed", finished_at=time.time())
+            if flight is not None:
+                # Identical submissions from now on start a fresh run instead of joining the failure
+                self.flights.finish(flight, error=e)
+            return
+        finally:
+            unsubscribe()
+        self.store.update(
+            job_id, status=DONE, result=result, progress=1.0, stage="Completed", finished_at=time.time()
+        )
+        if flight is not None:
+            self.flights.finish(flight, result)
+
+    def _progress_tracker(self, job_id: str):
+        """Build an event handler that turns crew events into job progress."""
+        state = {"total": 1, "done": 0}
+
+        def track(event):
+            data = event.data
+            if event.type == RUN_STARTED:
+                state["total"] = max(len(data.get("tasks") or ()), 1)
+                self.store.update(job_id, stage="Initializing CrewAI agents")
+            elif event.type == RUN_CACHE_HIT:
+                self.store.update(job_id, progress=0.99, stage="Served from cache")
+            elif event.type == TASK_STARTED:
+                self.store.update(
+                    job_id,
+                    progress=state["done"] / state["total"],
+                    stage=f"{data.get('agent') or 'Agent'}: {data.get('task')}",
+                )
+            elif event.type == TASK_COMPLETED:
+                state["done"] += 1
+                self.store.update(job_id, progress=min(state["done"] / state["total"], 0.99))
+            elif event.type == TOOL_STARTED:
+                self.store.update(job_id, stage=f"{data.get('agent') or 'Agent'}: using {data.get('tool')}")
+        return track
+
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue, configured by ``JOB_WORKERS``,
+    ``JOB_WORKER_MODE``, ``JOB_MAX_PENDING`` and ``JOB_DB_PATH``."""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            store = JobStore(os.getenv("JOB_DB_PATH", ".cache/jobs.sqlite3"))
+            workers = int(os.getenv("JOB_WORKERS", "2"))
+            mode = os.getenv("JOB_WORKER_MODE", THREADS).strip().lower()
+            if mode not in (THREADS, PROCESSES):
+                raise ValueError(f"JOB_WORKER_MODE must be {THREADS} or {PROCESSES}, got {mode!r}")
+            _job_queue = JobQueue(
+                store,
+                workers=workers,
+                run_fn=ProcessRunner(workers) if mode == PROCESSES else None,
+                max_pending=int(os.getenv("JOB_MAX_PENDING", "64")),
+            )
+            _job_queue.recover()
+        return _job_queue
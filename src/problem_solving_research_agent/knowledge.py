@@ -0,0 +1,432 @@
+"""BM25 retrieval over the ``knowledge/`` directory.
+
+Instead of pasting every knowledge file into the prompt, the research task
+receives only the top-k chunks most relevant to the problem statement (the
+``{knowledge_context}`` input), so prompt size stays flat as the corpus grows.
+
+The index lives in one array-backed file (``index.bin``): a small JSON header
+with the vocabulary and file manifest, followed by packed ``array`` sections
+for the postings, chunk lengths and text offsets, and the chunk texts
+themselves. Only the header and arrays are loaded; chunk texts are read from
+disk for the hits. The file is replaced atomically, so readers in other
+processes always see a complete index.
+
+Rebuilds are incremental. Files whose mtime and size are unchanged are not
+read at all; changed files are hashed, and only files whose content changed
+are chunked and tokenized again. Per-file term counts are kept in
+content-addressed segment files, so merging them into the postings never
+re-tokenizes unchanged documents.
+"""
+import hashlib
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import threading
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+MAGIC = b"KNOWIDX1"
+INDEX_VERSION = 1
+# Header length and absolute offset of the chunk texts
+HEADER_STRUCT = "<IQ"
+EXTENSIONS = (".md", ".txt")
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from has have how i if in into is it its of on or our so "
+    "that the their there these this to was we what when which who will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords and single characters."""
+    return [token for token in _TOKEN_RE.findall(text.casefold()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def chunk_text(text: str, chunk_chars: int = 800) -> List[str]:
+    """Split text into chunks of whole paragraphs, about ``chunk_chars`` long."""
+    chunks: List[str] = []
+    current = ""
+    for paragraph in _PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        while len(paragraph) > chunk_chars:
+            # Cut oversized paragraphs at the last whitespace inside the window
+            cut = paragraph.rfind(" ", 0, chunk_chars)
+            cut = cut if cut > 0 else chunk_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(paragraph[:cut].strip())
+            paragraph = paragraph[cut:].strip()
+        if not paragraph:
+            continue
+        if current and len(current) + len(paragraph) + 2 > chunk_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class KnowledgeIndex:
+    """Incrementally rebuilt BM25 index of a directory of text documents.
+
+    Args:
+        source_dir: Directory of ``.md``/``.txt`` documents (searched recursively)
+        index_dir: Where ``index.bin`` and the per-file segments are kept
+        chunk_chars: Target chunk size in characters
+    """
+
+    def __init__(self, source_dir: str = "knowledge", index_dir: str = ".cache/knowledge", chunk_chars: int = 800):
+        self.source_dir = Path(source_dir)
+        self.index_dir = Path(index_dir)
+        self.segment_dir = self.index_dir / "segments"
+        self.chunk_chars = chunk_chars
+        self._lock = threading.Lock()
+        self._header: Optional[dict] = None
+        self._arrays: Dict[str, array] = {}
+        self._index_stat: Optional[Tuple[int, int]] = None
+        self._stats = {"refreshes": 0, "rebuilds": 0, "files_indexed": 0, "searches": 0}
+
+    @property
+    def index_path(self) -> Path:
+        return self.index_dir / "index.bin"
+
+    def refresh(self) -> bool:
+        """Bring the index up to date with the source directory.
+
+        Returns:
+            True when the index was rebuilt
+        """
+        with self._lock:
+            self._stats["refreshes"] += 1
+            self._load()
+            manifest = (self._header or {}).get("files", {})
+            current = self._scan()
+            if self._header is not None and current.keys() == manifest.keys() and all(
+                manifest[path]["mtime_ns"] == mtime_ns and manifest[path]["size"] == size
+                for path, (mtime_ns, size) in current.items()
+            ):
+                return False
+
+            files = {}
+            changed = False
+            for path, (mtime_ns, size) in sorted(current.items()):
+                previous = manifest.get(path)
+                if previous and previous["mtime_ns"] == mtime_ns and previous["size"] == size:
+                    files[path] = previous
+                    continue
+                data = (self.source_dir / path).read_bytes()
+                sha256 = hashlib.sha256(data).hexdigest()
+                if not (previous and previous["sha256"] == sha256 and self._segment_path(sha256).exists()):
+                    self._write_segment(sha256, data.decode("utf-8", errors="replace"))
+                    self._stats["files_indexed"] += 1
+                    changed = True
+                files[path] = {"mtime_ns": mtime_ns, "size": size, "sha256": sha256}
+            changed = changed or files.keys() != manifest.keys() or self._header is None
+
+            if changed:
+                self._build(files)
+                self._stats["rebuilds"] += 1
+            else:
+                # Only timestamps moved (touched or re-saved files): rewrite the manifest
+                self._build(files, reuse=True)
+            return changed
+
+    def search(self, query: str, k: int = 4) -> List[dict]:
+        """Return the ``k`` best chunks for ``query`` as dicts with source, text and score."""
+        with self._lock:
+            self._stats["searches"] += 1
+            self._load()
+            header = self._header
+            if header is None or not header["chunks"]:
+                return []
+            postings_ids = self._arrays["postings_ids"]
+            postings_tfs = self._arrays["postings_tfs"]
+            lengths = self._arrays["chunk_lengths"]
+            n_chunks = header["chunks"]
+            average = header["avg_length"] or 1.0
+
+            scores: Dict[int, float] = {}
+            for term in set(tokenize(query)):
+                entry = header["terms"].get(term)
+                if entry is None:
+                    continue
+                start, count = entry
+                idf = math.log(1 + (n_chunks - count + 0.5) / (count + 0.5))
+                for position in range(start, start + count):
+                    chunk = postings_ids[position]
+                    tf = postings_tfs[position]
+                    norm = tf + K1 * (1 - B + B * lengths[chunk] / average)
+                    scores[chunk] = scores.get(chunk, 0.0) + idf * tf * (K1 + 1) / norm
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                {"source": header["sources"][self._arrays["chunk_sources"][chunk]],
+                 "text": self._read_text(chunk), "score": round(score, 4)}
+                for chunk, score in best
+            ]
+
+    def version(self) -> str:
+        """Fingerprint of the indexed content: changes whenever a search may answer differently."""
+        with self._lock:
+            self._load()
+            header = self._header or {}
+        digest = hashlib.sha256(f"{INDEX_VERSION}\0{self.chunk_chars}".encode("utf-8"))
+        for path, entry in sorted(header.get("files", {}).items()):
+            digest.update(f"\0{path}\0{entry['sha256']}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    def stats(self) -> dict:
+        """Return refresh/search counters and the index size."""
+        with self._lock:
+            stats = dict(self._stats)
+            header = self._header or {}
+            stats["files"] = len(header.get("files", {}))
+            stats["chunks"] = header.get("chunks", 0)
+            stats["terms"] = len(header.get("terms", {}))
+        return stats
+
+    def _scan(self) -> Dict[str, Tuple[int, int]]:
+        # os.scandir on plain strings: pathlib dominates the cost of a no-op refresh
+        found = {}
+        pending = [("", str(self.source_dir))]
+        while pending:
+            prefix, directory = pending.pop()
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        pending.append((f"{prefix}{entry.name}/", entry.path))
+                    elif os.path.splitext(entry.name)[1].lower() in EXTENSIONS:
+                        stat = entry.stat()
+                        found[prefix + entry.name] = (stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    continue
+        return found
+
+    def _segment_path(self, sha256: str) -> Path:
+        return self.segment_dir / f"{sha256}.json"
+
+    def _write_segment(self, sha256: str, text: str) -> None:
+        chunks = [
+            {"text": chunk, "terms": Counter(tokenize(chunk))}
+            for chunk in chunk_text(text, self.chunk_chars)
+        ]
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self._segment_path(sha256), json.dumps({"chunks": chunks}).encode("utf-8"))
+
+    def _build(self, files: Dict[str, dict], reuse: bool = False) -> None:
+        # Caller holds the lock
+        if reuse and self._header is not None:
+            header = dict(self._header, files=files)
+            arrays = self._arrays
+            texts = self._read_blob()
+        else:
+            header, arrays, texts = self._merge(files)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.index_path, _pack(header, arrays, texts))
+        self._remove_orphan_segments(files)
+        self._index_stat = None
+        self._load()
+
+    def _merge(self, files: Dict[str, dict]) -> Tuple[dict, Dict[str, array], bytes]:
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = array("I")
+        sources = array("I")
+        offsets = array("Q", [0])
+        texts = bytearray()
+        source_names = sorted(files)
+        for source_number, path in enumerate(source_names):
+            segment = json.loads(self._segment_path(files[path]["sha256"]).read_text(encoding="utf-8"))
+            for chunk in segment["chunks"]:
+                chunk_number = len(lengths)
+                for term, tf in chunk["terms"].items():
+                    postings.setdefault(term, []).append((chunk_number, min(tf, 0xFFFF)))
+                lengths.append(sum(chunk["terms"].values()))
+                sources.append(source_number)
+                texts += chunk["text"].encode("utf-8")
+                offsets.append(len(texts))
+
+        terms = {}
+        postings_ids = array("I")
+        postings_tfs = array("H")
+        for term in sorted(postings):
+            entries = postings[term]
+            terms[term] = [len(postings_ids), len(entries)]
+            postings_ids.extend(chunk for chunk, _ in entries)
+            postings_tfs.extend(tf for _, tf in entries)
+        header = {
+            "version": INDEX_VERSION,
+            "chunk_chars": self.chunk_chars,
+            "files": files,
+            "sources": source_names,
+            "terms": terms,
+            "chunks": len(lengths),
+            "avg_length": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        }
+        arrays = {
+            "postings_ids": postings_ids,
+            "postings_tfs": postings_tfs,
+            "chunk_lengths": lengths,
+            "chunk_sources": sources,
+            "text_offsets": offsets,
+        }
+        return header, arrays, bytes(texts)
+
+    def _remove_orphan_segments(self, files: Dict[str, dict]) -> None:
+        live = {entry["sha256"] for entry in files.values()}
+        for path in self.segment_dir.glob("*.json"):
+            if path.stem not in live:
+                path.unlink(missing_ok=True)
+
+    def _load(self) -> None:
+        # Caller holds the lock; reloads when another process replaced the file
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            self._header, self._arrays, self._index_stat = None, {}, None
+            return
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._index_stat:
+            return
+        header, arrays = _unpack(self.index_path)
+        if header is None or header.get("version") != INDEX_VERSION or header.get("chunk_chars") != self.chunk_chars:
+            # Unreadable or built with other settings: rebuild from scratch
+            self._header, self._arrays, self._index_stat = None, {}, None
+            return
+        self._header, self._arrays, self._index_stat = header, arrays, signature
+
+    def _read_text(self, chunk: int) -> str:
+        offsets = self._arrays["text_offsets"]
+        with open(self.index_path, "rb") as f:
+            f.seek(self._header["text_start"] + offsets[chunk])
+            return f.read(offsets[chunk + 1] - offsets[chunk]).decode("utf-8")
+
+    def _read_blob(self) -> bytes:
+        offsets = self._arrays["text_offsets"]
+        with open(self.index_path, "rb") as f:
+            f.seek(self._header["text_start"])
+            return f.read(offsets[-1])
+
+
+ARRAY_ORDER = ("postings_ids", "postings_tfs", "chunk_lengths", "chunk_sources", "text_offsets")
+
+
+def _pack(header: dict, arrays: Dict[str, array], texts: bytes) -> bytes:
+    """Serialize the index: magic, header length, JSON header, arrays, texts."""
+    layout = {}
+    blobs = []
+    position = 0
+    for name in ARRAY_ORDER:
+        data = arrays[name].tobytes()
+        layout[name] = [arrays[name].typecode, position, len(data)]
+        blobs.append(data)
+        position += len(data)
+    header = {key: value for key, value in header.items() if key not in ("layout", "text_start")}
+    header["layout"] = layout
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    text_start = len(MAGIC) + struct.calcsize(HEADER_STRUCT) + len(header_bytes) + position
+    return b"".join([MAGIC, struct.pack(HEADER_STRUCT, len(header_bytes), text_start), header_bytes, *blobs, texts])
+
+
+def _unpack(path: Path) -> Tuple[Optional[dict], Dict[str, array]]:
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None, {}
+        header_length, text_start = struct.unpack(HEADER_STRUCT, f.read(struct.calcsize(HEADER_STRUCT)))
+        header = json.loads(f.read(header_length))
+        arrays_start = f.tell()
+        arrays = {}
+        for name, (typecode, offset, length) in header["layout"].items():
+            f.seek(arrays_start + offset)
+            values = array(typecode)
+            values.frombytes(f.read(length))
+            arrays[name] = values
+    header["text_start"] = text_start
+    return header, arrays
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def format_context(hits: List[dict]) -> str:
+    """Render retrieved chunks for the task prompt."""
+    if not hits:
+        return "No relevant internal knowledge found."
+    return "\n\n".join(f"[{n}] {hit['source']}\n{hit['text']}" for n, hit in enumerate(hits, 1))
+
+
+_index: Optional[KnowledgeIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Return the process-wide knowledge index, or None when disabled.
+
+    Configured through ``KNOWLEDGE_ENABLED``, ``KNOWLEDGE_DIR``,
+    ``KNOWLEDGE_INDEX_DIR`` and ``KNOWLEDGE_CHUNK_CHARS``.
+    """
+    global _index
+    if os.getenv("KNOWLEDGE_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    with _index_lock:
+        if _index is None:
+            _index = KnowledgeIndex(
+                source_dir=os.getenv("KNOWLEDGE_DIR", "knowledge"),
+                index_dir=os.getenv("KNOWLEDGE_INDEX_DIR", ".cache/knowledge"),
+                chunk_chars=int(os.getenv("KNOWLEDGE_CHUNK_CHARS", "800")),
+            )
+        return _index
+
+
+def top_k() -> int:
+    """Chunks retrieved per problem (``KNOWLEDGE_TOP_K``, 4)."""
+    return int(os.getenv("KNOWLEDGE_TOP_K", "4"))
+
+
+def knowledge_version() -> str:
+    """Fingerprint of what :func:`knowledge_context` retrieves from, after a refresh.
+
+    Empty when the knowledge base is disabled. Results computed with another
+    version may rest on documents that have since changed.
+    """
+    index = get_knowledge_index()
+    if index is None:
+        return ""
+    index.refresh()
+    return f"{index.version()}:{top_k()}"
+
+
+def knowledge_context(problem_statement: str, k: Optional[int] = None) -> str:
+    """Return the top-k knowledge chunks for a problem, formatted for the prompt.
+
+    Args:
+        problem_statement: The query
+        k: Chunks to include (defaults to ``KNOWLEDGE_TOP_K``, 4)
+    """
+    index = get_knowledge_index()
+    if index is None:
+        return format_context([])
+    index.refresh()
+    return format_context(index.search(problem_statement, k or top_k()))
@@ -0,0 +1,125 @@
+"""Leases on rows that several processes share through one SQLite database.
+
+A process that takes a job, a run or a publish marks the row with its
+:data:`PROCESS_OWNER` and renews a heartbeat timestamp on it while it works
+(see :class:`Heartbeat`). Another process may only take the row over once the
+lease has expired: the heartbeat is older than ``LEASE_TIMEOUT_SECONDS``, or
+the owner is a process on this host that no longer exists. Rows of a live
+process, on this host or another one sharing the database, are left alone.
+
+The owner carries a random nonce besides host and PID: a restarted container
+usually gets the same hostname and PID 1 again, and must not mistake the rows
+of the process it replaces for its own.
+"""
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Callable, Iterable, Optional
+
+HOSTNAME = socket.gethostname()
+
+# Identifies rows leased by this process: host, PID and a nonce unique to this process
+PROCESS_OWNER = f"{HOSTNAME}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+
+
+def lease_seconds() -> float:
+    """Seconds without a heartbeat after which a lease expires (``LEASE_TIMEOUT_SECONDS``)."""
+    return float(os.getenv("LEASE_TIMEOUT_SECONDS", "60"))
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill terminates the process on Windows; rely on the heartbeat there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # EPERM: the process exists but belongs to another user
+        return True
+    return True
+
+
+def expired(owner: Optional[str], heartbeat_at: Optional[float], now: Optional[float] = None) -> bool:
+    """Whether a row leased to ``owner`` may be taken over by this process."""
+    if not owner or heartbeat_at is None:
+        return True
+    if (now or time.time()) - heartbeat_at > lease_seconds():
+        return True
+    if owner == PROCESS_OWNER:
+        return False
+    # host:pid:nonce (host:pid before the nonce was added)
+    host, _, rest = owner.partition(":")
+    pid = rest.partition(":")[0]
+    if host == HOSTNAME and pid.isdigit():
+        # Our own PID under another nonce is the process this one replaced
+        return int(pid) == os.getpid() or not _pid_alive(int(pid))
+    return False
+
+
+class Heartbeat:
+    """Renews the leases this process holds from a background thread.
+
+    Args:
+        renew: Called with the held keys and the current time; updates their heartbeat
+        name: Name of the heartbeat thread
+        interval: Seconds between renewals (a quarter of the lease timeout by default)
+
+    A callback set with :meth:`sweep` runs on every beat as well, so leases
+    that expire while this process is up are claimed without waiting for a
+    restart.
+    """
+
+    def __init__(self, renew: Callable[[Iterable[str], float], None], name: str = "lease-heartbeat",
+                 interval: Optional[float] = None):
+        self._renew = renew
+        self.name = name
+        self.interval = interval or lease_seconds() / 4
+        self._held = set()
+        self._sweep: Optional[Callable[[], object]] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def hold(self, key: str) -> None:
+        with self._lock:
+            self._held.add(key)
+            self._start()
+
+    def sweep(self, callback: Optional[Callable[[], object]]) -> None:
+        """Call ``callback`` on every beat (None stops it)."""
+        with self._lock:
+            self._sweep = callback
+            if callback is not None:
+                self._start()
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._beat, name=self.name, daemon=True)
+            self._thread.start()
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._held.discard(key)
+
+    def held(self) -> set:
+        with self._lock:
+            return set(self._held)
+
+    def _beat(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            keys = self.held()
+            if keys:
+                try:
+                    self._renew(keys, time.time())
+                except Exception as e:
+                    print(f"⚠️ Could not renew {len(keys)} lease(s) ({self.name}): {e}")
+            sweep = self._sweep
+            if sweep is not None:
+                try:
+                    sweep()
+                except Exception as e:
+                    print(f"⚠️ Could not claim expired leases ({self.name}): {e}")
@@ -0,0 +1,285 @@
+"""Response cache for individual LLM calls, below the crew layer.
+
+``train`` and ``test`` run the crew many times with the same inputs, so most
+LLM calls repeat exactly. :class:`CachedLLM` wraps an agent's LLM and stores
+each response in SQLite under a hash of the model, temperature, stop words,
+messages, tool schemas and response model. ``LLM_CACHE_MODE`` selects how the
+cache is used:
+
+* ``off`` (default): calls go straight to the model
+* ``readwrite``: serve hits, call the model and store on misses
+* ``record``: always call the model and overwrite the stored response
+* ``replay``: serve hits only; a miss raises :class:`LLMCacheMiss`, which
+  makes offline, deterministic test runs possible
+
+Which agents use the cache is decided per agent by ``AGENT_LLM_CACHE`` in
+``factory.py``, which both crew construction paths read. Calls that let the LLM execute tools
+itself (``available_functions``) are never cached, so tool side effects such
+as publishing a Google Doc still happen on replay. A call that follows a tool
+result specific to one run (a new document ID, say) misses the cache, so
+``replay`` only covers it when the tool returns the same output again.
+
+This module imports crewAI; import it lazily.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from crewai.llms.base_llm import BaseLLM
+
+from problem_solving_research_agent.events import LLM_CACHE_HIT, event_bus
+from problem_solving_research_agent.metrics import LLM_CACHE_LOOKUPS
+
+OFF = "off"
+READWRITE = "readwrite"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (OFF, READWRITE, RECORD, REPLAY)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT,
+    agent TEXT,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+"""
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in ``replay`` mode when a call has no recorded response."""
+
+
+def cache_mode() -> str:
+    """Mode selected by ``LLM_CACHE_MODE`` (``off`` by default)."""
+    mode = os.getenv("LLM_CACHE_MODE", OFF).strip().lower()
+    if mode not in MODES:
+        raise ValueError(f"LLM_CACHE_MODE must be one of {', '.join(MODES)}, got {mode!r}")
+    return mode
+
+
+def _jsonable(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def call_key(model: str, temperature: Optional[float], stop: list, messages: Any,
+             tools: Any = None, response_model: Any = None) -> str:
+    """Hash everything that determines an LLM call's response."""
+    schema = response_model.model_json_schema() if hasattr(response_model, "model_json_schema") else None
+    payload = json.dumps(
+        {
+            "model": model,
+            "temperature": temperature,
+            "stop": list(stop or ()),
+            "messages": _jsonable(messages),
+            "tools": _jsonable(tools),
+            "response_model": schema,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def encode_response(response: Any) -> Optional[str]:
+    """Serialize a call's return value, or None when it cannot be cached."""
+    if isinstance(response, str):
+        return json.dumps({"type": "text", "value": response})
+    if isinstance(response, list):
+        # Native tool calls; replayed as OpenAI-style dicts, which crewAI accepts
+        return json.dumps({"type": "tool_calls", "value": _jsonable(response)})
+    if hasattr(response, "model_dump_json"):
+        return json.dumps({"type": "model", "value": response.model_dump(mode="json")})
+    return None
+
+
+def decode_response(stored: str, response_model: Any = None) -> Any:
+    entry = json.loads(stored)
+    if entry["type"] == "model" and response_model is not None:
+        return response_model.model_validate(entry["value"])
+    return entry["value"]
+
+
+class LLMResponseStore:
+    """SQLite store of LLM responses with entry and size limits (LRU eviction).
+
+    Args:
+        path: Database file path
+        max_entries: Most responses kept
+        max_bytes: Total size of stored responses
+    """
+
+    def __init__(self, path: str = ".cache/llm_responses.sqlite3",
+                 max_entries: int = 10000, max_bytes: int = 256 * 1024 * 1024):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE responses SET used_at = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+                )
+        return row[0] if row else None
+
+    def put(self, key: str, response: str, model: Optional[str] = None, agent: Optional[str] = None) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, agent, response, size, created_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, agent, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size, hits = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0) FROM responses"
+            ).fetchone()
+        return {"entries": entries, "bytes": size, "hits": hits}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def _evict(self) -> None:
+        # Caller holds the lock
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY used_at").fetchall()
+        stale = []
+        for key, row_size in rows:
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            stale.append((key,))
+            entries -= 1
+            size -= row_size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+
+class CachedLLM(BaseLLM):
+    """Wraps an agent's LLM with the response store.
+
+    Args:
+        inner: The LLM that answers cache misses
+        store: Where responses are kept
+        mode: One of :data:`MODES` (``off`` passes every call through)
+        agent: Agent name, recorded with each response and used in metrics
+    """
+
+    def __init__(self, inner: BaseLLM, store: LLMResponseStore, mode: str = READWRITE, agent: str = ""):
+        super().__init__(model=inner.model, temperature=inner.temperature, stop=list(inner.stop or []))
+        # Plain attributes: BaseLLM is a pydantic model in newer crewAI releases
+        object.__setattr__(self, "inner", inner)
+        object.__setattr__(self, "store", store)
+        object.__setattr__(self, "mode", mode)
+        object.__setattr__(self, "agent", agent)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        if self.mode == OFF or available_functions:
+            return self._call_inner(messages, tools, callbacks, available_functions, **kwargs)
+        response_model = kwargs.get("response_model")
+        key = call_key(self.model, self.temperature, self._stop(), messages, tools, response_model)
+        if self.mode in (READWRITE, REPLAY):
+            stored = self.store.get(key)
+            if stored is not None:
+                LLM_CACHE_LOOKUPS.inc(labels={"agent": self.agent, "result": "hit"})
+                event_bus.publish(LLM_CACHE_HIT, agent=self.agent, model=self.model)
+                return decode_response(stored, response_model)
+            LLM_CACHE_LOOKUPS.inc(labels={"agent": self.agent, "result": "miss"})
+            if self.mode == REPLAY:
+                raise LLMCacheMiss(f"No recorded response for {self.agent or self.model} call {key[:12]}")
+        response = self._call_inner(messages, tools, callbacks, available_functions, **kwargs)
+        encoded = encode_response(response)
+        if encoded is not None:
+            self.store.put(key, encoded, model=self.model, agent=self.agent)
+        return response
+
+    def _stop(self) -> list:
+        # Newer crewAI sets stop words per call through a context override
+        return list(getattr(self, "stop_sequences", None) or self.stop or [])
+
+    def _call_inner(self, messages, tools, callbacks, available_functions, **kwargs):
+        with contextlib.ExitStack() as stack:
+            # Forward call-scoped overrides made for this wrapper to the wrapped LLM
+            try:
+                from crewai.llms.base_llm import call_stop_override, call_stream_override
+            except ImportError:
+                pass
+            else:
+                stack.enter_context(call_stop_override(self.inner, self._stop()))
+                stream = self._effective_stream()
+                if stream is not None:
+                    stack.enter_context(call_stream_override(self.inner, stream))
+            return self.inner.call(
+                messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs
+            )
+
+    def supports_function_calling(self) -> bool:
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self) -> bool:
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self) -> int:
+        return self.inner.get_context_window_size()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+
+_store: Optional[LLMResponseStore] = None
+_store_lock = threading.Lock()
+
+
+def get_response_store() -> LLMResponseStore:
+    """Return the process-wide response store.
+
+    Configured through ``LLM_CACHE_DB_PATH``, ``LLM_CACHE_MAX_ENTRIES`` and
+    ``LLM_CACHE_MAX_BYTES``.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LLMResponseStore(
+                os.getenv("LLM_CACHE_DB_PATH", ".cache/llm_responses.sqlite3"),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            )
+        return _store
+
+
+def cached_llm(agent_name: str, inner: BaseLLM) -> BaseLLM:
+    """Wrap ``inner`` for an agent when ``LLM_CACHE_MODE`` is not ``off``."""
+    mode = cache_mode()
+    if mode == OFF:
+        return inner
+    return CachedLLM(inner, get_response_store(), mode=mode, agent=agent_name)
@@ -1,12 +1,74 @@
 #!/usr/bin/env python
+import argparse
+import os
 import sys
-from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew
+import time
+from problem_solving_research_agent.batch import run_batch
+from problem_solving_research_agent.checkpoints import get_checkpoint_store
+from problem_solving_research_agent.events import LLM_CHUNK, LLM_COMPLETED, LLM_FAILED, RunTimings, event_bus
+from problem_solving_research_agent.knowledge import knowledge_context
+from problem_solving_research_agent.metrics import start_metrics_server
+from problem_solving_research_agent.rate_limit import BATCH, priority_context
+from problem_solving_research_agent.runner import pipeline_mode, result_cache, run_problem
+from problem_solving_research_agent.streaming import AnswerFilter, streaming_enabled
 
 # This main file is intended to be a way for your to run your
 # crew locally, so refrain from adding unnecessary logic into this file.
 # Replace with inputs you want to test with, it will automatically
 # interpolate any tasks and agents information
 
+class AnswerPrinter:
+    """Prints the agents' answer tokens to stdout as they stream in."""
+
+    def __init__(self):
+        self.filter = AnswerFilter()
+        self.printed = False
+
+    def __call__(self, event):
+        if event.type == LLM_CHUNK:
+            text = self.filter.feed(event.data.get("call_id"), event.data.get("chunk") or "")
+        elif event.type in (LLM_COMPLETED, LLM_FAILED):
+            text = self.filter.finish(event.data.get("call_id"))
+        else:
+            return
+        if text:
+            self.printed = True
+            print(text, end="", flush=True)
+
+
+def report_publishes(result):
+    """
+    Wait for the Google Docs the run queued and print their URLs.
+    """
+    from problem_solving_research_agent.tools.publish_outbox import FINISHED, describe, get_publish_outbox, handles
+
+    keys = handles(result)
+    outbox = get_publish_outbox() if keys else None
+    if outbox is None:
+        return
+    deadline = time.monotonic() + float(os.getenv("PUBLISH_WAIT_SECONDS", "120"))
+    print("\n📮 Google Docs:")
+    unfinished = False
+    for key in keys:
+        job = outbox.wait(key, max(deadline - time.monotonic(), 0))
+        if job is not None:
+            print(describe(job))
+            unfinished = unfinished or job['status'] not in FINISHED
+    if unfinished:
+        print("Documents still queued are published the next time the app or CLI starts.")
+
+def flush_publishes():
+    """
+    Wait for the Google Docs this process queued, so exiting does not stop their workers.
+    """
+    from problem_solving_research_agent.tools import publish_outbox
+
+    unfinished = publish_outbox.flush_publishes(float(os.getenv("PUBLISH_WAIT_SECONDS", "120")))
+    if unfinished:
+        print(f"\n📮 {len(unfinished)} Google Doc(s) still queued; they are published the next time the app or CLI starts:")
+        for job in unfinished:
+            print(publish_outbox.describe(job))
+
 def run():
     """
     Run the crew.
@@ -23,10 +85,35 @@ def run():
     print(f"\n🚀 Starting research for: {problem_statement}")
     print("-" * 60)
     
-    inputs = {
-        'problem_statement': problem_statement
-    }
-    ProblemSolvingResearchAgentCrew().crew().kickoff(inputs=inputs)
+    timings = RunTimings()
+    printer = AnswerPrinter() if streaming_enabled() else None
+    unsubscribers = [event_bus.subscribe(timings)]
+    if printer is not None:
+        unsubscribers.append(event_bus.subscribe(printer))
+    try:
+        result = run_problem(problem_statement)
+    finally:
+        for unsubscribe in unsubscribers:
+            unsubscribe()
+    if printer is None or not printer.printed or pipeline_mode() == "fast":
+        # Fast mode templates the document locally, so it never streamed
+        print(result)
+    else:
+        print()
+
+    report_publishes(result)
+
+    summary = timings.summary()
+    if summary:
+        print(f"\n⏱️ Where the time went:\n{summary}")
+
+    cache = result_cache()
+    if cache is not None:
+        stats = cache.stats()
+        print(
+            f"\n🗄️ Result cache: {stats['memory_hits'] + stats['disk_hits']} hits, "
+            f"{stats['misses']} misses"
+        )
 
 
 def train():
@@ -38,18 +125,27 @@ def train():
         problem_statement = 'sample_value'
     
     inputs = {
-        'problem_statement': problem_statement
+        'problem_statement': problem_statement,
+        'knowledge_context': knowledge_context(problem_statement),
     }
+    # Iterations repeat the same prompts: serve them from the LLM response cache
+    os.environ.setdefault("LLM_CACHE_MODE", "readwrite")
+    from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew
     try:
-        ProblemSolvingResearchAgentCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
+        # Yield the shared OpenAI rate limit to interactive runs
+        with priority_context(BATCH):
+            ProblemSolvingResearchAgentCrew().crew().train(n_iterations=int(sys.argv[1]), filename=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while training the crew: {e}")
+    finally:
+        flush_publishes()
 
 def replay():
     """
     Replay the crew execution from a specific task.
     """
+    from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew
     try:
         ProblemSolvingResearchAgentCrew().crew().replay(task_id=sys.argv[1])
 
@@ -65,13 +161,139 @@ def test():
         problem_statement = 'sample_value'
     
     inputs = {
-        'problem_statement': problem_statement
+        'problem_statement': problem_statement,
+        'knowledge_context': knowledge_context(problem_statement),
     }
+    # Iterations repeat the same prompts: serve them from the LLM response cache
+    os.environ.setdefault("LLM_CACHE_MODE", "readwrite")
+    from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew
     try:
-        ProblemSolvingResearchAgentCrew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
+        with priority_context(BATCH):
+            ProblemSolvingResearchAgentCrew().crew().test(n_iterations=int(sys.argv[1]), openai_model_name=sys.argv[2], inputs=inputs)
 
     except Exception as e:
         raise Exception(f"An error occurred while testing the crew: {e}")
+    finally:
+        flush_publishes()
+
+def batch():
+    """
+    Run every problem statement in a JSONL file with bounded concurrency.
+    """
+    args = sys.argv[1:]
+    if args and args[0] == "batch":
+        args = args[1:]
+    parser = argparse.ArgumentParser(prog="batch", description="Run problem statements from a JSONL file.")
+    parser.add_argument("input", help="JSONL file with one problem statement per line")
+    parser.add_argument("output", nargs="?", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=4, help="Crews to run concurrently")
+    parser.add_argument("--no-resume", action="store_true", help="Re-run IDs that already succeeded")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the result cache")
+    options = parser.parse_args(args)
+
+    start_metrics_server()
+    output = options.output or f"{options.input.rsplit('.', 1)[0]}.results.jsonl"
+    print(f"📦 Running batch {options.input} -> {output} with {options.workers} workers")
+
+    def report(record):
+        icon = "✅" if record['status'] == 'ok' else "❌"
+        print(f"{icon} {record['id']} ({record['duration_s']}s)")
+
+    summary = run_batch(
+        options.input,
+        output,
+        workers=options.workers,
+        resume=not options.no_resume,
+        use_cache=not options.no_cache,
+        on_result=report,
+    )
+    print(f"\n📊 Done: {summary['ok']} ok, {summary['error']} failed, {summary['skipped']} skipped")
+    flush_publishes()
+
+def resume():
+    """
+    Resume a checkpointed run from its first unfinished task.
+    """
+    args = sys.argv[1:]
+    if args and args[0] == "resume":
+        args = args[1:]
+    if not args:
+        print("Usage: main.py resume <run_id>")
+        sys.exit(1)
+
+    store = get_checkpoint_store()
+    run = store.get_run(args[0]) if store is not None else None
+    if run is None:
+        print(f"❌ No checkpointed run with ID {args[0]}")
+        sys.exit(1)
+
+    done = sorted(store.completed_tasks(run['run_id']))
+    print(f"♻️ Resuming run {run['run_id']} ({run['status']}); finished tasks: {', '.join(done) or 'none'}")
+    print(run_problem(run['inputs']['problem_statement'], use_cache=False, checkpoint_run_id=run['run_id']))
+
+def serve():
+    """
+    Serve the headless HTTP API (see api.py).
+    """
+    args = sys.argv[1:]
+    if args and args[0] == "serve":
+        args = args[1:]
+    parser = argparse.ArgumentParser(prog="serve", description="Serve the HTTP API for submitting problems.")
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    options = parser.parse_args(args)
+
+    from problem_solving_research_agent.api import serve as serve_api
+
+    start_metrics_server()
+    print(f"🌐 Serving the API on http://{options.host}:{options.port}")
+    serve_api(options.host, options.port)
+
+def export():
+    """
+    Render stored results to PDF (and markdown) files in a process pool.
+    """
+    args = sys.argv[1:]
+    if args and args[0] == "export":
+        args = args[1:]
+    parser = argparse.ArgumentParser(
+        prog="export", description="Export stored markdown results to PDF and markdown files."
+    )
+    parser.add_argument("source", nargs="?", default=os.getenv("OUTPUT_STORE_DIR", "output"),
+                        help="Directory of .md files, or an output store directory or index.sqlite3")
+    parser.add_argument("output", nargs="?", default="exports", help="Directory to write the exported files to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--format", default="pdf", help="Comma-separated formats: pdf, md")
+    parser.add_argument("--max-tasks-per-child", type=int, default=50,
+                        help="Documents a worker renders before it is replaced (0 for never)")
+    parser.add_argument("--force", action="store_true", help="Re-export documents that are up to date")
+    options = parser.parse_args(args)
+
+    from problem_solving_research_agent.export import run_export
+
+    print(f"📤 Exporting {options.source} -> {options.output} with {options.workers} workers")
+
+    def report(record):
+        if record['status'] == 'skipped':
+            return
+        icon = "✅" if record['status'] == 'ok' else "❌"
+        detail = f"{record['seconds']}s" if record['status'] == 'ok' else record['error']
+        print(f"{icon} [{record['done']}/{record['total']}] {record['name']} ({detail})")
+
+    summary = run_export(
+        options.source,
+        options.output,
+        formats=[part.strip() for part in options.format.split(",") if part.strip()],
+        workers=options.workers,
+        max_tasks_per_child=options.max_tasks_per_child,
+        force=options.force,
+        on_result=report,
+    )
+    print(
+        f"\n📊 Done: {summary['ok']} exported, {summary['error']} failed, {summary['skipped']} up to date; "
+        f"{summary['docs_per_second']} docs/s with {summary['workers']} workers on {summary['cpus']} CPUs"
+    )
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -87,6 +309,14 @@ if __name__ == "__main__":
         replay()
     elif command == "test":
         test()
+    elif command == "batch":
+        batch()
+    elif command == "resume":
+        resume()
+    elif command == "serve":
+        serve()
+    elif command == "export":
+        export()
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
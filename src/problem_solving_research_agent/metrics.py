@@ -0,0 +1,387 @@
+"""Low-overhead metrics exported in the Prometheus text format.
+
+Counters, gauges and histograms aggregate per thread: each thread updates its
+own shard without taking a lock, and shards are only summed when the registry
+is scraped. Shards of threads that have exited are folded into one base shard
+(on the next scrape or new thread), so threads started per run do not pile
+up. Set ``METRICS_PORT`` and call :func:`start_metrics_server` to serve
+``/metrics`` on a local HTTP port.
+
+Crew-level metrics (kickoffs, task durations, LLM calls, token usage) are fed
+from the event bus by :func:`install_event_metrics`; Google Docs API calls and
+PDF renders are timed where they happen.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from problem_solving_research_agent import events
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    """Base class holding one shard of values per live thread."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, dict]] = []
+        # Values of threads that have exited
+        self._base: dict = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._prune()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _prune(self) -> None:
+        # Caller holds the shards lock. A thread that exited writes no more, so
+        # its shard can be merged without racing its owner
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._merge(self._base, shard)
+        self._shards = live
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        raise NotImplementedError
+
+    def _key(self, labels: Optional[dict]) -> Tuple:
+        if not self.labelnames:
+            return ()
+        labels = labels or {}
+        # A missing value is an empty label, never the string "None"
+        return tuple("" if labels.get(name) is None else str(labels[name]) for name in self.labelnames)
+
+    def _snapshot(self) -> List[dict]:
+        with self._shards_lock:
+            self._prune()
+            return [dict(self._base)] + [dict(shard) for _, shard in self._shards]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, labels: Optional[dict] = None) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, value in shard.items():
+            into[key] = into.get(key, 0) + value
+
+    def collect(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshot():
+            for key, value in shard.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self.collect().items())]
+
+
+class Gauge(Counter):
+    """Up/down gauge; increments and decrements from any thread sum correctly."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, labels: Optional[dict] = None) -> None:
+        self.inc(-amount, labels)
+
+    @contextmanager
+    def track(self, labels: Optional[dict] = None):
+        """Count the enclosed block as in flight."""
+        self.inc(1, labels)
+        try:
+            yield
+        finally:
+            self.dec(1, labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: Optional[dict] = None) -> None:
+        shard = self._shard()
+        key = self._key(labels)
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def _merge(self, into: dict, shard: dict) -> None:
+        for key, (counts, total, count) in shard.items():
+            # New lists: a snapshot handed out earlier may still be reading the old ones
+            previous = into.get(key) or [[0] * (len(self.buckets) + 1), 0.0, 0]
+            into[key] = [[a + b for a, b in zip(previous[0], counts)], previous[1] + total, previous[2] + count]
+
+    @contextmanager
+    def time(self, labels: Optional[dict] = None):
+        """Observe the wall-clock duration of the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, labels)
+
+    def render(self) -> List[str]:
+        merged: Dict[Tuple, list] = {}
+        for shard in self._snapshot():
+            for key, (counts, total, count) in shard.items():
+                entry = merged.setdefault(key, [[0] * (len(self.buckets) + 1), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+        lines = []
+        for key, (counts, total, count) in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+CREW_KICKOFFS = registry.counter(
+    "crew_kickoffs_total", "Crew runs by outcome", ("status",))
+CREW_KICKOFF_SECONDS = registry.histogram(
+    "crew_kickoff_duration_seconds", "End-to-end crew run duration", ("status",))
+CREW_RUNS_IN_FLIGHT = registry.gauge(
+    "crew_runs_in_flight", "Crew runs currently executing")
+RESULT_CACHE_HITS = registry.counter(
+    "crew_result_cache_hits_total", "Runs served from the result cache")
+TASK_SECONDS = registry.histogram(
+    "crew_task_duration_seconds", "Task duration by task and outcome", ("task", "status"))
+LLM_CALLS = registry.counter(
+    "llm_calls_total", "LLM calls by model and outcome", ("model", "status"))
+LLM_SECONDS = registry.histogram(
+    "llm_call_duration_seconds", "LLM call latency by model", ("model",))
+LLM_TOKENS = registry.counter(
+    "llm_tokens_total", "Tokens used by crew runs", ("kind",))
+TOOL_SECONDS = registry.histogram(
+    "crew_tool_duration_seconds", "Tool call duration by tool and outcome", ("tool", "status"))
+GOOGLE_API_CALLS = registry.counter(
+    "google_api_calls_total", "Google Docs/Drive API calls", ("operation", "status"))
+GOOGLE_API_SECONDS = registry.histogram(
+    "google_api_call_duration_seconds", "Google Docs/Drive API latency", ("operation",))
+GOOGLE_API_IN_FLIGHT = registry.gauge(
+    "google_api_calls_in_flight", "Google Docs/Drive API calls currently executing")
+PDF_RENDER_SECONDS = registry.histogram(
+    "markdown_to_pdf_duration_seconds", "markdown_to_pdf render time", (),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+PDF_RENDERS_IN_FLIGHT = registry.gauge(
+    "markdown_to_pdf_in_flight", "PDF renders currently executing")
+ARTIFACT_LOOKUPS = registry.counter(
+    "artifact_cache_lookups_total", "Download artifact lookups by kind and tier", ("kind", "result"))
+LLM_CACHE_LOOKUPS = registry.counter(
+    "llm_cache_lookups_total", "LLM response cache lookups by agent and result", ("agent", "result"))
+CONTEXT_TOKENS = registry.counter(
+    "task_context_tokens_total", "Task output tokens before and after the context budget", ("kind",))
+LLM_RATE_LIMIT_QUEUE = registry.gauge(
+    "llm_rate_limit_queue_depth", "LLM requests waiting for the rate limiter", ("priority",))
+LLM_RATE_LIMIT_WAIT_SECONDS = registry.histogram(
+    "llm_rate_limit_wait_seconds", "Time LLM requests waited for the rate limiter", ("priority",))
+LLM_RATE_LIMITED = registry.counter(
+    "llm_rate_limited_total", "LLM responses rejected with HTTP 429")
+LLM_ROUTED_CALLS = registry.counter(
+    "llm_routed_calls_total", "Routed LLM calls by route, model and outcome", ("route", "model", "result"))
+SINGLEFLIGHT_REQUESTS = registry.counter(
+    "singleflight_requests_total", "Submissions that started a run or joined one in flight", ("flight", "role"))
+API_SUBMISSIONS = registry.counter(
+    "api_submissions_total", "Job submissions to the HTTP API by outcome", ("result",))
+PUBLISH_OUTBOX_JOBS = registry.counter(
+    "publish_outbox_jobs_total", "Google Docs publish jobs by outcome", ("result",))
+OUTPUT_STORE_WRITES = registry.counter(
+    "output_store_writes_total", "Documents saved to the output store by outcome", ("result",))
+OUTPUT_STORE_PENDING = registry.gauge(
+    "output_store_pending_writes", "Documents queued for write-behind to the output store")
+
+
+@contextmanager
+def time_google_call(operation: str):
+    """Count and time one Google API call."""
+    started = time.perf_counter()
+    status = "ok"
+    GOOGLE_API_IN_FLIGHT.inc()
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        GOOGLE_API_IN_FLIGHT.dec()
+        GOOGLE_API_SECONDS.observe(time.perf_counter() - started, {"operation": operation})
+        GOOGLE_API_CALLS.inc(labels={"operation": operation, "status": status})
+
+
+def _record_event(event: events.Event) -> None:
+    data = event.data
+    if event.type == events.RUN_STARTED:
+        CREW_RUNS_IN_FLIGHT.inc()
+    elif event.type in (events.RUN_COMPLETED, events.RUN_FAILED):
+        status = "ok" if event.type == events.RUN_COMPLETED else "error"
+        CREW_RUNS_IN_FLIGHT.dec()
+        CREW_KICKOFFS.inc(labels={"status": status})
+        if data.get("duration_s") is not None:
+            CREW_KICKOFF_SECONDS.observe(data["duration_s"], {"status": status})
+    elif event.type == events.RUN_CACHE_HIT:
+        RESULT_CACHE_HITS.inc()
+        CREW_KICKOFFS.inc(labels={"status": "cached"})
+    elif event.type in (events.TASK_COMPLETED, events.TASK_FAILED):
+        if data.get("duration_s") is not None:
+            status = "ok" if event.type == events.TASK_COMPLETED else "error"
+            TASK_SECONDS.observe(data["duration_s"], {"task": data.get("task"), "status": status})
+    elif event.type in (events.LLM_COMPLETED, events.LLM_FAILED):
+        status = "ok" if event.type == events.LLM_COMPLETED else "error"
+        model = data.get("model") or "unknown"
+        LLM_CALLS.inc(labels={"model": model, "status": status})
+        if data.get("duration_s") is not None:
+            LLM_SECONDS.observe(data["duration_s"], {"model": model})
+    elif event.type in (events.TOOL_COMPLETED, events.TOOL_FAILED):
+        if data.get("duration_s") is not None:
+            status = "ok" if event.type == events.TOOL_COMPLETED else "error"
+            TOOL_SECONDS.observe(data["duration_s"], {"tool": data.get("tool"), "status": status})
+    elif event.type == events.CONTEXT_PREPARED:
+        CONTEXT_TOKENS.inc(data.get("source_tokens") or 0, {"kind": "source"})
+        CONTEXT_TOKENS.inc(data.get("context_tokens") or 0, {"kind": "passed"})
+    elif event.type == events.TOKEN_USAGE:
+        LLM_TOKENS.inc(data.get("prompt_tokens") or 0, {"kind": "prompt"})
+        LLM_TOKENS.inc(data.get("completion_tokens") or 0, {"kind": "completion"})
+
+
+_events_installed = False
+_install_lock = threading.Lock()
+
+
+def install_event_metrics() -> None:
+    """Subscribe the crew metrics to the event bus (idempotent)."""
+    global _events_installed
+    with _install_lock:
+        if not _events_installed:
+            events.event_bus.subscribe(_record_event)
+            _events_installed = True
+
+
+_server = None
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1"):
+    """
+    Serve ``/metrics`` on a background thread (once per process).
+
+    Args:
+        port: Port to listen on; defaults to ``METRICS_PORT`` (disabled when unset)
+        host: Interface to bind, ``METRICS_HOST`` overrides the default
+
+    Returns:
+        The running server, or None if metrics serving is disabled
+    """
+    global _server
+    with _install_lock:
+        if _server is not None:
+            return _server
+        if port is None:
+            if not os.getenv("METRICS_PORT"):
+                return None
+            port = int(os.getenv("METRICS_PORT"))
+
+        # http.server is only imported when metrics are actually served
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            _server = ThreadingHTTPServer((os.getenv("METRICS_HOST", host), port), MetricsHandler)
+        except OSError as e:
+            print(f"⚠️ Metrics server not started on port {port}: {e}")
+            return None
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
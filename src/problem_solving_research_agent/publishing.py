@@ -0,0 +1,118 @@
+"""Fast publish mode: template the research output locally and publish it.
+
+In the ``fast`` pipeline the research agent returns a :class:`ResearchReport`
+with the document's sections, and :func:`publish_report` fills
+``config/report_template.md`` and calls the Google Docs tool directly. This
+replaces the ``document_publisher`` agent, which spent a full LLM round trip
+reformatting the research into the same fixed sections.
+"""
+import re
+import time
+from pathlib import Path
+from string import Template
+from typing import List, Union
+
+from pydantic import BaseModel, Field
+
+from problem_solving_research_agent.events import TOOL_COMPLETED, TOOL_FAILED, TOOL_STARTED, event_bus
+
+TEMPLATE_PATH = Path(__file__).parent / "config" / "report_template.md"
+PUBLISH_TOOL = "problem_solving_research_agent.tools.google_docs:GoogleDocsCreatorTool"
+PUBLISHER = "Fast publish"
+# Body of a template section the report left empty
+EMPTY_SECTION = "_None._"
+
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+class TimelinePhase(BaseModel):
+    """One phase of the implementation timeline."""
+    phase: str = Field(..., description="Name of the phase")
+    duration: str = Field(..., description="Expected duration, e.g. '2 weeks'")
+    milestones: List[str] = Field(default_factory=list, description="Milestones that complete the phase")
+
+
+class ResearchReport(BaseModel):
+    """Structured research output, one field per document section."""
+    title: str = Field(..., description="Clean, descriptive document title based on the problem statement")
+    executive_summary: str = Field(..., description="Problem overview and solution highlight (markdown)")
+    problem_analysis: str = Field(..., description="Detailed breakdown of the problem (markdown)")
+    research_summary: str = Field(..., description="Key research findings with sources (markdown)")
+    solution_steps: List[str] = Field(..., description="Step-by-step implementation actions, in order")
+    technical_recommendations: List[str] = Field(default_factory=list, description="Specific tools and approaches")
+    implementation_timeline: List[TimelinePhase] = Field(default_factory=list, description="Suggested phases")
+    resources: List[str] = Field(default_factory=list, description="Links and references (markdown links)")
+    next_steps: List[str] = Field(default_factory=list, description="Actionable items to begin implementation")
+
+
+def load_report(value: Union[ResearchReport, str]) -> ResearchReport:
+    """Return a report from a model instance or its JSON (optionally fenced)."""
+    if isinstance(value, ResearchReport):
+        return value
+    match = _FENCE_RE.match(value)
+    return ResearchReport.model_validate_json(match.group(1) if match else value)
+
+
+def bullet_list(items: List[str], empty: str = "") -> str:
+    """Markdown bullet list of ``items``, or ``empty`` when there are none."""
+    return "\n".join(f"- {item}" for item in items) or empty
+
+
+def _numbered(items: List[str]) -> str:
+    return "\n".join(f"{n}. {item}" for n, item in enumerate(items, 1)) or EMPTY_SECTION
+
+
+def _timeline(phases: List[TimelinePhase]) -> str:
+    if not phases:
+        return EMPTY_SECTION
+    lines = []
+    for phase in phases:
+        lines.append(f"- **{phase.phase}** ({phase.duration})")
+        lines.extend(f"\t- {milestone}" for milestone in phase.milestones)
+    return "\n".join(lines)
+
+
+def render_report(report: ResearchReport) -> str:
+    """Fill the report template with a report's sections."""
+    template = Template(TEMPLATE_PATH.read_text(encoding="utf-8"))
+    return template.safe_substitute(
+        title=report.title,
+        executive_summary=report.executive_summary.strip(),
+        problem_analysis=report.problem_analysis.strip(),
+        research_summary=report.research_summary.strip(),
+        solution_steps=_numbered(report.solution_steps),
+        technical_recommendations=bullet_list(report.technical_recommendations, EMPTY_SECTION),
+        implementation_timeline=_timeline(report.implementation_timeline),
+        resources=bullet_list(report.resources, EMPTY_SECTION),
+        next_steps=bullet_list(report.next_steps, EMPTY_SECTION),
+    )
+
+
+def publish_report(report: Union[ResearchReport, str]) -> str:
+    """
+    Render a report and publish it with the Google Docs tool.
+
+    Args:
+        report: The research task's structured output (model or JSON)
+
+    Returns:
+        The rendered document followed by the tool's publish status
+    """
+    from problem_solving_research_agent.factory import shared_tool
+
+    report = load_report(report)
+    document = render_report(report)
+    tool = shared_tool(PUBLISH_TOOL)
+
+    started = time.perf_counter()
+    event_bus.publish(TOOL_STARTED, tool=tool.name, agent=PUBLISHER)
+    try:
+        status = tool.run(title=report.title, content=document)
+    except Exception as e:
+        event_bus.publish(TOOL_FAILED, tool=tool.name, agent=PUBLISHER,
+                          duration_s=round(time.perf_counter() - started, 4), error=str(e))
+        raise
+    event_bus.publish(TOOL_COMPLETED, tool=tool.name, agent=PUBLISHER,
+                      duration_s=round(time.perf_counter() - started, 4))
+    return f"{document}\n\n---\n\n{str(status).strip()}"
+
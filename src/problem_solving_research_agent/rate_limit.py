@@ -0,0 +1,326 @@
+"""Process-wide rate limiting and priority scheduling of OpenAI requests.
+
+Every crew in the process shares one :class:`RateLimiter`. Before an HTTP
+request to the API is sent it waits for
+
+* a request from the requests-per-minute bucket (``LLM_RATE_LIMIT_RPM``) and
+  its estimated tokens from the tokens-per-minute bucket
+  (``LLM_RATE_LIMIT_TPM``); 0 leaves a bucket unlimited,
+* its turn: waiting requests are served by priority class, interactive (UI
+  jobs, CLI runs) ahead of batch (batch files, ``train``/``test``), then in
+  arrival order. Code selects its class with :func:`priority_context`.
+
+Responses adapt the limiter: the ``x-ratelimit-remaining-*`` headers lower
+the buckets to what the API reports, an exhausted limit pauses every caller
+until its ``x-ratelimit-reset-*`` time, and a 429 pauses them for its
+``retry-after`` or an exponential backoff that decays again on success. The
+client's own retries of a 429 go through the limiter too, so they wait out
+the pause instead of adding to the burst.
+
+The limiter is attached to crewAI's native OpenAI client as a transport
+interceptor (crewAI 1.x); older releases run without it.
+"""
+import contextvars
+import functools
+import heapq
+import itertools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Mapping, Optional
+
+from problem_solving_research_agent.metrics import (
+    LLM_RATE_LIMITED,
+    LLM_RATE_LIMIT_QUEUE,
+    LLM_RATE_LIMIT_WAIT_SECONDS,
+)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+# Lower rank is served first
+PRIORITIES = {INTERACTIVE: 0, BATCH: 1}
+# Completion tokens reserved for a request that sets no max_tokens
+COMPLETION_TOKEN_ESTIMATE = 1000
+
+current_priority: contextvars.ContextVar[str] = contextvars.ContextVar("current_priority", default=INTERACTIVE)
+# When the request in flight on this thread (or task) left the limiter
+_sent_at: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("rate_limit_sent_at", default=None)
+
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@contextmanager
+def priority_context(priority: str):
+    """Send the LLM requests made inside the block with ``priority``."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {', '.join(PRIORITIES)}, got {priority!r}")
+    token = current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        current_priority.reset(token)
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in an OpenAI reset header ("1s", "6m0s", "20ms") or a plain number."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds a 429 asks the client to wait, if the response says."""
+    milliseconds = headers.get("retry-after-ms")
+    if milliseconds:
+        try:
+            return float(milliseconds) / 1000
+        except ValueError:
+            pass
+    return parse_duration(headers.get("retry-after"))
+
+
+def estimate_tokens(body: bytes) -> int:
+    """Tokens a chat completions request counts against the limit (estimated)."""
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return len(body) // 4
+    completion = payload.get("max_completion_tokens") or payload.get("max_tokens") or COMPLETION_TOKEN_ESTIMATE
+    prompt = len(json.dumps(payload.get("messages") or payload.get("input") or ""))
+    return prompt // 4 + int(completion)
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, holding at most ``burst_seconds`` worth.
+
+    APIs enforce per-minute limits over shorter windows, so the bucket only
+    allows short bursts. A bucket with ``per_minute`` 0 is unlimited.
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 1.0):
+        self.per_minute = per_minute
+        self.capacity = max(per_minute * burst_seconds / 60, 1.0)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` can be taken (at most a full bucket is ever needed)."""
+        if not self.per_minute:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) * 60 / self.per_minute
+
+    def take(self, amount: float, now: float) -> None:
+        if self.per_minute:
+            self._refill(now)
+            # May go negative for a request larger than the bucket; later callers wait it off
+            self.level -= amount
+
+    def lower_to(self, level: float, now: float) -> None:
+        """Align with the remaining allowance the API reports."""
+        if self.per_minute:
+            self._refill(now)
+            self.level = min(self.level, level)
+
+
+class RateLimiter:
+    """Token buckets with a priority queue and adaptive backoff.
+
+    Args:
+        requests_per_minute: Request budget (0 for unlimited)
+        tokens_per_minute: Token budget (0 for unlimited)
+        burst_seconds: Seconds of budget that may be spent at once
+        max_backoff: Longest pause after repeated 429s without ``retry-after``
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 burst_seconds: float = 1.0, max_backoff: float = 60.0):
+        self.requests = TokenBucket(requests_per_minute, burst_seconds)
+        self.tokens = TokenBucket(tokens_per_minute, burst_seconds)
+        self.max_backoff = max_backoff
+        self._condition = threading.Condition()
+        self._queue: list = []
+        self._tickets = itertools.count()
+        self._paused_until = 0.0
+        self._backoff = 0.0
+        self._stats = {"requests": 0, "waited": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "rate_limited": 0}
+
+    def acquire(self, tokens: int = 0, priority: Optional[str] = None) -> float:
+        """Wait until a request of ``tokens`` may be sent; return the seconds waited.
+
+        Args:
+            tokens: Estimated tokens the request counts against the limit
+            priority: Priority class (defaults to the current :func:`priority_context`)
+        """
+        priority = priority or current_priority.get()
+        ticket = (PRIORITIES[priority], next(self._tickets))
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            LLM_RATE_LIMIT_QUEUE.inc(labels={"priority": priority})
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = None
+                    if self._queue[0] == ticket:
+                        delay = max(
+                            self._paused_until - now,
+                            self.requests.wait_time(1, now),
+                            self.tokens.wait_time(tokens, now),
+                        )
+                        if delay <= 0:
+                            self.requests.take(1, now)
+                            self.tokens.take(tokens, now)
+                            break
+                    # Only the head of the queue times its wait; the rest wait their turn
+                    self._condition.wait(delay)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                LLM_RATE_LIMIT_QUEUE.dec(labels={"priority": priority})
+                self._condition.notify_all()
+            waited = time.monotonic() - started
+            self._stats["requests"] += 1
+            if waited > 0.001:
+                self._stats["waited"] += 1
+            self._stats["wait_seconds"] += waited
+            self._stats["max_wait_seconds"] = max(self._stats["max_wait_seconds"], waited)
+        LLM_RATE_LIMIT_WAIT_SECONDS.observe(waited, {"priority": priority})
+        return waited
+
+    def observe(self, status_code: int, headers: Mapping[str, str], sent_at: Optional[float] = None) -> None:
+        """Adapt to a response's status and rate-limit headers.
+
+        Args:
+            status_code: HTTP status of the response
+            headers: Response headers
+            sent_at: ``time.monotonic()`` when the request was sent; the API
+                reports its limits as of then, not as of the response
+        """
+        now = time.monotonic()
+        sent_at = min(sent_at, now) if sent_at is not None else now
+        with self._condition:
+            for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+                remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+                if remaining is None:
+                    continue
+                try:
+                    remaining = float(remaining)
+                except ValueError:
+                    continue
+                # What the API has refilled since it counted
+                bucket.lower_to(remaining + (now - sent_at) * bucket.per_minute / 60, now)
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if remaining <= 0 and reset:
+                    self._paused_until = max(self._paused_until, sent_at + reset)
+            if status_code == 429:
+                self._stats["rate_limited"] += 1
+                self._backoff = min(max(self._backoff * 2, 1.0), self.max_backoff)
+                wait = retry_after(headers)
+                self._paused_until = max(self._paused_until, now + (wait if wait is not None else self._backoff))
+            elif status_code < 400:
+                self._backoff = self._backoff / 2 if self._backoff > 0.25 else 0.0
+            self._condition.notify_all()
+        if status_code == 429:
+            LLM_RATE_LIMITED.inc()
+
+    def stats(self) -> dict:
+        """Queue depth per priority plus wait-time and 429 counts."""
+        with self._condition:
+            queued: Dict[str, int] = {name: 0 for name in PRIORITIES}
+            ranks = {rank: name for name, rank in PRIORITIES.items()}
+            for rank, _ in self._queue:
+                queued[ranks[rank]] += 1
+            stats = dict(self._stats)
+            stats["queued"] = queued
+            stats["paused_seconds"] = max(self._paused_until - time.monotonic(), 0.0)
+        stats["mean_wait_seconds"] = stats["wait_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return stats
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def rate_limiting_enabled() -> bool:
+    """Whether ``LLM_RATE_LIMIT_ENABLED`` is on (the default)."""
+    return os.getenv("LLM_RATE_LIMIT_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter.
+
+    Configured through ``LLM_RATE_LIMIT_RPM``, ``LLM_RATE_LIMIT_TPM``,
+    ``LLM_RATE_LIMIT_BURST_SECONDS`` and ``LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS``.
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(
+                requests_per_minute=float(os.getenv("LLM_RATE_LIMIT_RPM", "0")),
+                tokens_per_minute=float(os.getenv("LLM_RATE_LIMIT_TPM", "0")),
+                burst_seconds=float(os.getenv("LLM_RATE_LIMIT_BURST_SECONDS", "1")),
+                max_backoff=float(os.getenv("LLM_RATE_LIMIT_MAX_BACKOFF_SECONDS", "60")),
+            )
+        return _limiter
+
+
+@functools.lru_cache(maxsize=1)
+def _interceptor_class():
+    try:
+        from crewai.llms.hooks import BaseInterceptor
+    except ImportError:
+        return None
+
+    class RateLimitInterceptor(BaseInterceptor):
+        """Waits for the limiter before each request and feeds it each response."""
+
+        def on_outbound(self, message):
+            get_rate_limiter().acquire(estimate_tokens(message.content))
+            _sent_at.set(time.monotonic())
+            return message
+
+        def on_inbound(self, message):
+            # The transport calls both hooks for one request on the same thread or task
+            get_rate_limiter().observe(message.status_code, message.headers, _sent_at.get())
+            return message
+
+        async def aon_outbound(self, message):
+            import asyncio
+            await asyncio.to_thread(get_rate_limiter().acquire, estimate_tokens(message.content))
+            _sent_at.set(time.monotonic())
+            return message
+
+        async def aon_inbound(self, message):
+            return self.on_inbound(message)
+
+    return RateLimitInterceptor
+
+
+def http_interceptor():
+    """A crewAI transport interceptor feeding the process-wide limiter.
+
+    Returns None when ``LLM_RATE_LIMIT_ENABLED`` is off or crewAI has no
+    transport interceptors.
+    """
+    if not rate_limiting_enabled():
+        return None
+    interceptor_class = _interceptor_class()
+    return interceptor_class() if interceptor_class is not None else None
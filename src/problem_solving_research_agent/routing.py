@@ -0,0 +1,343 @@
+"""Per-agent model routing with latency tracking and timeout cascades.
+
+Agents list candidate models under ``routing`` in ``agents.yaml``, in order
+of preference, optionally with per-task overrides::
+
+    document_publisher:
+      routing:
+        latency_budget_seconds: 15    # p90 a call may take
+        cost_budget: 0.05             # USD a call may cost (estimated)
+        timeout_seconds: 30           # then cascade to a faster model
+        models:
+          - model: gpt-4o-mini
+            max_input_tokens: 8000
+            cost_per_1m_input_tokens: 0.15
+            cost_per_1m_output_tokens: 0.6
+          - model: gpt-4o
+        tasks:
+          publish_solution_as_document:
+            latency_budget_seconds: 10
+
+:class:`RoutedLLM` stands in for the agent's LLM. For each call it takes the
+first model whose ``max_input_tokens`` fits the prompt, whose estimated cost
+fits ``cost_budget`` and whose recent p90 latency on this route fits
+``latency_budget_seconds``; a model without recent calls is assumed to fit.
+When no model meets the latency budget it takes the fastest one that fits
+the prompt. A call that times out, cannot reach its endpoint or gets a
+retryable server error (408, 409, 5xx) is retried on the remaining models,
+fastest first; with a single candidate the OpenAI client's own retries apply.
+
+Latencies are kept per route (agent and task) and model by
+:class:`LatencyTracker` over the last ``LLM_ROUTING_WINDOW_SECONDS``, so a
+model that was slow or timed out is tried again once its samples expire.
+``LLM_ROUTING_BASE_URLS`` (``model=url,...``) points models at other
+OpenAI-compatible endpoints, such as a local server for a small model.
+``LLM_ROUTING_ENABLED=false`` pins every agent to ``DEFAULT_MODEL``.
+
+This module imports crewAI; import it lazily.
+"""
+import contextlib
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from crewai.llms.base_llm import BaseLLM
+
+from problem_solving_research_agent.context import count_tokens
+from problem_solving_research_agent.metrics import LLM_ROUTED_CALLS
+from problem_solving_research_agent.rate_limit import COMPLETION_TOKEN_ESTIMATE
+
+# Samples kept per route and model
+MAX_SAMPLES = 200
+# HTTP statuses a call may succeed with on another model
+RETRYABLE_STATUSES = {408, 409, 500, 502, 503, 504}
+
+
+@dataclass(frozen=True)
+class ModelOption:
+    """A candidate model of a route."""
+    model: str
+    max_input_tokens: Optional[int] = None
+    cost_per_1m_input_tokens: float = 0.0
+    cost_per_1m_output_tokens: float = 0.0
+    base_url: Optional[str] = None
+
+    def fits(self, input_tokens: int) -> bool:
+        return self.max_input_tokens is None or input_tokens <= self.max_input_tokens
+
+    def cost(self, input_tokens: int, output_tokens: int = COMPLETION_TOKEN_ESTIMATE) -> float:
+        """Estimated USD cost of a call."""
+        return (input_tokens * self.cost_per_1m_input_tokens + output_tokens * self.cost_per_1m_output_tokens) / 1e6
+
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    """Candidate models (in order of preference) and the budgets for one route."""
+    models: Tuple[ModelOption, ...]
+    latency_budget_seconds: Optional[float] = None
+    cost_budget: Optional[float] = None
+    timeout_seconds: Optional[float] = None
+
+
+def _base_urls() -> Dict[str, str]:
+    urls = {}
+    for entry in os.getenv("LLM_ROUTING_BASE_URLS", "").split(","):
+        model, _, url = entry.partition("=")
+        if model.strip() and url.strip():
+            urls[model.strip()] = url.strip()
+    return urls
+
+
+def parse_policy(config: Optional[dict], default_model: str, task_name: Optional[str] = None) -> RoutePolicy:
+    """Build the policy for an agent's ``routing`` config, applying ``task_name``'s overrides.
+
+    An agent without ``routing`` gets a single-model policy for ``default_model``.
+    """
+    config = dict(config or {})
+    overrides = (config.pop("tasks", None) or {}).get(task_name) or {}
+    config.update(overrides)
+    base_urls = _base_urls()
+    models = []
+    for entry in config.get("models") or [default_model]:
+        option = dict(entry) if isinstance(entry, dict) else {"model": entry}
+        option.setdefault("base_url", base_urls.get(option["model"]))
+        models.append(ModelOption(**option))
+    return RoutePolicy(
+        models=tuple(models),
+        latency_budget_seconds=config.get("latency_budget_seconds"),
+        cost_budget=config.get("cost_budget"),
+        timeout_seconds=config.get("timeout_seconds"),
+    )
+
+
+def _percentile(ordered: Sequence[float], fraction: float) -> float:
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class LatencyTracker:
+    """Recent call latencies per route and model.
+
+    Args:
+        window_seconds: How long a sample counts
+        max_samples: Samples kept per route and model
+    """
+
+    def __init__(self, window_seconds: float = 900.0, max_samples: int = MAX_SAMPLES):
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self._samples: Dict[Tuple[str, str], deque] = {}
+        self._timeouts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, model: str, seconds: float, timed_out: bool = False) -> None:
+        """Add a call's latency (a timed-out call counts as its timeout)."""
+        with self._lock:
+            samples = self._samples.setdefault((route, model), deque(maxlen=self.max_samples))
+            samples.append((time.monotonic(), seconds))
+            if timed_out:
+                self._timeouts[(route, model)] = self._timeouts.get((route, model), 0) + 1
+
+    def _recent(self, route: str, model: str) -> List[float]:
+        # Caller holds the lock
+        samples = self._samples.get((route, model))
+        if not samples:
+            return []
+        cutoff = time.monotonic() - self.window_seconds
+        while samples and samples[0][0] < cutoff:
+            samples.popleft()
+        return sorted(seconds for _, seconds in samples)
+
+    def percentile(self, route: str, model: str, fraction: float) -> Optional[float]:
+        """Latency at ``fraction`` (0.5 for the median), or None without recent samples."""
+        with self._lock:
+            ordered = self._recent(route, model)
+        return _percentile(ordered, fraction) if ordered else None
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        """{route: {model: {"calls", "timeouts", "p50", "p90", "p99"}}} over the window."""
+        stats: Dict[str, Dict[str, dict]] = {}
+        with self._lock:
+            for (route, model) in list(self._samples):
+                ordered = self._recent(route, model)
+                if not ordered:
+                    continue
+                stats.setdefault(route, {})[model] = {
+                    "calls": len(ordered),
+                    "timeouts": self._timeouts.get((route, model), 0),
+                    "p50": _percentile(ordered, 0.5),
+                    "p90": _percentile(ordered, 0.9),
+                    "p99": _percentile(ordered, 0.99),
+                }
+        return stats
+
+
+class Router:
+    """Chooses among a route's models by prompt size, cost and recent latency."""
+
+    def __init__(self, tracker: LatencyTracker):
+        self.tracker = tracker
+
+    def choose(self, route: str, policy: RoutePolicy, input_tokens: int) -> List[ModelOption]:
+        """The models to try for a call, in order: the chosen one, then its cascade."""
+        fitting = [option for option in policy.models if option.fits(input_tokens)] or list(policy.models)
+        affordable = [
+            option for option in fitting
+            if policy.cost_budget is None or option.cost(input_tokens) <= policy.cost_budget
+        ] or fitting
+        chosen = None
+        for option in affordable:
+            p90 = self.tracker.percentile(route, option.model, 0.9)
+            if policy.latency_budget_seconds is None or p90 is None or p90 <= policy.latency_budget_seconds:
+                chosen = option
+                break
+        if chosen is None:
+            chosen = self._by_speed(route, affordable)[0]
+        return [chosen] + [option for option in self._by_speed(route, fitting) if option is not chosen]
+
+    def _by_speed(self, route: str, options: List[ModelOption]) -> List[ModelOption]:
+        """Fastest median first; models without recent calls last, in configured order."""
+        def median(option: ModelOption) -> float:
+            p50 = self.tracker.percentile(route, option.model, 0.5)
+            return float("inf") if p50 is None else p50
+
+        return sorted(options, key=median)
+
+
+def _retryable(error: BaseException) -> Optional[str]:
+    """Why ``error`` (or what it was raised from) is worth retrying on another model, if it is.
+
+    Returns:
+        ``"timeout"`` for a timeout or an unreachable endpoint, ``"server_error"``
+        for a retryable HTTP status, otherwise None
+    """
+    while error is not None:
+        if isinstance(error, (TimeoutError, ConnectionError)) or "Timeout" in type(error).__name__:
+            return "timeout"
+        status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and (status in RETRYABLE_STATUSES or status >= 500):
+            return "server_error"
+        error = error.__cause__
+    return None
+
+
+def _prompt_text(messages: Any) -> str:
+    if isinstance(messages, str):
+        return messages
+    parts = []
+    for message in messages or ():
+        content = message.get("content") if isinstance(message, dict) else message
+        parts.append(content if isinstance(content, str) else str(content or ""))
+    return "\n".join(parts)
+
+
+class RoutedLLM(BaseLLM):
+    """An agent's LLM that routes each call to one of several models.
+
+    Args:
+        route: Route name used for latency tracking (agent, or agent:task)
+        policy: Candidate models and budgets
+        candidates: {model: LLM} for every model in ``policy``
+        tracker: Shared latency samples
+    """
+
+    def __init__(self, route: str, policy: RoutePolicy, candidates: Dict[str, BaseLLM], tracker: LatencyTracker):
+        preferred = candidates[policy.models[0].model]
+        super().__init__(model=preferred.model, temperature=preferred.temperature, stop=list(preferred.stop or []))
+        # Plain attributes: BaseLLM is a pydantic model in newer crewAI releases
+        object.__setattr__(self, "route", route)
+        object.__setattr__(self, "policy", policy)
+        object.__setattr__(self, "candidates", candidates)
+        object.__setattr__(self, "router", Router(tracker))
+        object.__setattr__(self, "tracker", tracker)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        input_tokens = count_tokens(_prompt_text(messages))
+        options = self.router.choose(self.route, self.policy, input_tokens)
+        for attempt, option in enumerate(options):
+            started = time.perf_counter()
+            try:
+                response = self._call_candidate(
+                    self.candidates[option.model], messages, tools, callbacks, available_functions, **kwargs
+                )
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                reason = _retryable(e)
+                if reason is None:
+                    LLM_ROUTED_CALLS.inc(labels={"route": self.route, "model": option.model, "result": "error"})
+                    raise
+                # Count the full timeout against the model even when the endpoint failed sooner
+                self.tracker.record(self.route, option.model, max(elapsed, self.policy.timeout_seconds or 0),
+                                    timed_out=reason == "timeout")
+                LLM_ROUTED_CALLS.inc(labels={"route": self.route, "model": option.model, "result": reason})
+                if attempt == len(options) - 1:
+                    raise
+                failure = "timed out" if reason == "timeout" else f"failed ({type(e).__name__})"
+                print(f"⚠️ {option.model} {failure} for {self.route}; retrying on {options[attempt + 1].model}")
+                continue
+            self.tracker.record(self.route, option.model, time.perf_counter() - started)
+            LLM_ROUTED_CALLS.inc(labels={
+                "route": self.route, "model": option.model, "result": "cascaded" if attempt else "ok",
+            })
+            return response
+
+    def _call_candidate(self, llm: BaseLLM, messages, tools, callbacks, available_functions, **kwargs):
+        with contextlib.ExitStack() as stack:
+            # Forward call-scoped overrides made for this wrapper to the model that answers
+            try:
+                from crewai.llms.base_llm import call_stop_override, call_stream_override
+            except ImportError:
+                pass
+            else:
+                stack.enter_context(call_stop_override(llm, list(getattr(self, "stop_sequences", None) or self.stop or [])))
+                stream = self._effective_stream()
+                if stream is not None:
+                    stack.enter_context(call_stream_override(llm, stream))
+            return llm.call(messages, tools=tools, callbacks=callbacks, available_functions=available_functions, **kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return all(llm.supports_function_calling() for llm in self.candidates.values())
+
+    def supports_stop_words(self) -> bool:
+        return all(llm.supports_stop_words() for llm in self.candidates.values())
+
+    def get_context_window_size(self) -> int:
+        return min(llm.get_context_window_size() for llm in self.candidates.values())
+
+    def get_token_usage_summary(self):
+        llms = iter(self.candidates.values())
+        usage = next(llms).get_token_usage_summary()
+        for llm in llms:
+            usage.add_usage_metrics(llm.get_token_usage_summary())
+        return usage
+
+
+_tracker: Optional[LatencyTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Return the process-wide latency tracker (``LLM_ROUTING_WINDOW_SECONDS``, default 900)."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LatencyTracker(float(os.getenv("LLM_ROUTING_WINDOW_SECONDS", "900")))
+        return _tracker
+
+
+def routed_llm(route: str, policy: RoutePolicy, make_llm) -> BaseLLM:
+    """The LLM for a route: the single model itself, or a :class:`RoutedLLM` over several.
+
+    Args:
+        route: Route name for latency tracking
+        policy: From :func:`parse_policy`
+        make_llm: ``make_llm(option, cascades)`` creates the LLM for a
+            candidate; ``cascades`` is True when a failed call has somewhere to go
+    """
+    cascades = len(policy.models) > 1
+    candidates = {option.model: make_llm(option, cascades) for option in policy.models}
+    if not cascades:
+        return candidates[policy.models[0].model]
+    return RoutedLLM(route, policy, candidates, get_latency_tracker())
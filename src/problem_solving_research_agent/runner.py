@@ -0,0 +1,229 @@
+"""Shared entry point for running the crew on a problem statement.
+
+The CLI and the Streamlit UI both go through :func:`run_problem` so caching
+and other cross-cutting behaviour lives in one place.
+"""
+import functools
+import os
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import Optional
+
+from problem_solving_research_agent.cache import config_fingerprint, get_result_cache
+from problem_solving_research_agent.checkpoints import COMPLETED, FAILED, RUNNING, get_checkpoint_store
+from problem_solving_research_agent.context import resolve_handles
+from problem_solving_research_agent.metrics import install_event_metrics
+from problem_solving_research_agent.events import (
+    RUN_CACHE_HIT,
+    RUN_COMPLETED,
+    RUN_FAILED,
+    RUN_RESUMED,
+    RUN_STARTED,
+    TOKEN_USAGE,
+    RunUsage,
+    event_bus,
+    flush_crewai_events,
+    run_context,
+)
+from problem_solving_research_agent.factory import (
+    DEFAULT_MODEL,
+    DEFAULT_TEMPERATURE,
+    PIPELINES,
+    TASK_NAMES,
+    get_crew_factory,
+    routing_enabled,
+)
+from problem_solving_research_agent.knowledge import knowledge_context, knowledge_version
+
+install_event_metrics()
+
+
+def pipeline_mode() -> str:
+    """Pipeline selected by ``PIPELINE_MODE``: ``full`` (default) or ``fast``."""
+    mode = os.getenv("PIPELINE_MODE", "full").strip().lower()
+    if mode not in PIPELINES:
+        raise ValueError(f"PIPELINE_MODE must be one of {', '.join(PIPELINES)}, got {mode!r}")
+    return mode
+
+
+def fanout_settings() -> tuple:
+    """``(RESEARCH_FANOUT, RESEARCH_FANOUT_CONCURRENCY)``; a width below 2 keeps one research task."""
+    return (
+        int(os.getenv("RESEARCH_FANOUT", "0")),
+        max(int(os.getenv("RESEARCH_FANOUT_CONCURRENCY", "3")), 1),
+    )
+
+
+def model_fingerprint(pipeline: Optional[str] = None) -> tuple:
+    """Model and pipeline settings that should invalidate cached results when changed."""
+    return (DEFAULT_MODEL, DEFAULT_TEMPERATURE, routing_enabled(), pipeline or pipeline_mode())
+
+
+@functools.lru_cache(maxsize=None)
+def crew_fingerprint(pipeline: str) -> str:
+    """Fingerprint of the crew configuration and model settings for a pipeline."""
+    return config_fingerprint(model_fingerprint(pipeline))
+
+
+def result_fingerprint() -> tuple:
+    """Everything a cached result depends on besides the problem statement.
+
+    Adds to :func:`model_fingerprint` the knowledge base version (the
+    retrieved ``knowledge_context``) and the research fan-out width.
+    """
+    width = fanout_settings()[0]
+    return model_fingerprint() + (knowledge_version(), width if width > 1 else 0)
+
+
+def result_cache():
+    """Return the result cache configured for the current settings (see :func:`result_fingerprint`)."""
+    return get_result_cache(result_fingerprint())
+
+
+def _warm_up_publisher() -> None:
+    """Authenticate the Google Docs client while research is still running."""
+    from problem_solving_research_agent.tools.google_clients import get_client_pool
+    from problem_solving_research_agent.tools.google_docs import DOCS_SCOPES
+
+    get_client_pool().warm_up(DOCS_SCOPES)
+
+
+def _save_output(problem_statement: str, result: str) -> None:
+    """Queue a run's result for the output store unless ``OUTPUT_SAVE_RUNS`` is off."""
+    if os.getenv("OUTPUT_SAVE_RUNS", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return
+    from problem_solving_research_agent.tools.output_store import document_title, get_output_store, slugify
+
+    title = document_title(result, problem_statement)
+    try:
+        # Write-behind: the crew's caller does not wait for the disk
+        get_output_store().save_async(result, slugify(title), title=title, problem_statement=problem_statement)
+    except Exception as e:
+        print(f"⚠️ Could not queue the result for the output store: {e}")
+
+
+def run_problem(
+    problem_statement: str,
+    use_cache: bool = True,
+    run_id: Optional[str] = None,
+    resume: bool = True,
+    checkpoint_run_id: Optional[str] = None,
+    pipeline: Optional[str] = None,
+) -> str:
+    """
+    Run the crew for a problem statement and return the final result text.
+
+    Args:
+        problem_statement: The problem to research and solve
+        use_cache: Serve repeated problem statements from the result cache
+        run_id: ID that tags this run's events on the event bus (generated if omitted)
+        resume: Restart a failed or interrupted run for the same inputs from
+            its first unfinished task instead of from scratch
+        checkpoint_run_id: Resume this specific checkpointed run
+        pipeline: ``full`` or ``fast`` (defaults to ``PIPELINE_MODE``); the
+            result cache only serves the configured pipeline
+
+    Returns:
+        The crew's final output as a string
+    """
+    configured = pipeline_mode()
+    pipeline = pipeline or configured
+    task_names = PIPELINES[pipeline]
+    with run_context(run_id or uuid.uuid4().hex[:12]) as event_run_id:
+        cache = result_cache() if use_cache and pipeline == configured else None
+        if cache is not None:
+            cached: Optional[str] = cache.get(problem_statement)
+            if cached is not None:
+                event_bus.publish(RUN_CACHE_HIT)
+                return cached
+
+        inputs = {
+            'problem_statement': problem_statement,
+            'knowledge_context': knowledge_context(problem_statement),
+        }
+        checkpoints = get_checkpoint_store()
+        completed = {}
+        if checkpoints is not None:
+            if checkpoint_run_id is None and resume:
+                checkpoint_run_id = checkpoints.resumable_run(inputs, crew_fingerprint(pipeline))
+            if checkpoint_run_id is not None:
+                completed = checkpoints.completed_tasks(checkpoint_run_id)
+                checkpoints.set_status(checkpoint_run_id, RUNNING)
+                event_bus.publish(RUN_RESUMED, checkpoint_run_id=checkpoint_run_id, completed=sorted(completed))
+            else:
+                checkpoint_run_id = checkpoints.start_run(inputs, crew_fingerprint(pipeline))
+
+        width, concurrency = fanout_settings()
+        pending = [name for name in task_names if name not in completed]
+        # Only the full pipeline's research task is fanned out (see fanout.py)
+        fan_out = width > 1 and bool(pending) and pending[0] == TASK_NAMES[0]
+        if fan_out:
+            from problem_solving_research_agent import fanout
+            pending = fanout.stage_task_names(width) + pending[1:]
+
+        started = time.perf_counter()
+        output = None
+        # The factory shares LLMs across concurrent runs, so their own counters
+        # mix runs; count the LLM calls made under this run's ID instead
+        usage = RunUsage()
+        unsubscribe_usage = event_bus.subscribe(usage, run_id=event_run_id)
+        # Published on every path, so each RUN_COMPLETED or RUN_FAILED has its RUN_STARTED
+        event_bus.publish(RUN_STARTED, tasks=pending)
+        try:
+            if not pending:
+                # Every task finished before the previous run stopped
+                result = resolve_handles(completed[task_names[-1]])
+            else:
+                # Publishing only needs the research output, but its credential
+                # refresh does not: overlap it with the research task
+                threading.Thread(target=_warm_up_publisher, name="publisher-warm-up", daemon=True).start()
+                if fan_out:
+                    research = fanout.fan_out_research(
+                        problem_statement, inputs['knowledge_context'], width, concurrency
+                    )
+                    # The merged findings stand in for the research task's output
+                    completed = {**completed, TASK_NAMES[0]: research}
+                    if checkpoints is not None:
+                        checkpoints.save_task(checkpoint_run_id, TASK_NAMES[0], research)
+                crew = get_crew_factory().build(completed=completed, pipeline=pipeline)
+                recording = (
+                    checkpoints.recording(checkpoint_run_id, event_run_id)
+                    if checkpoints is not None else nullcontext()
+                )
+                with recording:
+                    output = crew.kickoff(inputs=inputs)
+                # The publisher may refer to the research document by its artifact:// handle
+                result = resolve_handles(str(output))
+            if pipeline == "fast":
+                from problem_solving_research_agent.publishing import publish_report
+                # The structured report comes from this kickoff or, on resume, the checkpoint
+                report = result if output is None else (getattr(output, 'pydantic', None) or output.raw)
+                result = publish_report(report)
+        except Exception as e:
+            unsubscribe_usage()
+            if checkpoints is not None:
+                checkpoints.set_status(checkpoint_run_id, FAILED)
+            event_bus.publish(
+                RUN_FAILED,
+                error=str(e),
+                duration_s=round(time.perf_counter() - started, 4),
+                checkpoint_run_id=checkpoint_run_id,
+            )
+            raise
+        if checkpoints is not None:
+            checkpoints.set_status(checkpoint_run_id, COMPLETED)
+
+        if output is not None:
+            # The last LLM events are delivered on crewAI's handler threads
+            flush_crewai_events()
+        unsubscribe_usage()
+        if output is not None:
+            event_bus.publish(TOKEN_USAGE, **usage.totals())
+        event_bus.publish(RUN_COMPLETED, duration_s=round(time.perf_counter() - started, 4))
+
+        if cache is not None:
+            cache.put(problem_statement, result)
+        _save_output(problem_statement, result)
+        return result
@@ -0,0 +1,156 @@
+"""Coalescing of concurrent identical requests into one crew run.
+
+When the same problem is submitted several times while a run for it is still
+in flight (a shared report pasted into the UI by several people), only the
+first submission starts a crew. Later ones join that run as followers: the job
+queue hands them the leader's job ID, so they see the same progress, streamed
+tokens and result; in-process callers of :meth:`SingleFlight.do` block on the
+leader's result or error.
+
+Followers never own the run, so one of them leaving (a closed browser tab, a
+timed-out wait) does not affect it. If the leader itself leaves before
+finishing (an interrupt rather than an error), waiting followers start over and
+one of them leads a new run. A flight is forgotten as soon as it finishes;
+submissions after that start a new run, which the result cache usually serves.
+"""
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from problem_solving_research_agent.cache import normalize_problem_statement
+from problem_solving_research_agent.metrics import SINGLEFLIGHT_REQUESTS
+
+LEADER = "leader"
+FOLLOWER = "follower"
+
+
+class FlightAbandoned(RuntimeError):
+    """The leader stopped before finishing; followers should join again."""
+
+
+def request_key(problem_statement: str, fingerprint: str = "") -> Tuple[str, str]:
+    """Key under which identical submissions are coalesced.
+
+    Args:
+        problem_statement: Submitted text (normalized like result cache keys)
+        fingerprint: Crew configuration the run would use
+    """
+    return normalize_problem_statement(problem_statement), fingerprint
+
+
+class Flight:
+    """One in-flight call shared by its leader and any followers.
+
+    Attributes:
+        key: What the call was coalesced on
+        owner: Caller-defined handle for the run (the job ID for the job queue)
+        subscribers: Submissions attached so far, the leader included
+    """
+
+    def __init__(self, key: Any, owner: Any = None):
+        self.key = key
+        self.owner = owner
+        self.subscribers = 1
+        self._future: Future = Future()
+
+    def done(self) -> bool:
+        return self._future.done()
+
+    def wait(self, timeout: Optional[float] = None) -> Any:
+        """Return the leader's result or raise its error.
+
+        A timeout only stops this caller waiting; the run goes on.
+        """
+        return self._future.result(timeout)
+
+
+class SingleFlight:
+    """Registry of in-flight calls keyed by request.
+
+    Args:
+        name: Label for the ``singleflight_requests_total`` metric
+    """
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._flights: Dict[Any, Flight] = {}
+        self._lock = threading.Lock()
+
+    def join(self, key: Any, owner: Optional[Callable[[], Any]] = None) -> Tuple[Flight, bool]:
+        """Attach to the flight for ``key``, starting one if there is none.
+
+        Args:
+            key: Request key, see :func:`request_key`
+            owner: Called (under the registry lock) only when a new flight
+                starts, to create its handle, e.g. a job ID
+
+        Returns:
+            The flight and whether the caller leads it. A leader must end the
+            flight with :meth:`finish` or :meth:`abandon`.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.subscribers += 1
+                role = FOLLOWER
+            else:
+                flight = self._flights[key] = Flight(key, owner() if owner is not None else None)
+                role = LEADER
+        SINGLEFLIGHT_REQUESTS.inc(labels={"flight": self.name, "role": role})
+        return flight, role == LEADER
+
+    def get(self, key: Any) -> Optional[Flight]:
+        """Return the in-flight call for ``key``, if any."""
+        with self._lock:
+            return self._flights.get(key)
+
+    def finish(self, flight: Flight, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Hand the leader's result (or error) to every follower."""
+        self._forget(flight)
+        if error is not None:
+            flight._future.set_exception(error)
+        else:
+            flight._future.set_result(result)
+
+    def abandon(self, flight: Flight) -> None:
+        """End a flight whose leader left without a result."""
+        self.finish(flight, error=FlightAbandoned(f"Leader of {self.name} flight left before finishing"))
+
+    def do(self, key: Any, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """Call ``fn`` once for all concurrent callers with the same ``key``.
+
+        Args:
+            key: Request key, see :func:`request_key`
+            fn: Runs the request; called by the leader only
+            timeout: Longest a follower waits (the run itself is not limited)
+        """
+        while True:
+            flight, leader = self.join(key)
+            if leader:
+                return self._lead(flight, fn)
+            try:
+                return flight.wait(timeout)
+            except FlightAbandoned:
+                # The leader was interrupted; join again, possibly as the new leader
+                continue
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def _lead(self, flight: Flight, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except Exception as e:
+            self.finish(flight, error=e)
+            raise
+        except BaseException:
+            self.abandon(flight)
+            raise
+        self.finish(flight, result)
+        return result
+
+    def _forget(self, flight: Flight) -> None:
+        with self._lock:
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
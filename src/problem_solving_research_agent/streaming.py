@@ -0,0 +1,218 @@
+"""Live streaming of the agents' answers to the UI and CLI.
+
+With ``LLM_STREAMING`` on, the shared LLMs are created with ``stream=True`` and
+every token crewAI receives is published on the event bus as ``LLM_CHUNK``.
+:class:`AnswerFilter` passes through only answer text: native tool-call
+deltas are dropped by the bridge, and for agents replying in crewAI's text
+ReAct format ("Thought: ... Final Answer: ...") only the final answer is kept.
+
+:class:`RunStream` buffers a run's answer text so a reader that attaches late
+(a Streamlit rerun, a refreshed page) first receives the backlog and then the
+live tokens. :func:`stream_text` is what ``st.write_stream`` consumes.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Set
+
+from problem_solving_research_agent.events import (
+    LLM_CHUNK,
+    LLM_COMPLETED,
+    LLM_FAILED,
+    RUN_CACHE_HIT,
+    RUN_COMPLETED,
+    RUN_FAILED,
+    Event,
+    event_bus,
+)
+
+FINAL_ANSWER = "Final Answer:"
+REACT_PREFIXES = ("Thought:", "Action:", FINAL_ANSWER)
+REACT_PREFIX_CHARS = max(len(prefix) for prefix in REACT_PREFIXES)
+# Printed between the answers of consecutive LLM calls (research, then publisher)
+ANSWER_SEPARATOR = "\n\n---\n\n"
+RUN_ENDED = (RUN_COMPLETED, RUN_FAILED, RUN_CACHE_HIT)
+
+
+def streaming_enabled() -> bool:
+    """Whether ``LLM_STREAMING`` asks for token streaming (off by default)."""
+    return os.getenv("LLM_STREAMING", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+class AnswerFilter:
+    """Extracts the answer text from interleaved per-call token streams.
+
+    Calls whose output starts like crewAI's text ReAct format ("Thought:",
+    "Action:") are held back until "Final Answer:" appears; anything else
+    (native tool calling returns the answer directly) passes straight through.
+    """
+
+    def __init__(self):
+        # call_id -> text not yet classified, or the tail before "Final Answer:"
+        self._pending: Dict[Optional[str], str] = {}
+        self._react: Set[Optional[str]] = set()
+        self._answering: Set[Optional[str]] = set()
+        self._started: Set[Optional[str]] = set()
+
+    def feed(self, call_id: Optional[str], chunk: str) -> str:
+        """Return the part of ``chunk`` that belongs to an answer."""
+        if call_id not in self._answering:
+            pending = self._pending.get(call_id, "") + chunk
+            if call_id not in self._react:
+                head = pending.lstrip()
+                if len(head) < REACT_PREFIX_CHARS and "\n" not in head:
+                    self._pending[call_id] = pending
+                    return ""
+                if not head.startswith(REACT_PREFIXES):
+                    return self._begin(call_id, pending)
+                self._react.add(call_id)
+            index = pending.find(FINAL_ANSWER)
+            if index == -1:
+                # Keep just enough text to spot a marker split across chunks
+                self._pending[call_id] = pending[-len(FINAL_ANSWER):]
+                return ""
+            return self._begin(call_id, pending[index + len(FINAL_ANSWER):])
+        return self._emit(call_id, chunk)
+
+    def finish(self, call_id: Optional[str]) -> str:
+        """Flush a call's unclassified text once it ends (short plain answers)."""
+        pending = self._pending.pop(call_id, "")
+        if call_id in self._answering or call_id in self._react:
+            return ""
+        return self._begin(call_id, pending)
+
+    def _begin(self, call_id: Optional[str], text: str) -> str:
+        self._pending.pop(call_id, None)
+        self._answering.add(call_id)
+        return self._emit(call_id, text)
+
+    def _emit(self, call_id: Optional[str], text: str) -> str:
+        if call_id in self._started:
+            return text
+        text = text.lstrip()
+        if not text:
+            return ""
+        prefix = ANSWER_SEPARATOR if self._started else ""
+        self._started.add(call_id)
+        return prefix + text
+
+
+class RunStream:
+    """Answer text of one run, readable from the start while it is produced."""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._filter = AnswerFilter()
+        self._condition = threading.Condition()
+        self.done = False
+
+    def feed(self, call_id: Optional[str], chunk: str) -> None:
+        with self._condition:
+            self._append(self._filter.feed(call_id, chunk))
+
+    def finish_call(self, call_id: Optional[str]) -> None:
+        with self._condition:
+            self._append(self._filter.finish(call_id))
+
+    def _append(self, text: str) -> None:
+        # Caller holds the condition
+        if text:
+            self._parts.append(text)
+            self._length += len(text)
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self.done = True
+            self._condition.notify_all()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def text(self) -> str:
+        with self._condition:
+            return "".join(self._parts)
+
+    def wait_for_text(self, length: int, timeout: Optional[float] = None) -> bool:
+        """Wait until the text is longer than ``length`` characters or the run ended."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._length > length or self.done, timeout)
+
+    def iter_text(self, idle_timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield the backlog, then new text until the run ends.
+
+        Args:
+            idle_timeout: Stop early when nothing arrives for this many seconds
+        """
+        position = 0
+        while True:
+            with self._condition:
+                if not self._condition.wait_for(
+                    lambda: len(self._parts) > position or self.done, timeout=idle_timeout
+                ):
+                    return
+                parts = self._parts[position:]
+                done = self.done
+            position += len(parts)
+            if parts:
+                yield "".join(parts)
+            elif done:
+                return
+
+
+class AnswerStreams:
+    """Routes bus chunks into one :class:`RunStream` per run.
+
+    Args:
+        max_runs: Streams kept in memory; the least recently started are dropped
+    """
+
+    def __init__(self, max_runs: int = 64):
+        self.max_runs = max_runs
+        self._streams: "OrderedDict[str, RunStream]" = OrderedDict()
+        self._lock = threading.Lock()
+        event_bus.subscribe(self._on_event)
+
+    def get(self, run_id: str) -> RunStream:
+        """Return the stream for a run, creating it if no token arrived yet."""
+        with self._lock:
+            stream = self._streams.get(run_id)
+            if stream is None:
+                stream = self._streams[run_id] = RunStream()
+                while len(self._streams) > self.max_runs:
+                    self._streams.popitem(last=False)
+            return stream
+
+    def find(self, run_id: str) -> Optional[RunStream]:
+        """Return the stream for a run if it is still kept, without creating one."""
+        with self._lock:
+            return self._streams.get(run_id)
+
+    def _on_event(self, event: Event) -> None:
+        if event.run_id is None:
+            return
+        if event.type == LLM_CHUNK:
+            self.get(event.run_id).feed(event.data.get("call_id"), event.data.get("chunk") or "")
+        elif event.type in (LLM_COMPLETED, LLM_FAILED):
+            self.get(event.run_id).finish_call(event.data.get("call_id"))
+        elif event.type in RUN_ENDED:
+            self.get(event.run_id).close()
+
+
+_streams: Optional[AnswerStreams] = None
+_streams_lock = threading.Lock()
+
+
+def get_answer_streams() -> AnswerStreams:
+    """Return the process-wide stream registry (subscribes on first use)."""
+    global _streams
+    with _streams_lock:
+        if _streams is None:
+            _streams = AnswerStreams()
+        return _streams
+
+
+def stream_text(run_id: str, idle_timeout: Optional[float] = None) -> Iterator[str]:
+    """Yield a run's answer text as it streams, for ``st.write_stream``."""
+    return get_answer_streams().get(run_id).iter_text(idle_timeout)
@@ -0,0 +1,227 @@
+"""Build Google Docs ``batchUpdate`` requests from markdown in a single pass.
+
+All text is inserted with as few ``insertText`` requests as possible and
+styles are applied to forward-computed ranges afterwards, so the document keeps
+its original order and the number of requests no longer grows with the number
+of lines. Indexes count UTF-16 code units, as the Docs API does.
+
+Bullets are applied last and in reverse document order: ``createParagraphBullets``
+strips the leading tabs that encode nesting, which shifts every later index.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+BULLET_RE = re.compile(r"^(\s*)([-*+])\s+(.*)$")
+NUMBERED_RE = re.compile(r"^(\s*)\d+[.)]\s+(.*)$")
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+FENCE_RE = re.compile(r"^\s*(```|~~~)")
+
+BULLET_PRESETS = {
+    'bullet': 'BULLET_DISC_CIRCLE_SQUARE',
+    'numbered': 'NUMBERED_DECIMAL_ALPHA_ROMAN',
+}
+CODE_STYLE = {'weightedFontFamily': {'fontFamily': 'Courier New'}}
+
+# Google rejects very large batchUpdate bodies; stay well under the limit
+DEFAULT_MAX_BATCH_CHARS = 200_000
+DEFAULT_MAX_BATCH_REQUESTS = 500
+# Rough serialized size of one style request, for batch sizing
+STYLE_REQUEST_CHARS = 200
+
+
+def utf16_len(text: str) -> int:
+    """Length of ``text`` in UTF-16 code units."""
+    return len(text.encode('utf-16-le')) // 2
+
+
+@dataclass
+class DocsContent:
+    """Text and style ranges produced by :func:`parse_markdown`.
+
+    Ranges are ``(start, end)`` offsets in UTF-16 code units relative to the
+    start of ``text``; ``bullets`` entries carry their preset as a third item.
+    """
+    text: str = ""
+    headings: List[tuple] = field(default_factory=list)
+    bold: List[tuple] = field(default_factory=list)
+    code: List[tuple] = field(default_factory=list)
+    bullets: List[tuple] = field(default_factory=list)
+
+
+def _strip_bold(text: str, offset: int, bold: list) -> str:
+    """Remove ``**`` markers from ``text`` and record the bold ranges."""
+    parts = []
+    position = offset
+    last = 0
+    for match in BOLD_RE.finditer(text):
+        plain = text[last:match.start()]
+        parts.append(plain)
+        position += utf16_len(plain)
+        inner = match.group(1)
+        bold.append((position, position + utf16_len(inner)))
+        parts.append(inner)
+        position += utf16_len(inner)
+        last = match.end()
+    parts.append(text[last:])
+    return ''.join(parts)
+
+
+def parse_markdown(content: str) -> DocsContent:
+    """Flatten markdown into Docs text plus style ranges in one pass."""
+    result = DocsContent()
+    chunks = []
+    offset = 0
+    in_code = False
+    list_kind: Optional[str] = None
+    list_start = 0
+
+    def close_list(end):
+        nonlocal list_kind
+        if list_kind is not None:
+            result.bullets.append((list_start, end, BULLET_PRESETS[list_kind]))
+            list_kind = None
+
+    for line in content.split('\n'):
+        if FENCE_RE.match(line):
+            in_code = not in_code
+            continue
+        if in_code:
+            close_list(offset)
+            text = line + '\n'
+            result.code.append((offset, offset + utf16_len(text)))
+            chunks.append(text)
+            offset += utf16_len(text)
+            continue
+
+        kind = None
+        indent = ''
+        heading = HEADING_RE.match(line)
+        bullet = BULLET_RE.match(line)
+        numbered = NUMBERED_RE.match(line)
+        if heading:
+            body = heading.group(2).strip().strip('#').strip()
+        elif bullet:
+            kind, indent, body = 'bullet', bullet.group(1), bullet.group(3)
+        elif numbered:
+            kind, indent, body = 'numbered', numbered.group(1), numbered.group(2)
+        else:
+            body = line
+
+        if kind != list_kind:
+            close_list(offset)
+        if kind is not None and list_kind is None:
+            list_kind = kind
+            list_start = offset
+
+        # Nesting level is expressed with leading tabs, which Docs consumes
+        prefix = '\t' * (len(indent.expandtabs(4)) // 2) if kind else ''
+        start = offset + utf16_len(prefix)
+        text = prefix + _strip_bold(body, start, result.bold) + '\n'
+        if heading:
+            level = len(heading.group(1))
+            result.headings.append((offset, offset + utf16_len(text), level))
+        chunks.append(text)
+        offset += utf16_len(text)
+
+    close_list(offset)
+    result.text = ''.join(chunks)
+    return result
+
+
+def _range(start: int, end: int, base: int) -> dict:
+    return {'startIndex': base + start, 'endIndex': base + end}
+
+
+def _split_text(text: str, max_chars: int) -> List[str]:
+    """Split text into pieces of at most ``max_chars`` characters, on line breaks where possible."""
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind('\n', 0, max_chars) + 1
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def build_requests(content: DocsContent, start_index: int = 1,
+                   max_insert_chars: int = DEFAULT_MAX_BATCH_CHARS) -> List[dict]:
+    """Return the ordered ``batchUpdate`` requests for parsed content."""
+    requests = []
+    index = start_index
+    for piece in _split_text(content.text, max_insert_chars):
+        requests.append({'insertText': {'location': {'index': index}, 'text': piece}})
+        index += utf16_len(piece)
+
+    for start, end, level in content.headings:
+        requests.append({
+            'updateParagraphStyle': {
+                'range': _range(start, end, start_index),
+                'paragraphStyle': {'namedStyleType': f'HEADING_{level}'},
+                'fields': 'namedStyleType',
+            }
+        })
+    for start, end in content.bold:
+        if end > start:
+            requests.append({
+                'updateTextStyle': {
+                    'range': _range(start, end, start_index),
+                    'textStyle': {'bold': True},
+                    'fields': 'bold',
+                }
+            })
+    for start, end in content.code:
+        requests.append({
+            'updateTextStyle': {
+                'range': _range(start, end, start_index),
+                'textStyle': CODE_STYLE,
+                'fields': 'weightedFontFamily',
+            }
+        })
+    for start, end, preset in reversed(content.bullets):
+        requests.append({
+            'createParagraphBullets': {
+                'range': _range(start, end, start_index),
+                'bulletPreset': preset,
+            }
+        })
+    return requests
+
+
+def chunk_requests(requests: List[dict],
+                   max_chars: int = DEFAULT_MAX_BATCH_CHARS,
+                   max_requests: int = DEFAULT_MAX_BATCH_REQUESTS) -> List[List[dict]]:
+    """Group requests into size-bounded ``batchUpdate`` bodies, preserving order."""
+    batches = []
+    current = []
+    size = 0
+    for request in requests:
+        cost = len(request['insertText']['text']) if 'insertText' in request else STYLE_REQUEST_CHARS
+        if current and (size + cost > max_chars or len(current) >= max_requests):
+            batches.append(current)
+            current, size = [], 0
+        current.append(request)
+        size += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def markdown_to_batches(markdown: str,
+                        max_chars: int = DEFAULT_MAX_BATCH_CHARS,
+                        max_requests: int = DEFAULT_MAX_BATCH_REQUESTS) -> List[List[dict]]:
+    """Convert markdown into a list of ``batchUpdate`` request bodies."""
+    requests = build_requests(parse_markdown(markdown), max_insert_chars=max_chars)
+    return chunk_requests(requests, max_chars=max_chars, max_requests=max_requests)
+
+
+def plain_text_batches(text: str, max_chars: int = DEFAULT_MAX_BATCH_CHARS) -> List[List[dict]]:
+    """Insert plain text in order, one size-bounded batch per piece."""
+    return chunk_requests(
+        build_requests(DocsContent(text=text), max_insert_chars=max_chars),
+        max_chars=max_chars,
+    )
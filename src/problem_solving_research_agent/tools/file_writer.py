@@ -1,36 +1,34 @@
-import os
-from datetime import datetime
+from typing import Optional
 
+from problem_solving_research_agent.tools.output_store import get_output_store
 
-def save_document_to_file(content: str, filename: str, file_format: str = "md") -> str:
+
+def save_document_to_file(
+    content: str,
+    filename: str,
+    file_format: str = "md",
+    problem_statement: Optional[str] = None,
+) -> str:
     """
-    Save document content to a local file with timestamp.
-    
+    Save document content to the local output store.
+
+    Documents are stored by content hash and indexed by title and problem
+    statement (see ``output_store.py``), so concurrent saves never overwrite
+    each other and identical documents are stored once.
+
     Args:
         content: The content to write to the file
         filename: The base filename (without extension)
         file_format: File format/extension (md, txt, etc.)
-    
+        problem_statement: Problem the document answers, indexed for lookups
+
     Returns:
         Success message with file path or error message
     """
     try:
-        # Create timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Create output directory
-        output_dir = "output"
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Create full filename with timestamp
-        full_filename = f"{timestamp}_{filename}.{file_format}"
-        filepath = os.path.join(output_dir, full_filename)
-        
-        # Write content to file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        return f"File successfully saved to: {filepath}"
-        
+        store = get_output_store()
+        record = store.save(content, filename, file_format, problem_statement=problem_statement)
+        return f"File successfully saved to: {store.root / record['path']}"
+
     except Exception as e:
         return f"Error saving file: {str(e)}"
@@ -0,0 +1,197 @@
+"""Process-wide pool of Google API credentials and service clients.
+
+Building credentials and discovery-based service objects is expensive, so the
+Google Docs tools share them through :func:`get_client_pool`:
+
+* credentials are loaded once per (source, scopes) and refreshed only when
+  they are expired or not yet valid; a refresh holds up only callers of the
+  same credentials, not the rest of the pool;
+* services are built from the discovery documents bundled with
+  ``google-api-python-client`` (static discovery, no network round trip);
+* ``httplib2`` is not thread-safe, so each thread gets its own service
+  handles on top of the shared credentials.
+
+Set ``GOOGLE_API_FAKE_TRANSPORT=true`` (or call :meth:`GoogleClientPool.use_transport`)
+to route every call to an in-memory fake instead of Google, for offline runs.
+
+The Google libraries are imported on first use so that importing the crew
+does not pay for them when Google Docs is never called.
+"""
+import os
+import threading
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+PLACEHOLDER_SERVICE_ACCOUNT_PATH = "path/to/your/service-account.json"
+TOKEN_URI = "https://oauth2.googleapis.com/token"
+
+
+def service_account_path() -> Optional[str]:
+    """Return the configured service account file, if it exists."""
+    path = os.getenv('GOOGLE_SERVICE_ACCOUNT_PATH')
+    if path and path != PLACEHOLDER_SERVICE_ACCOUNT_PATH and os.path.exists(path):
+        return path
+    return None
+
+
+def oauth_settings() -> Optional[Tuple[str, str, str]]:
+    """Return (client_id, client_secret, refresh_token) when all are set."""
+    settings = (
+        os.getenv('GOOGLE_CLIENT_ID'),
+        os.getenv('GOOGLE_CLIENT_SECRET'),
+        os.getenv('GOOGLE_REFRESH_TOKEN'),
+    )
+    return settings if all(settings) else None
+
+
+class GoogleClientPool:
+    """Shares Google credentials and per-thread service handles.
+
+    Args:
+        http_factory: Optional callable returning an ``httplib2.Http``-like
+            transport. When set, services are built on that transport and no
+            credentials are required (used for offline testing).
+    """
+
+    def __init__(self, http_factory: Optional[Callable[[], object]] = None):
+        self._http_factory = http_factory
+        self._credentials: Dict[tuple, object] = {}
+        self._refresh_locks: Dict[tuple, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generation = 0
+
+    def use_transport(self, http_factory: Optional[Callable[[], object]]) -> None:
+        """Swap the transport (e.g. for a fake) and drop cached handles."""
+        with self._lock:
+            self._http_factory = http_factory
+            self._credentials.clear()
+            self._refresh_locks.clear()
+            self._generation += 1
+
+    @property
+    def offline(self) -> bool:
+        return self._http_factory is not None
+
+    def credentials(self, scopes: Sequence[str], allow_oauth: bool = True):
+        """
+        Return valid shared credentials for the given scopes.
+
+        Args:
+            scopes: OAuth scopes the credentials must carry
+            allow_oauth: Fall back to OAuth env settings when no service account is configured
+
+        Returns:
+            Credentials object, or None if nothing is configured
+        """
+        sa_path = service_account_path()
+        if sa_path:
+            key = ('service_account', sa_path, tuple(scopes))
+        elif allow_oauth and oauth_settings():
+            key = ('oauth',) + oauth_settings() + (tuple(scopes),)
+        else:
+            return None
+
+        from google.auth.transport.requests import Request
+
+        with self._lock:
+            credentials = self._credentials.get(key)
+            if credentials is None:
+                if sa_path:
+                    from google.oauth2 import service_account
+                    credentials = service_account.Credentials.from_service_account_file(
+                        sa_path, scopes=list(scopes)
+                    )
+                else:
+                    from google.oauth2.credentials import Credentials
+                    client_id, client_secret, refresh_token = oauth_settings()
+                    credentials = Credentials(
+                        token=None,
+                        refresh_token=refresh_token,
+                        token_uri=TOKEN_URI,
+                        client_id=client_id,
+                        client_secret=client_secret,
+                    )
+                self._credentials[key] = credentials
+            refresh_lock = self._refresh_locks.setdefault(key, threading.Lock())
+        # Refresh only when needed; concurrent callers of these credentials wait
+        # for one refresh, while the token request runs outside the pool lock
+        with refresh_lock:
+            if not credentials.valid:
+                credentials.refresh(Request())
+        return credentials
+
+    def service(self, api: str, version: str, credentials=None):
+        """
+        Return this thread's service handle for ``api``/``version``.
+
+        Args:
+            api: API name, e.g. 'docs' or 'drive'
+            version: API version, e.g. 'v1'
+            credentials: Shared credentials (ignored when a transport is injected)
+        """
+        services = getattr(self._local, 'services', None)
+        if services is None or self._local.generation != self._generation:
+            services = self._local.services = {}
+            self._local.generation = self._generation
+
+        key = (api, version, id(credentials))
+        service = services.get(key)
+        if service is None:
+            from googleapiclient.discovery import build
+            if self._http_factory is not None:
+                service = build(
+                    api, version, http=self._http_factory(),
+                    static_discovery=True, cache_discovery=False,
+                )
+            else:
+                service = build(
+                    api, version, credentials=credentials,
+                    static_discovery=True, cache_discovery=False,
+                )
+            services[key] = service
+        return service
+
+    def services(self, scopes: Sequence[str], allow_oauth: bool = True):
+        """
+        Return (docs_service, drive_service), or None when no credentials are configured.
+        """
+        if self.offline:
+            credentials = None
+        else:
+            credentials = self.credentials(scopes, allow_oauth=allow_oauth)
+            if credentials is None:
+                return None
+        return (
+            self.service('docs', 'v1', credentials),
+            self.service('drive', 'v3', credentials),
+        )
+
+    def warm_up(self, scopes: Sequence[str], allow_oauth: bool = True) -> None:
+        """Load and refresh credentials ahead of the first API call.
+
+        Failures are ignored here; they surface on the real call instead.
+        """
+        if self.offline:
+            return
+        try:
+            self.credentials(scopes, allow_oauth=allow_oauth)
+        except Exception:
+            pass
+
+
+_pool: Optional[GoogleClientPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> GoogleClientPool:
+    """Return the process-wide client pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            http_factory = None
+            if os.getenv('GOOGLE_API_FAKE_TRANSPORT', '').strip().lower() in ('1', 'true', 'yes', 'on'):
+                from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp
+                fake = FakeGoogleHttp()
+                http_factory = lambda: fake
+            _pool = GoogleClientPool(http_factory=http_factory)
+        return _pool
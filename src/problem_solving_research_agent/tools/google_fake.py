@@ -0,0 +1,175 @@
+"""In-memory stand-in for the Google Docs and Drive HTTP endpoints.
+
+:class:`FakeGoogleHttp` implements the ``httplib2.Http.request`` interface used
+by ``googleapiclient``, so real service objects can be exercised offline:
+
+    fake = FakeGoogleHttp()
+    get_client_pool().use_transport(lambda: fake)
+
+Documents are kept as plain text so callers can check what a ``batchUpdate``
+actually produced, and every call is recorded in ``fake.calls``. Like the real
+API, indexes count UTF-16 code units. Documents can also be created through
+Drive ``files.create`` with ``appProperties`` and found again with a
+``files.list`` query on them.
+"""
+import itertools
+import json
+import re
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import httplib2
+
+_DOC_CREATE_RE = re.compile(r"^/v1/documents$")
+_DOC_RE = re.compile(r"^/v1/documents/([^/:]+)$")
+_DOC_BATCH_RE = re.compile(r"^/v1/documents/([^/:]+):batchUpdate$")
+_PERMISSION_RE = re.compile(r"^/drive/v3/files/([^/]+)/permissions$")
+_FILES_RE = re.compile(r"^(/upload)?/drive/v3/files$")
+_APP_PROPERTY_RE = re.compile(r"appProperties has \{ key='([^']*)' and value='([^']*)' \}")
+GOOGLE_DOCS_MIME_TYPE = "application/vnd.google-apps.document"
+
+
+class FakeGoogleHttp:
+    """Thread-safe fake transport for the Docs v1 and Drive v3 APIs.
+
+    Args:
+        fail_with: Optional list of HTTP status codes; each request pops the
+            first entry and fails with that status (use 200 to let one through,
+            0 to apply the request but time out before the response arrives)
+        latency: Seconds every request takes, like a round trip to Google
+        retry_after: Seconds sent in the ``Retry-After`` header of injected 429s
+    """
+
+    def __init__(self, fail_with: Optional[List[int]] = None, latency: float = 0.0,
+                 retry_after: Optional[float] = None):
+        self.latency = latency
+        self.retry_after = retry_after
+        self.documents: Dict[str, dict] = {}
+        self.permissions: Dict[str, List[dict]] = {}
+        self.calls: List[dict] = []
+        self.fail_with = list(fail_with or [])
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def request(self, uri, method="GET", body=None, headers=None,
+                redirections=None, connection_type=None):
+        parsed = urlparse(uri)
+        path = parsed.path
+        query = {name: values[0] for name, values in parse_qs(parsed.query).items()}
+        payload = json.loads(body) if body else {}
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls.append({'method': method, 'path': path, 'query': query, 'body': payload})
+            status = self.fail_with.pop(0) if self.fail_with else 200
+            if status >= 400:
+                headers = {'retry-after': str(self.retry_after)} if status == 429 and self.retry_after else {}
+                return self._respond(status, {'error': {'code': status, 'message': 'Injected failure'}}, headers)
+            response = self._dispatch(method, path, query, payload)
+        if status == 0:
+            raise TimeoutError("Injected timeout after the request was applied")
+        return response
+
+    def text(self, document_id: str) -> str:
+        """Return the plain text body of a fake document."""
+        with self._lock:
+            return self.documents[document_id]['text']
+
+    def batch_updates(self, document_id: str) -> List[List[dict]]:
+        """Return the request lists sent to ``batchUpdate`` for a document."""
+        with self._lock:
+            return [
+                call['body'].get('requests', [])
+                for call in self.calls
+                if call['path'] == f"/v1/documents/{document_id}:batchUpdate"
+            ]
+
+    def _dispatch(self, method, path, query, payload):
+        if method == "POST" and _DOC_CREATE_RE.match(path):
+            document_id = f"fake-doc-{next(self._ids)}"
+            self.documents[document_id] = {'title': payload.get('title', ''), 'text': '\n', 'app_properties': {}}
+            return self._respond(200, {'documentId': document_id, 'title': payload.get('title', '')})
+
+        if _FILES_RE.match(path):
+            if method == "POST" and payload.get('mimeType') == GOOGLE_DOCS_MIME_TYPE:
+                document_id = f"fake-doc-{next(self._ids)}"
+                self.documents[document_id] = {
+                    'title': payload.get('name', ''),
+                    'text': '\n',
+                    'app_properties': dict(payload.get('appProperties') or {}),
+                }
+                return self._respond(200, {'id': document_id, 'name': payload.get('name', '')})
+            if method == "GET":
+                wanted = dict(_APP_PROPERTY_RE.findall(query.get('q', '')))
+                files = [
+                    {'id': document_id, 'name': document['title']}
+                    for document_id, document in self.documents.items()
+                    if wanted and all(document['app_properties'].get(k) == v for k, v in wanted.items())
+                ]
+                return self._respond(200, {'files': files})
+
+        match = _DOC_BATCH_RE.match(path)
+        if method == "POST" and match:
+            document = self.documents.get(match.group(1))
+            if document is None:
+                return self._respond(404, {'error': {'code': 404, 'message': 'Document not found'}})
+            replies = []
+            for request in payload.get('requests', []):
+                error = self._apply(document, request)
+                if error:
+                    return self._respond(400, {'error': {'code': 400, 'message': error}})
+                replies.append({})
+            return self._respond(200, {'documentId': match.group(1), 'replies': replies})
+
+        match = _DOC_RE.match(path)
+        if method == "GET" and match and match.group(1) in self.documents:
+            document = self.documents[match.group(1)]
+            end = len(document['text'].encode('utf-16-le')) // 2 + 1
+            return self._respond(200, {
+                'documentId': match.group(1),
+                'title': document['title'],
+                'body': {'content': [{'startIndex': 1, 'endIndex': end, 'paragraph': {'elements': [
+                    {'textRun': {'content': document['text']}}
+                ]}}]},
+            })
+
+        match = _PERMISSION_RE.match(path)
+        if method == "POST" and match:
+            permission = dict(payload, id=f"perm-{next(self._ids)}")
+            self.permissions.setdefault(match.group(1), []).append(permission)
+            return self._respond(200, permission)
+
+        return self._respond(404, {'error': {'code': 404, 'message': f'No fake route for {method} {path}'}})
+
+    @staticmethod
+    def _apply(document, request) -> Optional[str]:
+        # Body index 1 is the first character; the trailing newline is implicit
+        encoded = document['text'].encode('utf-16-le')
+        length = len(encoded) // 2 + 1
+        if 'insertText' in request:
+            spec = request['insertText']
+            if 'endOfSegmentLocation' in spec:
+                index = length - 1
+            else:
+                index = spec['location']['index']
+            if not 1 <= index <= length - 1:
+                return f"insertText index {index} outside document of length {length}"
+            offset = (index - 1) * 2
+            inserted = spec['text'].encode('utf-16-le')
+            document['text'] = (encoded[:offset] + inserted + encoded[offset:]).decode('utf-16-le')
+            return None
+        for kind in ('updateTextStyle', 'updateParagraphStyle', 'createParagraphBullets'):
+            if kind in request:
+                text_range = request[kind]['range']
+                start, end = text_range['startIndex'], text_range['endIndex']
+                if not 1 <= start < end <= length:
+                    return f"{kind} range {start}-{end} outside document of length {length}"
+                return None
+        return None
+
+    @staticmethod
+    def _respond(status, payload, headers=None):
+        response = httplib2.Response({'status': str(status), 'content-type': 'application/json', **(headers or {})})
+        return response, json.dumps(payload).encode('utf-8')
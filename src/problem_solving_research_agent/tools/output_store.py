@@ -0,0 +1,336 @@
+"""Content-addressed store for generated documents with a SQLite index.
+
+Documents are stored once per content hash under
+``output/objects/<first two hex digits>/<sha256>.<format>[.gz|.zst]``. Each is
+written to a temporary file in its final directory and renamed into place, so
+readers never see a partial document and concurrent saves cannot overwrite
+each other. Saving identical content again only adds an index row.
+
+``output/index.sqlite3`` records every save (problem hash, title, filename,
+creation time, sizes), so past reports are found through an index lookup
+instead of a scan of the output directory.
+
+With write-behind on, :meth:`OutputStore.save_async` returns the document's
+final path immediately; a background thread compresses, writes and indexes
+it. Pending writes are flushed when the process exits.
+"""
+import atexit
+import gzip
+import hashlib
+import os
+import queue
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import Future
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from problem_solving_research_agent.cache import normalize_problem_statement
+from problem_solving_research_agent.metrics import OUTPUT_STORE_PENDING, OUTPUT_STORE_WRITES
+
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    content_hash TEXT NOT NULL,
+    problem_hash TEXT,
+    title TEXT,
+    filename TEXT NOT NULL,
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    compression TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_problem_hash ON documents (problem_hash, created_at);
+CREATE INDEX IF NOT EXISTS documents_title ON documents (title, created_at);
+CREATE INDEX IF NOT EXISTS documents_content_hash ON documents (content_hash);
+CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at);
+"""
+
+_COLUMNS = (
+    "id", "content_hash", "problem_hash", "title", "filename", "format",
+    "path", "compression", "size", "stored_size", "created_at",
+)
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def problem_hash(problem_statement: str) -> str:
+    """Hash a problem statement, normalized like result cache keys."""
+    return hashlib.sha256(normalize_problem_statement(problem_statement).encode("utf-8")).hexdigest()
+
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def document_title(content: str, fallback: str = "document") -> str:
+    """Return a document's first markdown heading, or ``fallback`` shortened."""
+    match = _HEADING_RE.search(content)
+    if match:
+        title = match.group(1)
+    else:
+        title = fallback.strip().splitlines()[0] if fallback.strip() else "document"
+    return title if len(title) <= 80 else title[:77].rstrip() + "..."
+
+
+def slugify(text: str) -> str:
+    return _SLUG_RE.sub("_", text.lower()).strip("_")[:60] or "document"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _compress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        # mtime=0 keeps the stored bytes a function of the content alone
+        return gzip.compress(data, mtime=0)
+    if compression == "zstd":
+        return _zstd().ZstdCompressor().compress(data)
+    return data
+
+
+def _decompress(data: bytes, compression: str) -> bytes:
+    if compression == "gzip":
+        return gzip.decompress(data)
+    if compression == "zstd":
+        return _zstd().ZstdDecompressor().decompress(data)
+    return data
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """Write ``data`` to a temporary file next to ``path`` and rename it into place."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def read_object(path: Path, compression: str = "none") -> str:
+    """Return the text of a stored object file."""
+    return _decompress(Path(path).read_bytes(), compression).decode("utf-8")
+
+
+class OutputStore:
+    """Content-addressed document files plus a SQLite index of every save.
+
+    Args:
+        root: Directory holding ``objects/`` and ``index.sqlite3``
+        compression: ``none``, ``gzip`` or ``zstd`` (falls back to gzip
+            without the ``zstandard`` package)
+        write_behind: Let :meth:`save_async` hand writes to a background thread
+    """
+
+    def __init__(self, root: str = "output", compression: str = "none", write_behind: bool = True):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {', '.join(COMPRESSIONS)}, got {compression!r}")
+        if compression == "zstd" and _zstd() is None:
+            # Reported once per process, not for every store opened
+            warnings.warn("zstandard is not installed; compressing output documents with gzip", RuntimeWarning)
+            compression = "gzip"
+        self.root = Path(root)
+        self.compression = compression
+        self.write_behind = write_behind
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.root / "index.sqlite3"), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def path_for(self, digest: str, file_format: str = "md") -> Path:
+        """Where the document with content hash ``digest`` is stored."""
+        return self.root / "objects" / digest[:2] / f"{digest}.{file_format}{COMPRESSIONS[self.compression]}"
+
+    def save(
+        self,
+        content: str,
+        filename: str,
+        file_format: str = "md",
+        title: Optional[str] = None,
+        problem_statement: Optional[str] = None,
+    ) -> dict:
+        """Store a document and index it; returns its index record.
+
+        Args:
+            content: Document text
+            filename: Human-readable name, kept in the index
+            file_format: Extension of the stored object (md, txt, ...)
+            title: Document title for lookups (defaults to ``filename``)
+            problem_statement: Problem the document answers, for lookups
+        """
+        digest = content_hash(content)
+        return self._write(digest, content, filename, file_format, title, problem_statement)
+
+    def save_async(
+        self,
+        content: str,
+        filename: str,
+        file_format: str = "md",
+        title: Optional[str] = None,
+        problem_statement: Optional[str] = None,
+    ) -> Tuple[Path, Future]:
+        """Queue a document for writing; returns its final path and a Future.
+
+        The Future resolves to the index record once the document is on disk.
+        Without write-behind the document is written before this returns.
+        """
+        digest = content_hash(content)
+        future: Future = Future()
+        args = (digest, content, filename, file_format, title, problem_statement)
+        if not self.write_behind:
+            future.set_result(self._write(*args))
+            return self.path_for(digest, file_format), future
+        self._start_writer()
+        OUTPUT_STORE_PENDING.inc()
+        self._queue.put((future, args))
+        return self.path_for(digest, file_format), future
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until queued writes are on disk; False if ``timeout`` ran out."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def read(self, record: dict) -> str:
+        """Return the text of an indexed document."""
+        return read_object(self.root / record["path"], record["compression"])
+
+    def get(self, digest: str) -> Optional[str]:
+        """Return the document with content hash ``digest``, or None."""
+        records = self._select("WHERE content_hash = ? ORDER BY created_at DESC LIMIT 1", (digest,))
+        return self.read(records[0]) if records else None
+
+    def find(
+        self,
+        problem_statement: Optional[str] = None,
+        title: Optional[str] = None,
+        limit: int = 20,
+    ) -> List[dict]:
+        """Return index records for a problem statement or exact title, newest first."""
+        if problem_statement is not None:
+            return self._select(
+                "WHERE problem_hash = ? ORDER BY created_at DESC LIMIT ?", (problem_hash(problem_statement), limit)
+            )
+        if title is not None:
+            return self._select("WHERE title = ? ORDER BY created_at DESC LIMIT ?", (title, limit))
+        return self.recent(limit)
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        """Return the most recently saved documents' index records."""
+        return self._select("ORDER BY created_at DESC LIMIT ?", (limit,))
+
+    def documents(self, file_format: Optional[str] = None) -> List[dict]:
+        """Return one index record per stored document (its latest save), oldest first."""
+        where = "WHERE format = ?" if file_format else ""
+        return self._select(
+            f"WHERE id IN (SELECT MAX(id) FROM documents {where} GROUP BY content_hash) ORDER BY created_at",
+            (file_format,) if file_format else (),
+        )
+
+    def _select(self, where: str, params: tuple) -> List[dict]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM documents {where}", params).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def _write(
+        self,
+        digest: str,
+        content: str,
+        filename: str,
+        file_format: str,
+        title: Optional[str],
+        problem_statement: Optional[str],
+    ) -> dict:
+        path = self.path_for(digest, file_format)
+        data = content.encode("utf-8")
+        if path.exists():
+            OUTPUT_STORE_WRITES.inc(labels={"result": "duplicate"})
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_atomic(path, _compress(data, self.compression))
+            OUTPUT_STORE_WRITES.inc(labels={"result": "written"})
+
+        record = {
+            "content_hash": digest,
+            "problem_hash": problem_hash(problem_statement) if problem_statement else None,
+            "title": title or filename,
+            "filename": filename,
+            "format": file_format,
+            "path": path.relative_to(self.root).as_posix(),
+            "compression": self.compression,
+            "size": len(data),
+            "stored_size": path.stat().st_size,
+            "created_at": time.time(),
+        }
+        names = list(record)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO documents ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                [record[name] for name in names],
+            )
+        record["id"] = cursor.lastrowid
+        return record
+
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._drain, name="output-store-writer", daemon=True)
+            self._writer.start()
+        atexit.register(self.flush)
+
+    def _drain(self) -> None:
+        while True:
+            future, args = self._queue.get()
+            try:
+                future.set_result(self._write(*args))
+            except Exception as e:
+                OUTPUT_STORE_WRITES.inc(labels={"result": "error"})
+                print(f"⚠️ Could not save {args[2]}.{args[3]} to the output store: {e}")
+                future.set_exception(e)
+            finally:
+                OUTPUT_STORE_PENDING.dec()
+                self._queue.task_done()
+
+
+_store: Optional[OutputStore] = None
+_store_lock = threading.Lock()
+
+
+def get_output_store() -> OutputStore:
+    """Return the process-wide output store configured by ``OUTPUT_STORE_*``."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = OutputStore(
+                os.getenv("OUTPUT_STORE_DIR", "output"),
+                compression=os.getenv("OUTPUT_STORE_COMPRESSION", "none").strip().lower(),
+                write_behind=os.getenv("OUTPUT_STORE_WRITE_BEHIND", "true").strip().lower() in ("1", "true", "yes", "on"),
+            )
+        return _store
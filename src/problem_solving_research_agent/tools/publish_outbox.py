@@ -0,0 +1,633 @@
+"""Durable outbox that publishes documents to Google Docs in the background.
+
+The Google Docs tools no longer call the API inside the agent's tool call.
+They record the document in a SQLite outbox and return a ``publish://``
+handle at once; worker threads then create the document, insert its content
+and share it. The crew never waits for Google, and a transient API failure no
+longer turns into an error message the agent has to react to.
+
+* Every job is keyed by a hash of its kind, title and content (the
+  idempotency key). Submitting the same document again returns the existing
+  job, so retried tool calls and re-run crews never create a second copy.
+* Progress is stored after each step (document ID after ``create``, the
+  number of ``batchUpdate`` batches applied, the permission grant), so a
+  retry or a restarted process continues where the last attempt stopped
+  instead of creating another document.
+* A call can succeed at Google and still time out here. Documents are
+  therefore created through Drive with the idempotency key in their
+  ``appProperties``; a job whose create was sent looks the document up by
+  that key before creating it again. Before re-sending a batch, the
+  document's end index is compared with the one recorded after the last
+  applied batch, so a batch applied by a timed-out call is not applied twice.
+* Retryable failures (429, 5xx, rate-limit 403s, network errors) are retried
+  with exponential backoff and jitter; a 429 pauses every worker. All calls
+  share one bucket of ``GOOGLE_API_WRITES_PER_MINUTE`` so bursts of publishes
+  stay inside the Docs API write quota.
+* Jobs that fail permanently (including invalid or revoked credentials), or fail ``PUBLISH_MAX_ATTEMPTS`` times in a
+  row without completing a step, are moved to the dead letters (:meth:`PublishOutbox.dead_letters`) with
+  their last error, and can be retried with :meth:`PublishOutbox.requeue`.
+  A failed public permission grant leaves the document published but
+  private, with the error recorded, instead of being ignored.
+* A job being published is leased to its process (see :mod:`leases`). Jobs
+  whose process exited or stopped renewing its lease go back to pending;
+  jobs other live processes sharing the outbox are publishing are left alone.
+
+:func:`resolve_publish_handles` replaces handles in a result with the
+document URLs once they are published; :func:`settle_publishes` first waits
+for them, and :func:`flush_publishes` lets a command wait for every document
+it queued before the process (and its daemon workers) exits.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from problem_solving_research_agent.leases import PROCESS_OWNER, Heartbeat, expired
+from problem_solving_research_agent.metrics import PUBLISH_OUTBOX_JOBS, time_google_call
+from problem_solving_research_agent.rate_limit import TokenBucket
+from problem_solving_research_agent.tools.docs_builder import markdown_to_batches, plain_text_batches, utf16_len
+from problem_solving_research_agent.tools.google_clients import get_client_pool
+
+PENDING = "pending"
+RUNNING = "running"
+PUBLISHED = "published"
+DEAD = "dead"
+FINISHED = (PUBLISHED, DEAD)
+
+HANDLE_PREFIX = "publish://"
+# Statuses worth retrying; 403 only when Google reports a rate limit
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Seconds of write quota the workers may spend at once
+BURST_SECONDS = 10.0
+# Workers notice jobs added by other processes within this many seconds
+POLL_SECONDS = 5.0
+# Drive appProperties entry holding a document's idempotency key
+KEY_PROPERTY = "publishKey"
+DOCS_MIME_TYPE = "application/vnd.google-apps.document"
+# End index of a new, empty document (its body is a single newline)
+EMPTY_DOC_END_INDEX = 2
+
+_HANDLE_RE = re.compile(r"`?publish://([0-9a-f]{64})`?")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS publish_jobs (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    status TEXT NOT NULL,
+    doc_id TEXT,
+    create_sent INTEGER NOT NULL DEFAULT 0,
+    batches_done INTEGER NOT NULL DEFAULT 0,
+    end_index INTEGER,
+    shared INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS publish_jobs_due ON publish_jobs (status, next_attempt_at);
+"""
+# Added after the first release; outboxes created before get them on open
+_ADDED_COLUMNS = {"create_sent": "INTEGER NOT NULL DEFAULT 0", "end_index": "INTEGER"}
+
+_COLUMNS = (
+    "key", "kind", "title", "content", "status", "doc_id", "create_sent", "batches_done", "end_index",
+    "shared", "attempts", "next_attempt_at", "last_error", "created_at", "updated_at",
+)
+
+
+def publish_key(kind: str, title: str, content: str) -> str:
+    """Idempotency key of a document: a hash of its kind, title and content."""
+    return hashlib.sha256(f"{kind}\0{title}\0{content}".encode("utf-8")).hexdigest()
+
+
+def doc_url(doc_id: str) -> str:
+    return f"https://docs.google.com/document/d/{doc_id}/edit"
+
+
+def _kinds() -> dict:
+    # Deferred: the tools module imports this one when it first publishes
+    from problem_solving_research_agent.tools.google_docs import DOCS_SCOPES, MARKDOWN, PLAIN, SIMPLE_DOCS_SCOPES
+
+    return {
+        MARKDOWN: (DOCS_SCOPES, True, markdown_to_batches),
+        PLAIN: (SIMPLE_DOCS_SCOPES, False, plain_text_batches),
+    }
+
+
+class PublishError(Exception):
+    """A publish step failed.
+
+    Attributes:
+        retryable: Whether trying again may succeed
+        status: HTTP status of the failed call, if it got a response
+        retry_after: Seconds the API asked to wait, if it said
+    """
+
+    def __init__(
+        self,
+        message: str,
+        retryable: bool,
+        status: Optional[int] = None,
+        retry_after: Optional[float] = None,
+    ):
+        super().__init__(message)
+        self.retryable = retryable
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _classify(error: Exception) -> PublishError:
+    from google.auth.exceptions import GoogleAuthError, TransportError
+    from googleapiclient.errors import HttpError
+
+    if isinstance(error, GoogleAuthError) and not isinstance(error, TransportError):
+        # Invalid, revoked or misconfigured credentials do not fix themselves;
+        # google-auth flags the few refresh failures worth retrying
+        return PublishError(
+            f"Google credentials rejected: {type(error).__name__}: {error}",
+            retryable=bool(getattr(error, "retryable", False)),
+        )
+    if not isinstance(error, HttpError):
+        # Timeouts, dropped connections and other transport errors
+        return PublishError(f"{type(error).__name__}: {error}", retryable=True)
+    status = int(error.resp.status)
+    message = str(error)
+    retryable = status in RETRYABLE_STATUSES or (status == 403 and "ratelimitexceeded" in message.lower())
+    retry_after = None
+    try:
+        retry_after = float(error.resp.get("retry-after"))
+    except (TypeError, ValueError):
+        pass
+    return PublishError(f"Google API error {status}: {message}", retryable, status, retry_after)
+
+
+class PublishOutbox:
+    """SQLite outbox of Google Docs publish jobs and the workers draining it.
+
+    Args:
+        path: Database file path
+        workers: Documents published concurrently
+        max_attempts: Failed attempts in a row (without progress) before a
+            retryable failure becomes a dead letter
+        base_delay: Backoff after the first failure, doubled for each further one
+        max_delay: Longest backoff between attempts
+        writes_per_minute: Google API calls per minute across all workers (0 for unlimited)
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/publish_outbox.sqlite3",
+        workers: int = 2,
+        max_attempts: int = 8,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+        writes_per_minute: float = 60,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.workers = max(workers, 1)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        # Signalled whenever a job is added, finished or rescheduled
+        self._changed = threading.Condition(self._lock)
+        self._bucket = TokenBucket(writes_per_minute, burst_seconds=BURST_SECONDS)
+        self._paused_until = 0.0
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        # Keys this process enqueued that are not finished yet, for flush()
+        self._enqueued = set()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(publish_jobs)")}
+        for column, kind in _ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE publish_jobs ADD COLUMN {column} {kind}")
+        # A running job's updated_at is its lease
+        self.heartbeat = Heartbeat(self._renew, name="publish-outbox-heartbeat")
+
+    def enqueue(self, kind: str, title: str, content: str) -> dict:
+        """Add a document to the outbox, or return its existing job.
+
+        A dead job submitted again is given a fresh set of attempts.
+        """
+        key = publish_key(kind, title, content)
+        now = time.time()
+        with self._changed:
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO publish_jobs "
+                "(key, kind, title, content, status, next_attempt_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, title, content, PENDING, now, now, now),
+            ).rowcount
+            if not inserted:
+                self._conn.execute(
+                    "UPDATE publish_jobs SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+                    "WHERE key = ? AND status = ?",
+                    (PENDING, now, now, key, DEAD),
+                )
+            job = self._get(key)
+            if job["status"] not in FINISHED:
+                self._enqueued.add(key)
+            self._changed.notify_all()
+        PUBLISH_OUTBOX_JOBS.inc(labels={"result": "enqueued" if inserted else "duplicate"})
+        return job
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._get(key)
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Wait until a job is published or dead; returns it as it stands at the timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._changed:
+            while True:
+                job = self._get(key)
+                if job is None or job["status"] in FINISHED:
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return job
+                self._changed.wait(remaining)
+
+    def flush(self, timeout: Optional[float] = None) -> List[dict]:
+        """Wait for the jobs this process enqueued; returns those still unfinished at the timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            keys = list(self._enqueued)
+        unfinished = []
+        for key in keys:
+            job = self.wait(key, None if deadline is None else max(deadline - time.monotonic(), 0))
+            if job is not None and job["status"] not in FINISHED:
+                unfinished.append(job)
+            else:
+                with self._lock:
+                    self._enqueued.discard(key)
+        return unfinished
+
+    def dead_letters(self, limit: int = 50) -> List[dict]:
+        """Jobs that will not be retried, most recent first."""
+        with self._lock:
+            return self._select("WHERE status = ? ORDER BY updated_at DESC LIMIT ?", (DEAD, limit))
+
+    def requeue(self, key: str) -> bool:
+        """Give a dead job a fresh set of attempts."""
+        now = time.time()
+        with self._changed:
+            updated = self._conn.execute(
+                "UPDATE publish_jobs SET status = ?, attempts = 0, next_attempt_at = ?, updated_at = ? "
+                "WHERE key = ? AND status = ?",
+                (PENDING, now, now, key, DEAD),
+            ).rowcount
+            self._changed.notify_all()
+        return bool(updated)
+
+    def stats(self) -> dict:
+        """Job counts by status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM publish_jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in (PENDING, RUNNING, PUBLISHED, DEAD)}
+        counts.update(dict(rows))
+        return counts
+
+    def start(self) -> "PublishOutbox":
+        """Start the workers; jobs a dead process left running are retried."""
+        with self._changed:
+            if self._threads:
+                return self
+            self._stopped = False
+            self._reclaim()
+            for n in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"publish-outbox-{n}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the workers after the jobs they are publishing."""
+        with self._changed:
+            self._stopped = True
+            self._changed.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+    def _get(self, key: str) -> Optional[dict]:
+        rows = self._select("WHERE key = ?", (key,))
+        return rows[0] if rows else None
+
+    def _select(self, where: str, params: tuple) -> List[dict]:
+        rows = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM publish_jobs {where}", params).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def _update(self, key: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._changed:
+            self._conn.execute(f"UPDATE publish_jobs SET {assignments} WHERE key = ?", (*fields.values(), key))
+            self._changed.notify_all()
+
+    def _renew(self, keys, now: float) -> None:
+        keys = list(keys)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE publish_jobs SET updated_at = ? WHERE owner = ? AND status = ? "
+                f"AND key IN ({', '.join('?' * len(keys))})",
+                (now, PROCESS_OWNER, RUNNING, *keys),
+            )
+
+    def _release(self, key: str, **fields) -> None:
+        """Record a job's outcome and give up its lease."""
+        self._update(key, owner=None, **fields)
+        self.heartbeat.release(key)
+        if fields.get("status") in FINISHED:
+            with self._lock:
+                self._enqueued.discard(key)
+
+    def _reclaim(self) -> int:
+        """Return running jobs whose lease expired to pending; called with the lock held."""
+        now = time.time()
+        held = self.heartbeat.held()
+        rows = self._conn.execute(
+            "SELECT key, owner, updated_at FROM publish_jobs WHERE status = ?", (RUNNING,)
+        ).fetchall()
+        reclaimed = 0
+        for key, owner, updated_at in rows:
+            if key not in held and expired(owner, updated_at, now):
+                # Conditional on the lease, so a renewal in between wins
+                reclaimed += self._conn.execute(
+                    "UPDATE publish_jobs SET status = ?, owner = NULL, next_attempt_at = ?, updated_at = ? "
+                    "WHERE key = ? AND status = ? AND owner IS ? AND updated_at = ?",
+                    (PENDING, now, now, key, RUNNING, owner, updated_at),
+                ).rowcount
+        return reclaimed
+
+    def _claim(self) -> Tuple[Optional[dict], Optional[float]]:
+        """Take the next due job, or return how long until one is due."""
+        now = time.time()
+        jobs = self._select(
+            "WHERE status = ? AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT 1", (PENDING, now)
+        )
+        if jobs:
+            job = jobs[0]
+            # Conditional, so a worker in another process cannot claim it as well
+            claimed = self._conn.execute(
+                "UPDATE publish_jobs SET status = ?, owner = ?, updated_at = ? WHERE key = ? AND status = ?",
+                (RUNNING, PROCESS_OWNER, now, job["key"], PENDING),
+            ).rowcount
+            if claimed:
+                self.heartbeat.hold(job["key"])
+            return (job, None) if claimed else (None, 0.0)
+        if self._reclaim():
+            return None, 0.0
+        row = self._conn.execute(
+            "SELECT MIN(next_attempt_at) FROM publish_jobs WHERE status = ?", (PENDING,)
+        ).fetchone()
+        return None, (row[0] - now if row and row[0] is not None else None)
+
+    def _work(self) -> None:
+        while True:
+            with self._changed:
+                while True:
+                    if self._stopped:
+                        return
+                    job, due_in = self._claim()
+                    if job is not None:
+                        break
+                    self._changed.wait(POLL_SECONDS if due_in is None else min(due_in, POLL_SECONDS))
+            try:
+                self._publish(job)
+            except PublishError as e:
+                self._failed(job, e)
+            except Exception as e:
+                self._failed(job, PublishError(f"{type(e).__name__}: {e}", retryable=False))
+
+    def _publish(self, job: dict) -> None:
+        scopes, allow_oauth, batches = _kinds()[job["kind"]]
+        services = get_client_pool().services(scopes, allow_oauth=allow_oauth)
+        if services is None:
+            raise PublishError("Google API credentials not found (see GOOGLE_SETUP.md)", retryable=False)
+        docs_service, drive_service = services
+
+        doc_id = job["doc_id"]
+        start, end_index = job["batches_done"], job["end_index"]
+        requests = list(batches(job["content"]))
+        if doc_id is None:
+            # An earlier attempt may have created it and timed out on the response
+            doc_id = self._find_document(drive_service, job["key"]) if job["create_sent"] else None
+            if doc_id is None:
+                self._update(job["key"], create_sent=1)
+                doc_id = self._create_document(drive_service, job["key"], job["title"])
+            end_index = EMPTY_DOC_END_INDEX
+            # Recorded before anything else, so no retry creates a second document
+            self._update(job["key"], doc_id=doc_id, end_index=end_index, attempts=0)
+        elif start < len(requests):
+            # The batch after the last recorded one may have been applied by a
+            # call that timed out; it changed the document's length if so
+            current = self._end_index(docs_service, doc_id)
+            if end_index is not None and current != end_index:
+                start += 1
+            end_index = current
+            self._update(job["key"], batches_done=start, end_index=end_index)
+
+        for n in range(start, len(requests)):
+            self._call(
+                "docs.batchUpdate",
+                lambda: docs_service.documents().batchUpdate(documentId=doc_id, body={"requests": requests[n]}),
+            )
+            growth = _growth(requests[n])
+            end_index = end_index + growth if growth is not None else self._end_index(docs_service, doc_id)
+            self._update(job["key"], batches_done=n + 1, end_index=end_index, attempts=0)
+
+        share_error = None
+        if not job["shared"]:
+            try:
+                self._call(
+                    "drive.permissions.create",
+                    lambda: drive_service.permissions().create(fileId=doc_id, body={"role": "reader", "type": "anyone"}),
+                )
+            except PublishError as e:
+                if e.retryable:
+                    raise
+                # The document exists; it stays private instead of being lost
+                share_error = f"Published but not shared publicly: {e}"
+                print(f"⚠️ {job['title']}: {share_error}")
+        self._release(job["key"], shared=int(share_error is None), status=PUBLISHED, last_error=share_error)
+        PUBLISH_OUTBOX_JOBS.inc(labels={"result": "published"})
+
+    def _create_document(self, drive_service, key: str, title: str) -> str:
+        """Create an empty Google Doc that carries its idempotency key."""
+        body = {"name": title, "mimeType": DOCS_MIME_TYPE, "appProperties": {KEY_PROPERTY: key}}
+        return self._call("drive.files.create", lambda: drive_service.files().create(body=body, fields="id"))["id"]
+
+    def _find_document(self, drive_service, key: str) -> Optional[str]:
+        """ID of the document created earlier for ``key``, if any."""
+        query = f"appProperties has {{ key='{KEY_PROPERTY}' and value='{key}' }} and trashed = false"
+        found = self._call(
+            "drive.files.list",
+            lambda: drive_service.files().list(q=query, fields="files(id)", pageSize=1),
+            pace=False,
+        )
+        files = found.get("files") or []
+        return files[0]["id"] if files else None
+
+    def _end_index(self, docs_service, doc_id: str) -> int:
+        doc = self._call(
+            "docs.get",
+            lambda: docs_service.documents().get(documentId=doc_id, fields="body/content/endIndex"),
+            pace=False,
+        )
+        return doc["body"]["content"][-1]["endIndex"]
+
+    def _call(self, operation: str, request: Callable[[], object], pace: bool = True) -> dict:
+        """Execute a request; ``pace`` waits for the write quota first (reads do not use it)."""
+        if pace:
+            self._pace()
+        try:
+            with time_google_call(operation):
+                return request().execute()
+        except Exception as e:
+            raise _classify(e) from e
+
+    def _pace(self) -> None:
+        """Wait for the write quota and any pause after a 429."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(self._paused_until - now, self._bucket.wait_time(1, now))
+                if wait <= 0:
+                    self._bucket.take(1, now)
+                    return
+            time.sleep(wait)
+
+    def _failed(self, job: dict, error: PublishError) -> None:
+        attempts = job["attempts"] + 1
+        if not error.retryable or attempts >= self.max_attempts:
+            self._release(job["key"], status=DEAD, attempts=attempts, last_error=str(error))
+            PUBLISH_OUTBOX_JOBS.inc(labels={"result": "dead"})
+            print(f"❌ Could not publish {job['title']!r} after {attempts} attempt(s): {error}")
+            return
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+        delay = max(delay, error.retry_after or 0.0)
+        if error.status == 429 or error.retry_after is not None:
+            # The quota is shared: hold every worker, not just this job
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        self._release(
+            job["key"],
+            status=PENDING,
+            attempts=attempts,
+            next_attempt_at=time.time() + delay,
+            last_error=str(error),
+        )
+        PUBLISH_OUTBOX_JOBS.inc(labels={"result": "retried"})
+
+
+def _growth(requests: List[dict]) -> Optional[int]:
+    """UTF-16 units a batch adds to the document, or None when the requests do not tell.
+
+    ``createParagraphBullets`` strips the tabs that encode nesting, so after a
+    batch with bullets the end index is read back instead.
+    """
+    if any("createParagraphBullets" in request for request in requests):
+        return None
+    return sum(utf16_len(request["insertText"]["text"]) for request in requests if "insertText" in request)
+
+
+def handles(text: str) -> List[str]:
+    """Idempotency keys of the ``publish://`` handles in ``text``, in order."""
+    return list(dict.fromkeys(_HANDLE_RE.findall(text or "")))
+
+
+def resolve_publish_handles(text: str, outbox: Optional[PublishOutbox] = None) -> str:
+    """Replace handles of published documents with their URLs; others stay."""
+    outbox = outbox or get_publish_outbox()
+    if outbox is None or HANDLE_PREFIX not in (text or ""):
+        return text
+
+    def expand(match: "re.Match") -> str:
+        job = outbox.get(match.group(1))
+        return doc_url(job["doc_id"]) if job and job["status"] == PUBLISHED else match.group(0)
+
+    return _HANDLE_RE.sub(expand, text)
+
+
+def settle_publishes(text: str, timeout: Optional[float] = None) -> Tuple[str, List[dict]]:
+    """Wait up to ``timeout`` seconds for the documents ``text`` refers to by handle.
+
+    Returns:
+        ``text`` with the handles of published documents replaced by their
+        URLs, and the :func:`publish_status` of each document
+    """
+    keys = handles(text)
+    outbox = get_publish_outbox() if keys else None
+    if outbox is None:
+        return text, []
+    deadline = None if timeout is None else time.monotonic() + timeout
+    jobs = [outbox.wait(key, None if deadline is None else max(deadline - time.monotonic(), 0)) for key in keys]
+    return resolve_publish_handles(text, outbox), [publish_status(job) for job in jobs if job is not None]
+
+
+def flush_publishes(timeout: Optional[float] = None) -> List[dict]:
+    """Wait for every document this process queued; returns the jobs still unfinished.
+
+    Does nothing when the outbox was never used in this process.
+    """
+    with _outbox_lock:
+        outbox = _outbox
+    return outbox.flush(timeout) if outbox is not None else []
+
+
+def publish_status(job: dict) -> dict:
+    """JSON-friendly status of a publish job."""
+    return {
+        "title": job["title"],
+        "status": job["status"],
+        "url": doc_url(job["doc_id"]) if job["status"] == PUBLISHED else None,
+        "error": job["last_error"],
+        "attempts": job["attempts"],
+        "summary": describe(job),
+    }
+
+
+def describe(job: dict) -> str:
+    """One status line for a publish job."""
+    if job["status"] == PUBLISHED:
+        note = f" ({job['last_error']})" if job["last_error"] else ""
+        return f"🔗 {job['title']}: {doc_url(job['doc_id'])}{note}"
+    if job["status"] == DEAD:
+        return f"❌ {job['title']}: not published: {job['last_error']}"
+    retry = f", attempt {job['attempts'] + 1}" if job["attempts"] else ""
+    return f"⏳ {job['title']}: publishing to Google Docs{retry}"
+
+
+_outbox: Optional[PublishOutbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_publish_outbox() -> Optional[PublishOutbox]:
+    """Return the process-wide outbox with its workers running, or None when
+    ``PUBLISH_OUTBOX_ENABLED`` is off (the tools then publish inline)."""
+    global _outbox
+    if os.getenv("PUBLISH_OUTBOX_ENABLED", "true").strip().lower() not in ("1", "true", "yes", "on"):
+        return None
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = PublishOutbox(
+                os.getenv("PUBLISH_OUTBOX_DB_PATH", ".cache/publish_outbox.sqlite3"),
+                workers=int(os.getenv("PUBLISH_WORKERS", "2")),
+                max_attempts=int(os.getenv("PUBLISH_MAX_ATTEMPTS", "8")),
+                writes_per_minute=float(os.getenv("GOOGLE_API_WRITES_PER_MINUTE", "60")),
+            ).start()
+        return _outbox
@@ -1,16 +1,11 @@
 import streamlit as st
+import functools
 import sys
 import os
 from pathlib import Path
-from io import BytesIO
 import tempfile
+import time
 from datetime import datetime
-import markdown
-from bs4 import BeautifulSoup
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -28,7 +23,30 @@ st.set_page_config(
 src_path = Path(__file__).parent / "src"
 sys.path.insert(0, str(src_path))
 
-from problem_solving_research_agent.crew import ProblemSolvingResearchAgentCrew
+from problem_solving_research_agent.artifacts import get_artifact_cache
+from problem_solving_research_agent.jobs import DONE, ERROR, QueueFull, get_job_queue
+from problem_solving_research_agent.metrics import PDF_RENDER_SECONDS, PDF_RENDERS_IN_FLIGHT, start_metrics_server
+from problem_solving_research_agent.rate_limit import get_rate_limiter, rate_limiting_enabled
+from problem_solving_research_agent.runner import result_cache
+from problem_solving_research_agent.streaming import get_answer_streams, stream_text, streaming_enabled
+from problem_solving_research_agent.tools.publish_outbox import (
+    FINISHED,
+    describe,
+    get_publish_outbox,
+    handles,
+    resolve_publish_handles,
+)
+
+JOB_POLL_SECONDS = 1.0
+# Hand control back to the poll loop when no token arrives for this long
+STREAM_IDLE_SECONDS = 15.0
+# Render settings that change the PDF bytes; part of the artifact cache key
+PDF_OPTIONS = {"renderer": "markdown-it", "pagesize": "A4"}
+
+# Expose /metrics on METRICS_PORT (once per process, survives reruns)
+start_metrics_server()
+# Buffer streamed answer tokens per job so reruns can replay them
+get_answer_streams()
 
 # Custom CSS for mobile responsiveness
 st.markdown("""
@@ -81,53 +99,85 @@ st.markdown("""
 
 def markdown_to_pdf(markdown_content, filename):
     """Convert markdown content to PDF"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    story = []
+    with PDF_RENDERS_IN_FLIGHT.track(), PDF_RENDER_SECONDS.time():
+        return _render_pdf(markdown_content)
+
+def _render_pdf(markdown_content):
+    """Render markdown content into an in-memory PDF buffer"""
+    # The PDF stack is imported on first render to keep cold starts fast
+    from problem_solving_research_agent.pdf_renderer import render_pdf
+    return render_pdf(markdown_content)
+
+def run_crewai_workflow(problem_statement):
+    """Queue the CrewAI workflow in the background and return its job ID
+
+    Identical problems already queued or running return that job's ID instead
+    """
+    return get_job_queue().submit(problem_statement)
+
+def pdf_download(result):
+    """PDF bytes for a result, rendered on first download and shared across sessions"""
+    return get_artifact_cache().get_or_render(
+        "pdf", result, lambda content: markdown_to_pdf(content, None).getvalue(), PDF_OPTIONS
+    )
+
+def render_result(result, timestamp):
+    """Show a finished solution with PDF and markdown downloads
+
+    Returns True while Google Docs queued by the run are still being published
+    """
+    filename = f"CrewAI_Solution_{timestamp}.pdf"
+    outbox = get_publish_outbox()
+    publishes = [outbox.get(key) for key in handles(result)] if outbox is not None else []
+    publishes = [job for job in publishes if job is not None]
+    # Handles of published documents become their URLs
+    result = resolve_publish_handles(result, outbox)
     
-    # Convert markdown to HTML
-    html = markdown.markdown(markdown_content)
-    soup = BeautifulSoup(html, 'html.parser')
+    st.success("✅ Solution generated successfully!")
+    for job in publishes:
+        st.caption(describe(job))
     
-    # Process HTML elements
-    for element in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'li']):
-        if element.name.startswith('h'):
-            # Headers
-            level = int(element.name[1])
-            if level == 1:
-                style = styles['Title']
-            elif level == 2:
-                style = styles['Heading1']
-            elif level == 3:
-                style = styles['Heading2']
-            else:
-                style = styles['Heading3']
-            story.append(Paragraph(element.get_text(), style))
-            story.append(Spacer(1, 12))
-        elif element.name == 'p':
-            # Paragraphs
-            story.append(Paragraph(element.get_text(), styles['Normal']))
-            story.append(Spacer(1, 12))
-        elif element.name in ['ul', 'ol']:
-            # Lists
-            for li in element.find_all('li'):
-                story.append(Paragraph(f"• {li.get_text()}", styles['Normal']))
-            story.append(Spacer(1, 12))
+    # Mobile-friendly results display
+    st.markdown("---")
+    st.markdown("### 📋 Your AI-Generated Solution")
     
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
-def run_crewai_workflow(problem_statement):
-    """Run the CrewAI workflow and return the result"""
-    try:
-        inputs = {'problem_statement': problem_statement}
-        crew = ProblemSolvingResearchAgentCrew().crew()
-        result = crew.kickoff(inputs=inputs)
-        return str(result)
-    except Exception as e:
-        return f"Error running CrewAI workflow: {str(e)}"
+    # Compact preview with mobile-friendly styling
+    with st.container():
+        st.markdown('<div class="result-container">', unsafe_allow_html=True)
+        
+        # Collapsible preview for mobile
+        with st.expander("📖 View Full Solution", expanded=True):
+            st.markdown(result)
+        
+        st.markdown('</div>', unsafe_allow_html=True)
+    
+    # Mobile-friendly download section
+    st.markdown("### 📥 Download Options")
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        # PDF Download: rendered when first clicked, then served from the artifact cache
+        st.download_button(
+            label="📄 Download PDF",
+            data=functools.partial(pdf_download, result),
+            file_name=filename,
+            mime="application/pdf",
+            on_click="ignore",
+            use_container_width=True
+        )
+    
+    with col2:
+        # Text Download
+        st.download_button(
+            label="📝 Download Text",
+            data=result,
+            file_name=f"CrewAI_Solution_{timestamp}.md",
+            mime="text/markdown",
+            on_click="ignore",
+            use_container_width=True
+        )
+    
+    return any(job["status"] not in FINISHED for job in publishes)
 
 def main():
     # Header with mobile-friendly layout
@@ -145,6 +195,30 @@ def main():
         4. Download your PDF report
         """)
     
+    cache = result_cache()
+    if cache is not None:
+        stats = cache.stats()
+        st.sidebar.caption(
+            f"🗄️ Cache: {stats['memory_hits'] + stats['disk_hits']} hits / "
+            f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+        )
+    
+    if rate_limiting_enabled():
+        limits = get_rate_limiter().stats()
+        st.sidebar.caption(
+            f"⏳ OpenAI queue: {sum(limits['queued'].values())} waiting, "
+            f"{limits['mean_wait_seconds']:.1f}s mean wait, {limits['rate_limited']} rate-limited"
+        )
+    
+    outbox = get_publish_outbox()
+    if outbox is not None:
+        # Also starts the workers, which publish anything left from earlier runs
+        publishing = outbox.stats()
+        st.sidebar.caption(
+            f"📮 Google Docs: {publishing['pending'] + publishing['running']} publishing, "
+            f"{publishing['dead']} failed"
+        )
+    
     # Single column layout for mobile
     st.header("💭 What problem would you like to solve?")
     problem_statement = st.text_area(
@@ -162,97 +236,41 @@ def main():
         use_container_width=True
     )
     
-    # Status section
-    if generate_button or 'processing' in st.session_state:
-        st.markdown("### 📊 Processing Status")
-        status_placeholder = st.empty()
-        progress_bar = st.progress(0)
-    
-    # Process the request
+    # Submit the request to the background job queue
     if generate_button and problem_statement.strip():
-        st.session_state.processing = True
-        
-        with status_placeholder.container():
-            st.info("🔄 Initializing CrewAI agents...")
-            progress_bar.progress(10)
-            
-            st.info("🔍 Research Specialist analyzing problem...")
-            progress_bar.progress(30)
-            
-            # Run CrewAI workflow
-            result = run_crewai_workflow(problem_statement.strip())
-            progress_bar.progress(70)
-            
-            st.info("📄 Document Publisher formatting results...")
-            progress_bar.progress(90)
-            
-            # Generate PDF
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"CrewAI_Solution_{timestamp}.pdf"
-            
-            try:
-                pdf_buffer = markdown_to_pdf(result, filename)
-                progress_bar.progress(100)
-                
-                st.success("✅ Solution generated successfully!")
-                
-                # Mobile-friendly results display
-                st.markdown("---")
-                st.markdown("### 📋 Your AI-Generated Solution")
-                
-                # Compact preview with mobile-friendly styling
-                with st.container():
-                    st.markdown('<div class="result-container">', unsafe_allow_html=True)
-                    
-                    # Collapsible preview for mobile
-                    with st.expander("📖 View Full Solution", expanded=True):
-                        st.markdown(result)
-                    
-                    st.markdown('</div>', unsafe_allow_html=True)
-                
-                # Mobile-friendly download section
-                st.markdown("### 📥 Download Options")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # PDF Download
-                    st.download_button(
-                        label="📄 Download PDF",
-                        data=pdf_buffer.getvalue(),
-                        file_name=filename,
-                        mime="application/pdf",
-                        use_container_width=True
-                    )
-                
-                with col2:
-                    # Text Download
-                    st.download_button(
-                        label="📝 Download Text",
-                        data=result,
-                        file_name=f"CrewAI_Solution_{timestamp}.md",
-                        mime="text/markdown",
-                        use_container_width=True
-                    )
-                
-            except Exception as e:
-                st.error(f"❌ Error generating PDF: {str(e)}")
-                
-                # Fallback: show text result and offer markdown download
-                st.markdown("---")
-                st.header("📊 Generated Solution (Text)")
-                st.markdown(result)
-                
-                # Offer markdown download as fallback
-                st.download_button(
-                    label="📥 Download as Markdown",
-                    data=result,
-                    file_name=f"CrewAI_Solution_{timestamp}.md",
-                    mime="text/markdown"
-                )
-    
+        try:
+            job_id = run_crewai_workflow(problem_statement.strip())
+            st.session_state.job_id = job_id
+            st.query_params["job"] = job_id
+        except QueueFull:
+            st.warning("⚠️ Too many solutions are being generated right now. Please try again in a minute.")
     elif generate_button and not problem_statement.strip():
         st.warning("⚠️ Please enter a problem statement before generating a solution.")
     
+    # Reattach to the current job, including after a refresh or reconnect
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    job = get_job_queue().get(job_id) if job_id else None
+    poll = False
+    
+    if job:
+        st.session_state.job_id = job["id"]
+        st.markdown("### 📊 Processing Status")
+        st.progress(job["progress"])
+        
+        if job["status"] == DONE:
+            # Keep polling until the queued Google Docs are published
+            poll = render_result(job["result"], datetime.fromtimestamp(job["created_at"]).strftime("%Y%m%d_%H%M%S"))
+        elif job["status"] == ERROR:
+            st.error(f"❌ Error running CrewAI workflow: {job['error']}")
+        else:
+            shared = get_job_queue().subscribers(job["id"], job["problem_statement"])
+            joined = f", shared by {shared} requests" if shared > 1 else ""
+            st.info(f"🔄 {job['stage']} (job `{job['id']}`{joined})")
+            if streaming_enabled():
+                # Replays the tokens so far, then follows the live stream
+                st.write_stream(stream_text(job["id"], idle_timeout=STREAM_IDLE_SECONDS))
+            poll = True
+    
     # Footer
     st.markdown("---")
     st.markdown(
@@ -263,6 +281,11 @@ def main():
         """,
         unsafe_allow_html=True
     )
+    
+    # Poll the job store until the job finishes
+    if poll:
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+"""HTTP API: admission (202/429/503), draining and the answer event stream."""
+import threading
+
+import pytest
+from starlette.testclient import TestClient
+
+from problem_solving_research_agent.api import create_app
+from problem_solving_research_agent.events import LLM_CHUNK, LLM_COMPLETED, RUN_COMPLETED, event_bus, run_context
+from problem_solving_research_agent.jobs import DONE, JobQueue, JobStore
+from problem_solving_research_agent.streaming import get_answer_streams
+
+ANSWER = "Hire two more agents and add a self-service help centre."
+
+
+class Blocking:
+    """A run function that holds every run until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def __call__(self, problem_statement, run_id=None):
+        self.release.wait(10)
+        return f"Solved: {problem_statement}"
+
+
+@pytest.fixture
+def run_fn():
+    run_fn = Blocking()
+    yield run_fn
+    run_fn.release.set()
+
+
+def _queue(tmp_path, run_fn, **kwargs) -> JobQueue:
+    return JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, run_fn=run_fn, **kwargs)
+
+
+def test_submissions_are_accepted_and_their_result_polled(tmp_path, run_fn):
+    queue = _queue(tmp_path, run_fn)
+    with TestClient(create_app(queue)) as client:
+        response = client.post("/jobs", json={"problem_statement": "Scale support"})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response.headers["location"] == f"/jobs/{job_id}"
+        assert client.get(f"/jobs/{job_id}/result").status_code == 202
+
+        run_fn.release.set()
+        assert queue.drain(timeout=10)
+        body = client.get(f"/jobs/{job_id}/result").json()
+
+        assert body["status"] == DONE and body["result"] == "Solved: Scale support"
+        assert client.get("/jobs/unknown").status_code == 404
+        assert client.post("/jobs", json={}).status_code == 400
+
+
+def test_a_full_queue_answers_429(tmp_path, run_fn):
+    queue = _queue(tmp_path, run_fn, max_pending=1)
+    with TestClient(create_app(queue, max_jobs_per_client=0, retry_after=7)) as client:
+        assert client.post("/jobs", json={"problem_statement": "First"}).status_code == 202
+        response = client.post("/jobs", json={"problem_statement": "Second"})
+
+        assert response.status_code == 429
+        assert response.headers["retry-after"] == "7"
+        # An identical submission joins the running job instead of needing room
+        assert client.post("/jobs", json={"problem_statement": "First"}).status_code == 202
+
+
+def test_each_client_is_limited_to_its_unfinished_jobs(tmp_path, run_fn):
+    queue = _queue(tmp_path, run_fn)
+    with TestClient(create_app(queue, max_jobs_per_client=1)) as client:
+        alice = {"X-Client-ID": "alice"}
+        assert client.post("/jobs", json={"problem_statement": "First"}, headers=alice).status_code == 202
+        assert client.post("/jobs", json={"problem_statement": "Second"}, headers=alice).status_code == 429
+        assert client.post(
+            "/jobs", json={"problem_statement": "Second"}, headers={"X-Client-ID": "bob"}
+        ).status_code == 202
+
+        run_fn.release.set()
+        assert queue.drain(timeout=10)
+        assert client.post("/jobs", json={"problem_statement": "Third"}, headers=alice).status_code == 202
+
+
+def test_a_draining_instance_refuses_jobs_but_serves_running_ones(tmp_path, run_fn):
+    queue = _queue(tmp_path, run_fn)
+    app = create_app(queue)
+    with TestClient(app) as client:
+        job_id = client.post("/jobs", json={"problem_statement": "Scale support"}).json()["id"]
+        app.state.draining = True
+
+        assert client.post("/jobs", json={"problem_statement": "Another"}).status_code == 503
+        health = client.get("/healthz")
+        assert health.status_code == 503 and health.json()["status"] == "draining"
+        assert not queue.drain(timeout=0.1)
+
+        run_fn.release.set()
+        assert queue.drain(timeout=10)
+        assert client.get(f"/jobs/{job_id}/result").json()["status"] == DONE
+
+
+def test_stream_sends_the_answer_then_the_final_status(tmp_path):
+    started = threading.Event()
+    release = threading.Event()
+
+    def solve(problem_statement, run_id=None):
+        with run_context(run_id):
+            started.set()
+            release.wait(10)
+            for word in ANSWER.split(" "):
+                event_bus.publish(LLM_CHUNK, call_id="call-1", chunk=word + " ")
+            event_bus.publish(LLM_COMPLETED, call_id="call-1")
+            event_bus.publish(RUN_COMPLETED)
+        return ANSWER
+
+    queue = _queue(tmp_path, solve)
+    with TestClient(create_app(queue)) as client:
+        job_id = client.post("/jobs", json={"problem_statement": "Scale support"}).json()["id"]
+        assert started.wait(10)
+        release.set()
+        body = client.get(f"/jobs/{job_id}/stream").text
+
+    tokens = "".join(
+        line[len("data: "):] for block in body.split("\n\n") if block.startswith("event: token")
+        for line in block.split("\n")[1:]
+    )
+    assert tokens.strip() == ANSWER
+    assert body.rstrip().endswith('data: {"status": "done", "error": null}')
+
+
+def test_streaming_a_finished_job_does_not_create_a_stream(tmp_path):
+    queue = _queue(tmp_path, lambda problem_statement, run_id=None: "Solved")
+    with TestClient(create_app(queue)) as client:
+        job_id = client.post("/jobs", json={"problem_statement": "Scale support"}).json()["id"]
+        assert queue.drain(timeout=10)
+        body = client.get(f"/jobs/{job_id}/stream").text
+
+    assert "event: token" not in body and "event: end" in body
+    assert get_answer_streams().find(job_id) is None
@@ -0,0 +1,21 @@
+"""Artifact cache spills to disk outside its lock."""
+from problem_solving_research_agent.artifacts import ArtifactCache, artifact_key
+
+
+def test_spill_writes_happen_outside_the_lock(tmp_path):
+    cache = ArtifactCache(cache_dir=str(tmp_path), max_memory_bytes=10)
+    write_disk = cache._write_disk
+    seen = []
+
+    def checked_write(key, data):
+        # Lookups go on meanwhile, and still find the entry being written
+        seen.append((cache._lock.locked(), cache._spilling.get(key)))
+        return write_disk(key, data)
+
+    cache._write_disk = checked_write
+    cache.get_or_render("pdf", "first", lambda content: b"x" * 8)
+    cache.get_or_render("pdf", "second", lambda content: b"y" * 8)
+
+    assert seen == [(False, b"x" * 8)]
+    assert (tmp_path / f"{artifact_key('pdf', 'first')}.bin").read_bytes() == b"x" * 8
+    assert cache.stats()["spills"] == 1
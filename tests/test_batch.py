@@ -0,0 +1,27 @@
+"""Batch input handling with a stubbed crew."""
+import json
+import os
+
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+
+from problem_solving_research_agent.batch import run_batch  # noqa: E402
+
+
+def test_malformed_lines_become_error_records(tmp_path):
+    source = tmp_path / "problems.jsonl"
+    source.write_text(
+        '{"id": "a", "problem_statement": "First"}\n'
+        '{"id": "b", "problem_statement": \n'
+        '["not", "an", "object"]\n'
+        '{"id": "c", "problem_statement": "Third"}\n',
+        encoding="utf-8",
+    )
+    output = tmp_path / "results.jsonl"
+
+    summary = run_batch(str(source), str(output), workers=2, run_fn=lambda problem: f"Solved {problem}")
+
+    records = {record["id"]: record for record in map(json.loads, output.read_text(encoding="utf-8").splitlines())}
+    assert summary == {"ok": 2, "error": 2, "skipped": 0}
+    assert records["a"]["result"] == "Solved First" and records["c"]["result"] == "Solved Third"
+    assert records["2"]["status"] == "error" and "Line 2" in records["2"]["error"]
+    assert records["3"]["status"] == "error"
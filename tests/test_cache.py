@@ -0,0 +1,68 @@
+"""Result cache: hits, misses and invalidation when the knowledge base or fan-out changes."""
+import pytest
+
+from problem_solving_research_agent import cache, knowledge
+from problem_solving_research_agent.cache import ResultCache
+from problem_solving_research_agent.runner import result_cache
+
+
+def test_hits_survive_normalization_and_restarts(tmp_path):
+    results = ResultCache(cache_dir=str(tmp_path), fingerprint="a")
+    assert results.get("Scale support") is None
+
+    results.put("Scale support", "Plan")
+
+    assert results.get("  scale SUPPORT! ") == "Plan"
+    assert results.get("Scale billing") is None
+    # The disk tier serves a new process
+    assert ResultCache(cache_dir=str(tmp_path), fingerprint="a").get("Scale support") == "Plan"
+    assert ResultCache(cache_dir=str(tmp_path), fingerprint="b").get("Scale support") is None
+    stats = results.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["stores"]) == (1, 2, 1)
+
+
+def test_expired_entries_are_misses(tmp_path):
+    results = ResultCache(cache_dir=str(tmp_path), fingerprint="a", ttl_seconds=0)
+    results.put("Scale support", "Plan")
+    assert results.get("Scale support") is None
+    assert results.stats()["expired"] == 1
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+    corpus = tmp_path / "knowledge"
+    corpus.mkdir()
+    (corpus / "support.md").write_text("Support teams triage tickets by urgency.", encoding="utf-8")
+    monkeypatch.setenv("RESULT_CACHE_ENABLED", "true")
+    monkeypatch.setenv("RESULT_CACHE_DIR", str(tmp_path / "results"))
+    monkeypatch.setenv("KNOWLEDGE_ENABLED", "true")
+    monkeypatch.setenv("KNOWLEDGE_DIR", str(corpus))
+    monkeypatch.setenv("KNOWLEDGE_INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setenv("RESEARCH_FANOUT", "0")
+    monkeypatch.setattr(cache, "_result_cache", None)
+    monkeypatch.setattr(knowledge, "_index", None)
+    return corpus
+
+
+def test_unchanged_settings_keep_serving_results(settings):
+    result_cache().put("Scale support", "Plan")
+    assert result_cache() is result_cache()
+    assert result_cache().get("Scale support") == "Plan"
+
+
+def test_knowledge_changes_invalidate_results(settings):
+    result_cache().put("Scale support", "Plan")
+
+    (settings / "support.md").write_text("Support teams now route tickets with agents.", encoding="utf-8")
+
+    assert result_cache().get("Scale support") is None
+
+
+def test_fanout_width_changes_invalidate_results(settings, monkeypatch):
+    result_cache().put("Scale support", "Plan")
+
+    monkeypatch.setenv("RESEARCH_FANOUT", "3")
+
+    assert result_cache().get("Scale support") is None
+    monkeypatch.setenv("RESEARCH_FANOUT", "0")
+    assert result_cache().get("Scale support") == "Plan"
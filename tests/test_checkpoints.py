@@ -0,0 +1,76 @@
+"""Resuming checkpointed runs."""
+import os
+import time
+
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+os.environ.setdefault("KNOWLEDGE_ENABLED", "false")
+os.environ.setdefault("OUTPUT_SAVE_RUNS", "false")
+
+from problem_solving_research_agent import checkpoints  # noqa: E402
+from problem_solving_research_agent.checkpoints import FAILED, RUNNING, CheckpointStore  # noqa: E402
+from problem_solving_research_agent.factory import PIPELINES  # noqa: E402
+from problem_solving_research_agent.metrics import CREW_RUNS_IN_FLIGHT  # noqa: E402
+from problem_solving_research_agent.runner import run_problem  # noqa: E402
+
+INPUTS = {"problem_statement": "Scale support"}
+
+
+def _set_lease(store: CheckpointStore, run_id: str, owner: str, updated_at: float) -> None:
+    store.heartbeat.release(run_id)
+    with store._lock:
+        store._conn.execute(
+            "UPDATE runs SET owner = ?, updated_at = ? WHERE run_id = ?", (owner, updated_at, run_id)
+        )
+
+
+def test_running_runs_are_resumed_only_once_their_lease_expired(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    run_id = store.start_run(INPUTS)
+    _set_lease(store, run_id, "other-host:123", time.time())
+    assert store.resumable_run(INPUTS) is None
+
+    _set_lease(store, run_id, "other-host:123", time.time() - 3600)
+    assert store.resumable_run(INPUTS) == run_id
+    # Claimed: a second request for the same inputs starts its own run
+    assert store.resumable_run(INPUTS) is None
+    assert store.get_run(run_id)["status"] == RUNNING
+
+
+def test_failed_runs_are_claimed_once(tmp_path):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    run_id = store.start_run(INPUTS)
+    store.set_status(run_id, FAILED)
+    assert store.resumable_run(INPUTS) == run_id
+    assert store.resumable_run(INPUTS) is None
+
+
+def test_resuming_a_finished_run_balances_runs_in_flight(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    monkeypatch.setattr(checkpoints, "_store", store)
+    run_id = store.start_run({})
+    for name in PIPELINES["full"]:
+        store.save_task(run_id, name, f"Output of {name}")
+    store.set_status(run_id, FAILED)
+    before = CREW_RUNS_IN_FLIGHT.collect().get((), 0)
+
+    result = run_problem("Scale support", use_cache=False, checkpoint_run_id=run_id, pipeline="full")
+
+    assert result == f"Output of {PIPELINES['full'][-1]}"
+    assert CREW_RUNS_IN_FLIGHT.collect().get((), 0) == before
+
+
+def test_recorded_outputs_keep_documents_inline(tmp_path, monkeypatch):
+    from problem_solving_research_agent import context
+    from problem_solving_research_agent.events import TASK_COMPLETED, event_bus, run_context
+
+    monkeypatch.setattr(context, "_document_store", context.DocumentStore(str(tmp_path / "documents.sqlite3")))
+    store = CheckpointStore(str(tmp_path / "checkpoints.sqlite3"))
+    run_id = store.start_run(INPUTS)
+    handle = context.store_document("# Research\n\nThe full findings.")
+
+    with run_context("event-run") as event_run_id, store.recording(run_id, event_run_id):
+        event_bus.publish(TASK_COMPLETED, task="publish", output=f"## Summary\n\n{handle}")
+    # The run resumes on another host, with a document store of its own
+    monkeypatch.setattr(context, "_document_store", context.DocumentStore(str(tmp_path / "other.sqlite3")))
+
+    assert store.completed_tasks(run_id)["publish"] == "## Summary\n\n# Research\n\nThe full findings."
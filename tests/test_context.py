@@ -0,0 +1,60 @@
+"""Documents passed by handle: durable storage and loud failures for unknown handles."""
+import pytest
+
+from problem_solving_research_agent import context
+from problem_solving_research_agent.context import (
+    HANDLE_PREFIX,
+    DocumentStore,
+    UnknownDocument,
+    count_tokens,
+    fit_to_budget,
+    resolve_handles,
+    store_document,
+)
+
+DOCUMENT = "# Research\n\n" + "Support teams triage tickets by urgency. " * 200
+
+
+@pytest.fixture
+def documents(tmp_path, monkeypatch):
+    path = str(tmp_path / "documents.sqlite3")
+    monkeypatch.setattr(context, "_document_store", DocumentStore(path))
+    return path
+
+
+def test_documents_outlive_the_process_that_stored_them(documents, monkeypatch):
+    handle = store_document(DOCUMENT)
+    monkeypatch.setattr(context, "_document_store", DocumentStore(documents))
+
+    assert resolve_handles(f"## Findings\n\n{handle}\n\nDone.") == f"## Findings\n\n{DOCUMENT}\n\nDone."
+    # Only handles on a line of their own are expanded
+    assert resolve_handles(f"See {handle} above.") == f"See {handle} above."
+
+
+def test_unknown_handles_raise_instead_of_being_published(documents):
+    handle = f"{HANDLE_PREFIX}{'0' * 64}"
+
+    with pytest.raises(UnknownDocument):
+        resolve_handles(f"## Findings\n\n{handle}")
+
+
+def test_docs_tool_reports_unknown_handles(documents):
+    from problem_solving_research_agent.tools.google_docs import GoogleDocsCreatorTool
+
+    answer = GoogleDocsCreatorTool()._run(title="Plan", content=f"# Plan\n\n{HANDLE_PREFIX}{'0' * 64}")
+
+    assert answer.startswith("Error creating Google Doc: No stored document")
+
+
+def test_expired_documents_are_pruned(documents):
+    key = store_document(DOCUMENT)[len(HANDLE_PREFIX):]
+
+    assert DocumentStore(documents).get(key) == DOCUMENT
+    assert DocumentStore(documents, retention_seconds=-1).get(key) is None
+
+
+def test_digest_fits_the_budget():
+    digest = fit_to_budget(DOCUMENT, max_tokens=200, section_max_tokens=100)
+
+    assert count_tokens(digest) <= 200
+    assert digest.startswith("# Research")
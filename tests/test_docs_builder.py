@@ -0,0 +1,107 @@
+"""Build Google Docs through the in-memory fake Docs API and check the result."""
+from problem_solving_research_agent.tools.docs_builder import (
+    markdown_to_batches,
+    plain_text_batches,
+    utf16_len,
+)
+from problem_solving_research_agent.tools.google_clients import GoogleClientPool
+from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp
+
+MARKDOWN = """# Plan 🚀
+
+Intro with **bold** text and an emoji 😀 before it.
+
+- First item
+  - Nested **item**
+- Second item
+
+1. Step one
+2. Step two
+
+```
+code line
+```
+"""
+
+
+def build_document(batches):
+    """Create a fake document, send every batch and return (fake, document_id)."""
+    fake = FakeGoogleHttp()
+    docs = GoogleClientPool(http_factory=lambda: fake).service("docs", "v1")
+    document_id = docs.documents().create(body={"title": "Test"}).execute()["documentId"]
+    for requests in batches:
+        docs.documents().batchUpdate(documentId=document_id, body={"requests": requests}).execute()
+    return fake, document_id
+
+
+def requests_of(fake, document_id, kind):
+    return [request[kind] for batch in fake.batch_updates(document_id) for request in batch if kind in request]
+
+
+def text_at(text, text_range):
+    """The document text a Docs range covers (body index 1 is the first character)."""
+    encoded = text.encode("utf-16-le")
+    return encoded[(text_range["startIndex"] - 1) * 2:(text_range["endIndex"] - 1) * 2].decode("utf-16-le")
+
+
+def test_markdown_text_is_inserted_without_markup():
+    fake, document_id = build_document(markdown_to_batches(MARKDOWN))
+    text = fake.text(document_id)
+    assert text.startswith("Plan 🚀\n\nIntro with bold text and an emoji 😀 before it.\n")
+    assert "**" not in text and "```" not in text and "#" not in text
+    assert "First item\n\tNested item\nSecond item\n" in text
+    assert "Step one\nStep two\n" in text
+
+
+def test_style_ranges_count_utf16_code_units():
+    fake, document_id = build_document(markdown_to_batches(MARKDOWN))
+    text = fake.text(document_id)
+
+    headings = requests_of(fake, document_id, "updateParagraphStyle")
+    assert [(text_at(text, h["range"]), h["paragraphStyle"]["namedStyleType"]) for h in headings] == [
+        ("Plan 🚀\n", "HEADING_1")
+    ]
+    styles = requests_of(fake, document_id, "updateTextStyle")
+    bold = [text_at(text, s["range"]) for s in styles if s["fields"] == "bold"]
+    assert bold == ["bold", "item"]
+    code = [text_at(text, s["range"]) for s in styles if s["fields"] == "weightedFontFamily"]
+    assert code == ["code line\n"]
+    # The emojis are two UTF-16 code units each, which shifts every later index
+    assert utf16_len("🚀") == 2
+
+
+def test_bullets_cover_each_list_in_reverse_order():
+    fake, document_id = build_document(markdown_to_batches(MARKDOWN))
+    text = fake.text(document_id)
+    bullets = requests_of(fake, document_id, "createParagraphBullets")
+    # Applied last to first, since creating bullets strips the nesting tabs
+    assert [(text_at(text, b["range"]), b["bulletPreset"]) for b in bullets] == [
+        ("Step one\nStep two\n", "NUMBERED_DECIMAL_ALPHA_ROMAN"),
+        ("First item\n\tNested item\nSecond item\n", "BULLET_DISC_CIRCLE_SQUARE"),
+    ]
+    starts = [b["range"]["startIndex"] for b in bullets]
+    assert starts == sorted(starts, reverse=True)
+
+
+def test_large_documents_are_split_into_bounded_batches():
+    markdown = "\n\n".join(f"## Section {n}\n\nParagraph **{n}** " + "text " * 40 for n in range(50))
+    whole = markdown_to_batches(markdown)
+    batches = markdown_to_batches(markdown, max_chars=2000, max_requests=20)
+    assert len(whole) == 1 and len(batches) > 1
+    for batch in batches:
+        assert len(batch) <= 20
+        assert sum(len(r["insertText"]["text"]) for r in batch if "insertText" in r) <= 2000
+
+    fake_whole, whole_id = build_document(whole)
+    fake_split, split_id = build_document(batches)
+    assert fake_split.text(split_id) == fake_whole.text(whole_id)
+    # Every style range was valid when it was applied, or the fake would have answered 400
+    assert len(requests_of(fake_split, split_id, "updateTextStyle")) == 50
+
+
+def test_plain_text_is_inserted_in_order():
+    text = "".join(f"Line {n} ✓\n" for n in range(500))
+    batches = plain_text_batches(text, max_chars=1000)
+    assert len(batches) > 1
+    fake, document_id = build_document(batches)
+    assert fake.text(document_id) == text + "\n"
@@ -0,0 +1,59 @@
+"""Bulk export: directories and output stores, and resuming by skipping up-to-date files."""
+import os
+import time
+
+from problem_solving_research_agent.export import MARKDOWN, PDF, run_export
+from problem_solving_research_agent.tools.output_store import OutputStore
+
+
+def _write_sources(directory, count: int = 3) -> list:
+    paths = []
+    for n in range(count):
+        path = directory / "reports" / f"report_{n}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# Report {n}\n\n- Finding {n}\n", encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def test_a_rerun_skips_files_newer_than_their_source(tmp_path):
+    sources = _write_sources(tmp_path / "output")
+    exports = tmp_path / "exports"
+
+    first = run_export(str(tmp_path / "output"), str(exports), formats=(PDF, MARKDOWN), workers=1)
+    assert (first["ok"], first["skipped"]) == (3, 0)
+    assert (exports / "reports" / "report_0.pdf").read_bytes().startswith(b"%PDF")
+    assert (exports / "reports" / "report_0.md").read_text(encoding="utf-8") == sources[0].read_text(encoding="utf-8")
+
+    second = run_export(str(tmp_path / "output"), str(exports), formats=(PDF, MARKDOWN), workers=1)
+    assert (second["ok"], second["skipped"]) == (0, 3)
+
+    # An edited source is exported again; the others stay skipped
+    later = time.time() + 60
+    os.utime(sources[1], (later, later))
+    third = run_export(str(tmp_path / "output"), str(exports), formats=(MARKDOWN,), workers=1)
+    assert (third["ok"], third["skipped"]) == (1, 2)
+
+    forced = run_export(str(tmp_path / "output"), str(exports), formats=(MARKDOWN,), workers=1, force=True)
+    assert forced["ok"] == 3
+
+
+def test_output_stores_export_each_document_once(tmp_path):
+    store = OutputStore(str(tmp_path / "output"), compression="gzip", write_behind=False)
+    store.save("# Plan A\n\nHire agents.", "plan_a", title="Plan A")
+    store.save("# Plan A\n\nHire agents.", "plan_a_again", title="Plan A")
+    store.save("# Plan B\n\nAutomate triage.", "plan_b", title="Plan B")
+    exports = tmp_path / "exports"
+    names = []
+
+    summary = run_export(
+        str(tmp_path / "output" / "index.sqlite3"), str(exports), formats=(MARKDOWN,), workers=1,
+        on_result=lambda record: names.append(record["name"]),
+    )
+
+    assert (summary["total"], summary["ok"]) == (2, 2)
+    assert sorted(name.rsplit("_", 1)[0] for name in names) == ["plan_a", "plan_b"]
+    assert sorted(path.read_text(encoding="utf-8") for path in exports.glob("*.md")) == [
+        "# Plan A\n\nHire agents.", "# Plan B\n\nAutomate triage."
+    ]
+    assert run_export(str(tmp_path / "output"), str(exports), formats=(MARKDOWN,), workers=1)["skipped"] == 2
@@ -0,0 +1,20 @@
+"""Context views are updated by a serializable task callback."""
+import warnings
+
+from crewai import Task
+from crewai.tasks.task_output import TaskOutput
+
+from problem_solving_research_agent.factory import _register_context_view, update_context_view
+
+
+def test_context_view_callback_finds_its_view():
+    view = Task(description="Research", expected_output="Findings", name="research_context")
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        task = Task(description="Research", expected_output="Findings", name="research", callback=update_context_view)
+    _register_context_view(task, view)
+
+    task.output = TaskOutput(name="research", description="Research", raw="# Findings\n\nShort.", agent="Researcher")
+    task.callback(task.output)
+
+    assert view.output is not None and "Findings" in view.output.raw
@@ -0,0 +1,69 @@
+"""Research fan-out: decomposition, concurrent sub-questions and merging around failures."""
+import pytest
+
+from problem_solving_research_agent import fanout
+from problem_solving_research_agent.fanout import SubQuestionFindings, SubQuestions, fan_out_research
+
+QUESTIONS = ["How do we staff support?", "Which tickets can be automated?", "How do we measure quality?"]
+
+
+def _findings(topic: str, steps: list) -> SubQuestionFindings:
+    return SubQuestionFindings(
+        analysis=f"{topic} analysis.",
+        findings=f"{topic} findings.",
+        steps=steps,
+        recommendations=["Use a ticketing system", f"{topic} tooling"],
+        resources=["[Playbook](https://example.com/playbook)"],
+    )
+
+
+@pytest.fixture
+def stages(monkeypatch):
+    """Scripted stage crews; sub-questions listed in ``failing`` raise."""
+    calls = {"decompose": [], "sub_question": [], "failing": set()}
+
+    def kickoff(stage, inputs):
+        calls[stage].append(inputs)
+        if stage == "decompose":
+            # Duplicates and blanks are dropped
+            return f"```json\n{SubQuestions(questions=QUESTIONS + [QUESTIONS[0], ' ']).model_dump_json()}\n```"
+        question = inputs["sub_question"]
+        if question in calls["failing"]:
+            raise TimeoutError(f"{question} timed out")
+        topic = question.split()[-1].rstrip("?").capitalize()
+        return _findings(topic, [f"{topic} step one", f"{topic} step two"])
+
+    monkeypatch.setattr(fanout, "_kickoff", kickoff)
+    return calls
+
+
+def test_sub_questions_are_researched_and_merged(stages):
+    document = fan_out_research("Scale support", "No relevant internal knowledge found.", width=4, concurrency=2)
+
+    assert [inputs["sub_question"] for inputs in sorted(stages["sub_question"], key=str)] == sorted(QUESTIONS)
+    assert [line for line in document.splitlines() if line.startswith("## ")] == [
+        "## Problem Analysis", "## Research Summary", "## Step-by-Step Solution Approach",
+        "## Technical Recommendations", "## Additional Resources",
+    ]
+    # Steps are numbered across phases
+    assert "### Phase 2: Which tickets can be automated?\n\n3. Automated step one\n4. Automated step two" in document
+    assert document.count("- Use a ticketing system") == 1
+    assert document.count("https://example.com/playbook") == 1
+
+
+def test_failed_sub_questions_are_listed_and_the_rest_merged(stages):
+    stages["failing"].add(QUESTIONS[1])
+
+    document = fan_out_research("Scale support", "", width=3, concurrency=3)
+
+    assert "Not researched because of errors:\n\n- Which tickets can be automated?" in document
+    assert "Automated" not in document
+    assert "### Phase 1: How do we staff support?" in document
+    assert "### Phase 2: How do we measure quality?\n\n3. Quality step one" in document
+
+
+def test_fan_out_fails_when_every_sub_question_failed(stages):
+    stages["failing"].update(QUESTIONS[:2])
+
+    with pytest.raises(TimeoutError):
+        fan_out_research("Scale support", "", width=2, concurrency=2)
@@ -0,0 +1,98 @@
+"""Google client pool: shared credentials, refreshes and per-thread service handles."""
+import datetime
+import threading
+
+import pytest
+from google.oauth2.credentials import Credentials
+
+from problem_solving_research_agent.tools.google_clients import GoogleClientPool
+from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp
+
+DOCS = ("https://www.googleapis.com/auth/documents",)
+DRIVE = ("https://www.googleapis.com/auth/drive.file",)
+
+
+class FakeRefresh:
+    """Stands in for the token endpoint; ``hold`` blocks the first refresh until released."""
+
+    def __init__(self):
+        self.calls = 0
+        self.hold = None
+        self._lock = threading.Lock()
+
+    def __call__(self, credentials, request):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if first and self.hold is not None:
+            self.hold.wait(5)
+        credentials.token = f"token-{self.calls}"
+        credentials.expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+
+
+@pytest.fixture
+def refresh(monkeypatch):
+    refresh = FakeRefresh()
+    monkeypatch.setattr(Credentials, "refresh", lambda credentials, request: refresh(credentials, request))
+    monkeypatch.delenv("GOOGLE_SERVICE_ACCOUNT_PATH", raising=False)
+    monkeypatch.setenv("GOOGLE_CLIENT_ID", "client")
+    monkeypatch.setenv("GOOGLE_CLIENT_SECRET", "secret")
+    monkeypatch.setenv("GOOGLE_REFRESH_TOKEN", "refresh")
+    return refresh
+
+
+def test_credentials_are_shared_and_refreshed_only_when_expired(refresh):
+    pool = GoogleClientPool()
+
+    credentials = pool.credentials(DOCS)
+    assert pool.credentials(DOCS) is credentials
+    assert refresh.calls == 1
+
+    credentials.expiry = datetime.datetime.utcnow() - datetime.timedelta(minutes=1)
+    assert pool.credentials(DOCS) is credentials
+    assert refresh.calls == 2 and credentials.token == "token-2"
+
+
+def test_concurrent_callers_wait_for_one_refresh(refresh):
+    pool = GoogleClientPool()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.credentials(DOCS))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(results) == 8 and all(credentials is results[0] for credentials in results)
+    assert refresh.calls == 1
+
+
+def test_a_slow_refresh_does_not_block_other_credentials(refresh):
+    pool = GoogleClientPool()
+    refresh.hold = threading.Event()
+    slow = threading.Thread(target=pool.credentials, args=(DOCS,))
+    slow.start()
+    try:
+        other = []
+        fast = threading.Thread(target=lambda: other.append(pool.credentials(DRIVE)))
+        fast.start()
+        fast.join(2)
+
+        assert other and other[0].token == "token-2"
+    finally:
+        refresh.hold.set()
+        slow.join(5)
+
+
+def test_service_handles_are_reused_per_thread_and_dropped_with_the_transport():
+    pool = GoogleClientPool(http_factory=FakeGoogleHttp)
+    docs = pool.service("docs", "v1")
+    assert pool.service("docs", "v1") is docs
+
+    other_thread = []
+    thread = threading.Thread(target=lambda: other_thread.append(pool.service("docs", "v1")))
+    thread.start()
+    thread.join(5)
+    assert other_thread[0] is not docs
+
+    pool.use_transport(FakeGoogleHttp)
+    assert pool.service("docs", "v1") is not docs
@@ -0,0 +1,61 @@
+"""Startup budgets: entry points import quickly and leave heavy dependencies lazy.
+
+Each import runs in a fresh interpreter under ``python -X importtime``. Set
+``IMPORT_BUDGET_SCALE`` (e.g. 2) on slow machines; ``benchmarks/import_time.py``
+shows where an entry point's time goes.
+"""
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+# module -> (budget in ms, modules that must stay lazy)
+ENTRY_POINTS = {
+    # CLI: `run`/`batch` should reach the prompt without loading crewAI or Google
+    "problem_solving_research_agent.main": (
+        300, ("crewai", "googleapiclient", "google.oauth2", "reportlab"),
+    ),
+    # Everything streamlit_app.py imports at module level
+    "problem_solving_research_agent.jobs": (
+        300, ("crewai", "googleapiclient", "google.oauth2", "reportlab", "markdown_it"),
+    ),
+    # The Docs tool itself must not pull in the Google client stack until first publish
+    "problem_solving_research_agent.tools.google_docs": (
+        None, ("googleapiclient", "google.oauth2"),
+    ),
+}
+
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def _import_timings(module: str) -> dict:
+    """Return {module_name: cumulative_ms} for a fresh import of ``module``."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC, os.getenv("PYTHONPATH")])))
+    env.setdefault("OPENAI_API_KEY", "import-time-placeholder")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            timings[match.group(3)] = int(match.group(2)) / 1000
+    return timings
+
+
+@pytest.mark.parametrize("module", list(ENTRY_POINTS))
+def test_entry_points_import_within_budget(module):
+    budget_ms, lazy = ENTRY_POINTS[module]
+    timings = _import_timings(module)
+
+    assert [name for name in lazy if name in timings] == []
+    if budget_ms is not None:
+        # The first import may still be compiling bytecode or reading a cold disk
+        total_ms = min(timings[module], _import_timings(module)[module])
+        assert total_ms <= budget_ms * BUDGET_SCALE, f"{module} took {total_ms:.1f} ms"
@@ -0,0 +1,100 @@
+"""Job queue: lease-based recovery and release of coalesced flights."""
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from problem_solving_research_agent.jobs import DONE, QUEUED, RUNNING, JobQueue, JobStore
+from problem_solving_research_agent.leases import HOSTNAME, PROCESS_OWNER
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_recovery_skips_jobs_of_live_processes(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    now = time.time()
+    leases = {
+        "live_remote": ("other-host:123", now),
+        "live_local": (f"{HOSTNAME}:{os.getppid()}", now),
+        "dead_local": (f"{HOSTNAME}:{_dead_pid()}", now),
+        "stale_remote": ("other-host:123", now - 3600),
+        "unowned": (None, None),
+    }
+    for name, (owner, heartbeat_at) in leases.items():
+        job_id = store.create(name)
+        store.release(job_id)
+        store.update(job_id, status=RUNNING, owner=owner, heartbeat_at=heartbeat_at)
+
+    claimed = sorted(job["problem_statement"] for job in store.claim_expired())
+
+    assert claimed == ["dead_local", "stale_remote", "unowned"]
+    jobs = {job["problem_statement"]: job for job in map(store.get, _ids(store))}
+    assert jobs["dead_local"]["status"] == QUEUED and jobs["dead_local"]["owner"] == PROCESS_OWNER
+    assert jobs["live_remote"]["status"] == RUNNING and jobs["live_remote"]["owner"] == "other-host:123"
+    # A second process starting now finds nothing left to claim
+    assert JobStore(str(tmp_path / "jobs.sqlite3")).claim_expired() == []
+
+
+def test_jobs_of_a_replaced_process_with_the_same_host_and_pid_are_claimed(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    now = time.time()
+    # A restarted container: same hostname, same PID (1), fresh heartbeat
+    for owner in (f"{HOSTNAME}:{os.getpid()}:0123456789ab", f"{HOSTNAME}:{os.getpid()}"):
+        job_id = store.create(owner)
+        store.release(job_id)
+        store.update(job_id, status=RUNNING, owner=owner, heartbeat_at=now)
+    job_id = store.create("ours")
+    store.update(job_id, status=RUNNING)
+
+    claimed = sorted(job["owner"] for job in store.claim_expired())
+
+    assert claimed == sorted([f"{HOSTNAME}:{os.getpid()}:0123456789ab", f"{HOSTNAME}:{os.getpid()}"])
+    assert store.get(job_id)["status"] == RUNNING
+
+
+def test_jobs_whose_lease_expires_later_are_requeued_without_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setenv("LEASE_TIMEOUT_SECONDS", "0.4")
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(store, workers=1, run_fn=lambda problem, run_id=None: f"Solved {problem}")
+    try:
+        assert queue.recover() == 0
+        # Another process takes a job after this one started, then dies
+        job_id = store.create("Scale support")
+        store.release(job_id)
+        store.update(job_id, status=RUNNING, owner=f"{HOSTNAME}:{_dead_pid()}:0123456789ab")
+
+        deadline = time.time() + 10
+        while store.get(job_id)["status"] != DONE and time.time() < deadline:
+            time.sleep(0.05)
+        assert store.get(job_id)["result"] == "Solved Scale support"
+    finally:
+        queue.shutdown()
+
+
+def _ids(store: JobStore) -> list:
+    with store._cursor() as conn:
+        return [row["id"] for row in conn.execute("SELECT id FROM jobs")]
+
+
+def test_flight_is_released_when_storing_the_result_fails(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    queue = JobQueue(store, workers=1, run_fn=lambda problem, run_id=None: f"Solved {problem}")
+    update = store.update
+
+    def failing_update(job_id, **fields):
+        if fields.get("status") == DONE:
+            raise sqlite3.OperationalError("database is locked")
+        update(job_id, **fields)
+
+    store.update = failing_update
+    try:
+        queue.submit("Scale support")
+        assert queue.drain(timeout=10)
+        assert queue.flights.in_flight() == 0
+    finally:
+        queue.shutdown()
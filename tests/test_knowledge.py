@@ -0,0 +1,115 @@
+"""Knowledge index: incremental refreshes, segments, atomic replacement and BM25 ranking."""
+import os
+
+import pytest
+
+from problem_solving_research_agent import knowledge
+from problem_solving_research_agent.knowledge import KnowledgeIndex, chunk_text
+
+DOCUMENTS = {
+    "support/routing.md": "# Ticket routing\n\nRoute every support ticket to the team that owns the product area. "
+                          "Routing rules cut ticket handling time.",
+    "support/staffing.md": "# Staffing\n\nHire support agents ahead of seasonal peaks and train them on common tickets.",
+    "engineering/deploys.txt": "Deploy on weekdays behind feature flags and roll back on errors.",
+}
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    source = tmp_path / "knowledge"
+    for path, text in DOCUMENTS.items():
+        (source / path).parent.mkdir(parents=True, exist_ok=True)
+        (source / path).write_text(text, encoding="utf-8")
+    return source
+
+
+@pytest.fixture
+def index(corpus, tmp_path):
+    index = KnowledgeIndex(str(corpus), str(tmp_path / "index"))
+    assert index.refresh()
+    return index
+
+
+def _segments(index: KnowledgeIndex) -> set:
+    return {path.stem for path in index.segment_dir.glob("*.json")}
+
+
+def test_search_ranks_chunks_by_bm25(index):
+    hits = index.search("Which team gets a support ticket under our routing rules?", k=2)
+
+    assert [hit["source"] for hit in hits] == ["support/routing.md", "support/staffing.md"]
+    assert hits[0]["score"] > hits[1]["score"] > 0
+    assert hits[0]["text"].startswith("# Ticket routing")
+    assert index.search("quantum chromodynamics") == []
+
+
+def test_unchanged_files_are_not_read_again(index, corpus):
+    path = corpus / "support/routing.md"
+    stat = path.stat()
+    # Same size and mtime: the refresh trusts the manifest without reading the file
+    path.write_text(DOCUMENTS["support/routing.md"].replace("Route", "Rout3"), encoding="utf-8")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert not index.refresh()
+    assert index.stats()["files_indexed"] == 3
+    assert index.search("rout3") == []
+
+
+def test_touched_files_reuse_their_segment(index, corpus):
+    version = index.version()
+    os.utime(corpus / "support/staffing.md", ns=(1, 10 ** 18))
+
+    assert not index.refresh()
+    stats = index.stats()
+    assert stats["files_indexed"] == 3 and stats["rebuilds"] == 1
+    assert index.version() == version
+    # The manifest took the new timestamp, so the next refresh is a no-op again
+    assert not index.refresh()
+
+
+def test_changed_and_deleted_files_leave_no_orphan_segments(index, corpus):
+    before = _segments(index)
+    (corpus / "support/staffing.md").write_text("# Staffing\n\nOutsource night shifts.", encoding="utf-8")
+    (corpus / "engineering/deploys.txt").unlink()
+
+    assert index.refresh()
+    after = _segments(index)
+    assert len(after) == 2 and len(after - before) == 1
+    assert index.stats()["files_indexed"] == 4
+    assert [hit["source"] for hit in index.search("night shifts")] == ["support/staffing.md"]
+    assert index.search("deploy feature flags") == []
+
+
+def test_failed_writes_keep_the_previous_index(index, corpus, monkeypatch):
+    original = index.index_path.read_bytes()
+    (corpus / "support/new.md").write_text("Escalate outages to the on-call engineer.", encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(knowledge.os, "replace", fail)
+    with pytest.raises(OSError):
+        index.refresh()
+
+    assert index.index_path.read_bytes() == original
+    assert not list(index.index_dir.glob("*.tmp"))
+    assert index.search("ticket routing")[0]["source"] == "support/routing.md"
+
+
+def test_readers_pick_up_an_index_replaced_by_another_process(index, corpus, tmp_path):
+    reader = KnowledgeIndex(str(corpus), str(tmp_path / "index"))
+    assert reader.search("outages") == []
+
+    (corpus / "support/new.md").write_text("Escalate outages to the on-call engineer.", encoding="utf-8")
+    assert index.refresh()
+
+    assert [hit["source"] for hit in reader.search("outages")] == ["support/new.md"]
+
+
+def test_chunks_keep_paragraphs_whole():
+    paragraphs = [f"Paragraph {n} " + "word " * 30 for n in range(6)]
+
+    chunks = chunk_text("\n\n".join(paragraphs), chunk_chars=400)
+
+    assert all(len(chunk) <= 400 for chunk in chunks)
+    assert "\n\n".join(chunks).split("\n\n") == [paragraph.strip() for paragraph in paragraphs]
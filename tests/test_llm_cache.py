@@ -0,0 +1,120 @@
+"""LLM response cache: call keys, cache modes, tool-executing calls and eviction."""
+import time
+
+import pytest
+from crewai.llms.base_llm import BaseLLM
+from pydantic import BaseModel
+
+from problem_solving_research_agent.llm_cache import (
+    READWRITE,
+    RECORD,
+    REPLAY,
+    CachedLLM,
+    LLMCacheMiss,
+    LLMResponseStore,
+    call_key,
+)
+
+MESSAGES = [{"role": "system", "content": "You research."}, {"role": "user", "content": "Scale support"}]
+
+
+class CountingLLM(BaseLLM):
+    """Answers with a numbered reply so repeated calls are told apart."""
+
+    def __init__(self, model: str = "gpt-4o-mini"):
+        super().__init__(model=model, temperature=0.2)
+        object.__setattr__(self, "calls", 0)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        object.__setattr__(self, "calls", self.calls + 1)
+        return f"Answer {self.calls}"
+
+
+class Plan(BaseModel):
+    steps: list
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LLMResponseStore(str(tmp_path / "responses.sqlite3"))
+
+
+def test_call_keys_depend_only_on_what_determines_the_response():
+    key = call_key("gpt-4o-mini", 0.2, ["Observation:"], MESSAGES)
+
+    assert key == call_key("gpt-4o-mini", 0.2, ("Observation:",), [dict(message) for message in MESSAGES])
+    assert key != call_key("gpt-4o", 0.2, ["Observation:"], MESSAGES)
+    assert key != call_key("gpt-4o-mini", 0.7, ["Observation:"], MESSAGES)
+    assert key != call_key("gpt-4o-mini", 0.2, [], MESSAGES)
+    assert key != call_key("gpt-4o-mini", 0.2, ["Observation:"], MESSAGES[:1])
+    assert key != call_key("gpt-4o-mini", 0.2, ["Observation:"], MESSAGES, tools=[{"name": "search"}])
+    assert key != call_key("gpt-4o-mini", 0.2, ["Observation:"], MESSAGES, response_model=Plan)
+
+
+def test_readwrite_serves_repeated_calls_from_the_store(store):
+    inner = CountingLLM()
+    llm = CachedLLM(inner, store, mode=READWRITE, agent="researcher")
+
+    assert llm.call(MESSAGES) == "Answer 1"
+    assert llm.call(MESSAGES) == "Answer 1"
+    assert llm.call(MESSAGES[1:]) == "Answer 2"
+    assert inner.calls == 2
+    assert store.stats()["hits"] == 1
+
+
+def test_structured_responses_are_replayed_as_their_model(store):
+    class StructuredLLM(CountingLLM):
+        def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+            return kwargs["response_model"](steps=["Hire", "Automate"])
+
+    CachedLLM(StructuredLLM(), store, mode=RECORD).call(MESSAGES, response_model=Plan)
+    replayed = CachedLLM(CountingLLM(), store, mode=REPLAY).call(MESSAGES, response_model=Plan)
+
+    assert replayed == Plan(steps=["Hire", "Automate"])
+
+
+def test_replay_raises_on_a_miss_and_record_overwrites(store):
+    inner = CountingLLM()
+    CachedLLM(inner, store, mode=RECORD).call(MESSAGES)
+    CachedLLM(inner, store, mode=RECORD).call(MESSAGES)
+
+    replay = CachedLLM(CountingLLM(), store, mode=REPLAY, agent="researcher")
+    assert replay.call(MESSAGES) == "Answer 2"
+    with pytest.raises(LLMCacheMiss):
+        replay.call(MESSAGES[1:])
+    assert replay.inner.calls == 0
+
+
+def test_calls_that_execute_tools_bypass_the_cache(store):
+    inner = CountingLLM()
+    llm = CachedLLM(inner, store, mode=READWRITE)
+    tools = {"publish": lambda **kwargs: "https://docs.google.com/document/d/1"}
+
+    assert llm.call(MESSAGES, available_functions=tools) == "Answer 1"
+    assert llm.call(MESSAGES, available_functions=tools) == "Answer 2"
+    assert store.stats()["entries"] == 0
+    # Replay still makes them, so their side effects happen
+    assert CachedLLM(inner, store, mode=REPLAY).call(MESSAGES, available_functions=tools) == "Answer 3"
+
+
+def test_eviction_drops_least_recently_used_responses(tmp_path):
+    store = LLMResponseStore(str(tmp_path / "responses.sqlite3"), max_entries=2)
+    store.put("a", "A")
+    time.sleep(0.01)
+    store.put("b", "B")
+    time.sleep(0.01)
+    assert store.get("a") == "A"
+    time.sleep(0.01)
+    store.put("c", "C")
+
+    assert (store.get("a"), store.get("b"), store.get("c")) == ("A", None, "C")
+
+
+def test_eviction_keeps_the_store_under_its_size_limit(tmp_path):
+    store = LLMResponseStore(str(tmp_path / "responses.sqlite3"), max_bytes=25)
+    for key in "abc":
+        store.put(key, key * 10)
+        time.sleep(0.01)
+
+    assert store.stats() == {"entries": 2, "bytes": 20, "hits": 0}
+    assert store.get("a") is None
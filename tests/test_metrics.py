@@ -0,0 +1,39 @@
+"""Per-thread metric shards are folded away when their threads exit."""
+import threading
+
+from problem_solving_research_agent.metrics import Counter, Histogram
+
+
+def _in_threads(fn, count: int) -> None:
+    for _ in range(count):
+        thread = threading.Thread(target=fn)
+        thread.start()
+        thread.join()
+
+
+def test_shards_of_exited_threads_are_merged():
+    counter = Counter("test_runs_total", "Runs", ("status",))
+    histogram = Histogram("test_run_seconds", "Run seconds", buckets=(1, 10))
+
+    def run():
+        counter.inc(labels={"status": "ok"})
+        histogram.observe(2.0)
+
+    _in_threads(run, 50)
+
+    assert counter.collect() == {("ok",): 50}
+    assert 'test_run_seconds_bucket{le="10"} 50' in histogram.render()
+    assert "test_run_seconds_sum 100.0" in histogram.render()
+    assert len(counter._shards) <= 1 and len(histogram._shards) <= 1
+
+
+def test_llm_calls_without_a_model_are_labelled_unknown():
+    from problem_solving_research_agent.events import LLM_COMPLETED, Event
+    from problem_solving_research_agent.metrics import LLM_CALLS, _record_event
+
+    before = LLM_CALLS.collect().get(("unknown", "ok"), 0)
+    _record_event(Event(type=LLM_COMPLETED, run_id=None, timestamp=0.0, data={"model": None}))
+
+    assert LLM_CALLS.collect()[("unknown", "ok")] == before + 1
+    assert not any("None" in key for key in LLM_CALLS.collect())
+    assert Counter("test_labels_total", "Labels", ("task",))._key({"task": None}) == ("",)
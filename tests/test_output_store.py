@@ -0,0 +1,73 @@
+"""Output store: compression, de-duplication, index lookups and write-behind flushing."""
+import gzip
+import threading
+
+import pytest
+
+from problem_solving_research_agent.tools import output_store
+from problem_solving_research_agent.tools.output_store import OutputStore
+
+REPORT = "# Scaling Support\n\n" + "Route tickets by product area.\n" * 200
+
+
+def test_compressed_documents_are_stored_once_and_read_back(tmp_path):
+    store = OutputStore(str(tmp_path / "output"), compression="gzip", write_behind=False)
+
+    first = store.save(REPORT, "scaling_support", title="Scaling Support", problem_statement="Scale support")
+    second = store.save(REPORT, "scaling_support_again", problem_statement="  scale SUPPORT ")
+
+    assert first["path"] == second["path"] and first["path"].endswith(".md.gz")
+    assert first["stored_size"] < first["size"] == len(REPORT.encode("utf-8"))
+    assert gzip.decompress((tmp_path / "output" / first["path"]).read_bytes()).decode("utf-8") == REPORT
+    assert len(list((tmp_path / "output" / "objects").rglob("*.gz"))) == 1
+    assert store.get(first["content_hash"]) == REPORT
+    # Lookups normalize the problem statement like the result cache
+    assert [record["id"] for record in store.find(problem_statement="Scale support")] == [second["id"], first["id"]]
+    assert [record["filename"] for record in store.find(title="Scaling Support")] == ["scaling_support"]
+    assert len(store.documents()) == 1
+
+
+def test_missing_zstandard_falls_back_to_gzip_with_a_warning(tmp_path, monkeypatch):
+    monkeypatch.setattr(output_store, "_zstd", lambda: None)
+
+    with pytest.warns(RuntimeWarning, match="zstandard"):
+        store = OutputStore(str(tmp_path / "output"), compression="zstd", write_behind=False)
+
+    assert store.compression == "gzip"
+    assert store.read(store.save(REPORT, "report")) == REPORT
+
+
+def test_write_behind_returns_the_final_path_and_flush_waits_for_it(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path / "output"), compression="gzip")
+    release = threading.Event()
+    write = store._write
+
+    def slow_write(*args):
+        release.wait(5)
+        return write(*args)
+
+    monkeypatch.setattr(store, "_write", slow_write)
+    path, future = store.save_async(REPORT, "report", problem_statement="Scale support")
+
+    assert not path.exists()
+    assert not store.flush(timeout=0.05)
+    release.set()
+    assert store.flush(timeout=5)
+    assert path.exists() and path.name.endswith(".md.gz")
+    assert future.result(timeout=1)["path"] == path.relative_to(store.root).as_posix()
+    assert store.find(problem_statement="Scale support")[0]["content_hash"] == future.result()["content_hash"]
+
+
+def test_failed_background_writes_reach_the_future(tmp_path, monkeypatch):
+    store = OutputStore(str(tmp_path / "output"))
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(output_store, "write_atomic", fail)
+    _, future = store.save_async(REPORT, "report")
+
+    assert store.flush(timeout=5)
+    with pytest.raises(OSError):
+        future.result(timeout=1)
+    assert store.recent() == []
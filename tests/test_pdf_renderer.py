@@ -0,0 +1,67 @@
+"""Markdown to PDF: lists, code blocks and tables become the right flowables."""
+from reportlab.platypus import Paragraph, Preformatted, Table
+
+from problem_solving_research_agent.pdf_renderer import CODE_LINE_CHARS, LIST_INDENT, iter_flowables, render_pdf
+
+
+def _paragraphs(markdown: str) -> list:
+    return [flowable for flowable in iter_flowables(markdown) if isinstance(flowable, Paragraph)]
+
+
+def test_nested_lists_are_indented_with_their_own_bullets():
+    paragraphs = _paragraphs(
+        "- Staffing\n"
+        "  - Hire two agents\n"
+        "    1. Post the role\n"
+        "    2. Interview\n"
+        "- Tooling\n"
+        "\n"
+        "3. Third\n"
+        "4. Fourth\n"
+    )
+
+    assert [paragraph.text for paragraph in paragraphs] == [
+        "Staffing", "Hire two agents", "Post the role", "Interview", "Tooling", "Third", "Fourth"
+    ]
+    assert [paragraph.bulletText for paragraph in paragraphs] == ["•", "◦", "1.", "2.", "•", "3.", "4."]
+    indents = [paragraph.style.leftIndent for paragraph in paragraphs]
+    assert indents[1] - indents[0] == indents[2] - indents[1] == LIST_INDENT
+    assert indents[4] == indents[5] == indents[0]
+
+
+def test_code_blocks_are_preformatted_and_wrapped():
+    long_line = "x = " + "1 + " * 40 + "1"
+    flowables = list(iter_flowables(f"Run:\n\n```python\nif a < b:\n    print('<b>')\n{long_line}\n```\n"))
+
+    code = [flowable for flowable in flowables if isinstance(flowable, Preformatted)]
+    assert len(code) == 1
+    lines = ["".join(line[1]) if isinstance(line, tuple) else line for line in code[0].lines]
+    assert lines[:2] == ["if a < b:", "    print('<b>')"]
+    # The long line wraps instead of running off the page
+    assert len(lines) > 3 and all(len(line) <= CODE_LINE_CHARS for line in lines)
+
+
+def test_tables_keep_their_header_and_pad_short_rows():
+    flowables = list(iter_flowables(
+        "| Option | Cost | Notes |\n"
+        "| --- | --- | --- |\n"
+        "| Hire | **High** | Takes a quarter to ramp up new agents on the product |\n"
+        "| Automate | Low |\n"
+    ))
+
+    tables = [flowable for flowable in flowables if isinstance(flowable, Table)]
+    assert len(tables) == 1
+    cells = tables[0]._cellvalues
+    assert cells[0] == ["Option", "Cost", "Notes"]
+    assert tables[0].repeatRows == 1
+    # Markup and long text wrap as paragraphs; plain short cells stay strings
+    assert isinstance(cells[1][1], Paragraph) and cells[1][1].text == "<b>High</b>"
+    assert isinstance(cells[1][2], Paragraph)
+    assert cells[2] == ["Automate", "Low", ""]
+
+
+def test_render_pdf_writes_a_pdf():
+    buffer = render_pdf("# Plan\n\n- Hire\n- Automate\n\n```\ncode\n```\n\n| a | b |\n| - | - |\n| 1 | 2 |\n")
+
+    assert buffer.tell() == 0
+    assert buffer.getvalue().startswith(b"%PDF")
@@ -0,0 +1,223 @@
+"""Publish outbox: retries, dead letters, idempotent resumes, leases and handle resolution, against the Docs fake."""
+import functools
+import json
+import time
+
+import pytest
+
+from problem_solving_research_agent.batch import run_batch
+from problem_solving_research_agent.tools import google_clients, publish_outbox
+from problem_solving_research_agent.tools.google_clients import GoogleClientPool
+from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp
+from problem_solving_research_agent.tools.publish_outbox import (
+    DEAD,
+    HANDLE_PREFIX,
+    PENDING,
+    PUBLISHED,
+    RUNNING,
+    PublishError,
+    PublishOutbox,
+    _classify,
+)
+
+CONTENT = "# Plan\n\nScale support with **agents**."
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    fake = FakeGoogleHttp()
+    monkeypatch.setattr(google_clients, "_pool", GoogleClientPool(http_factory=lambda: fake))
+    return fake
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch, fake):
+    outbox = PublishOutbox(str(tmp_path / "outbox.sqlite3"), base_delay=0.01, max_delay=0.05, writes_per_minute=0)
+    monkeypatch.setattr(publish_outbox, "_outbox", outbox)
+    yield outbox
+    outbox.stop()
+
+
+def _publish(outbox: PublishOutbox, title: str = "Plan", content: str = CONTENT) -> dict:
+    outbox.start()
+    job = outbox.enqueue("markdown", title, content)
+    return outbox.wait(job["key"], timeout=10)
+
+
+def _calls(fake: FakeGoogleHttp, method: str, path: str) -> int:
+    return sum(1 for call in fake.calls if call["method"] == method and call["path"] == path)
+
+
+def test_transient_failures_are_retried(outbox, fake):
+    fake.fail_with = [503, 200, 503]
+
+    job = _publish(outbox)
+
+    assert job["status"] == PUBLISHED and job["last_error"] is None
+    assert list(fake.documents) == [job["doc_id"]]
+    assert "Scale support with agents." in fake.text(job["doc_id"])
+    assert fake.permissions[job["doc_id"]][0]["type"] == "anyone"
+
+
+def test_backoff_doubles_with_each_failure(tmp_path, fake):
+    outbox = PublishOutbox(str(tmp_path / "outbox.sqlite3"), base_delay=1.0, max_delay=300.0)
+    job = outbox.enqueue("markdown", "Plan", CONTENT)
+
+    delays = []
+    for _ in range(3):
+        started = time.time()
+        outbox._failed(job, PublishError("Google API error 503", retryable=True, status=503))
+        job = outbox.get(job["key"])
+        delays.append(job["next_attempt_at"] - started)
+
+    assert job["status"] == PENDING and job["attempts"] == 3
+    for n, delay in enumerate(delays):
+        # Jitter keeps each delay between half and all of base_delay * 2^n
+        assert 0.5 * 2 ** n - 0.05 <= delay <= 2 ** n + 0.05
+
+
+def test_retry_after_pauses_every_worker(outbox, fake):
+    fake.retry_after = 0.5
+    fake.fail_with = [429]
+
+    started = time.monotonic()
+    job = _publish(outbox)
+
+    assert job["status"] == PUBLISHED
+    assert time.monotonic() - started >= 0.5
+
+
+def test_permanent_failures_are_dead_lettered_and_can_be_requeued(outbox, fake):
+    fake.fail_with = [400]
+
+    job = _publish(outbox)
+
+    assert job["status"] == DEAD and job["attempts"] == 1
+    assert "400" in job["last_error"]
+    assert [dead["key"] for dead in outbox.dead_letters()] == [job["key"]]
+    assert outbox.requeue(job["key"])
+    assert outbox.wait(job["key"], timeout=10)["status"] == PUBLISHED
+
+
+def test_jobs_failing_max_attempts_times_are_dead_lettered(tmp_path, fake):
+    outbox = PublishOutbox(str(tmp_path / "outbox.sqlite3"), max_attempts=3, base_delay=0.01, writes_per_minute=0)
+    fake.fail_with = [503] * 3
+    try:
+        job = _publish(outbox)
+    finally:
+        outbox.stop()
+
+    assert job["status"] == DEAD and job["attempts"] == 3
+    assert fake.documents == {}
+
+
+def test_auth_errors_are_permanent():
+    from google.auth.exceptions import RefreshError, TransportError
+
+    assert not _classify(RefreshError("invalid_grant: Token has been expired or revoked.")).retryable
+    assert _classify(TransportError("Connection reset")).retryable
+    assert _classify(ConnectionResetError("Connection reset")).retryable
+
+
+def test_create_that_timed_out_is_not_repeated(outbox, fake):
+    # The document is created, but the response never arrives
+    fake.fail_with = [0]
+
+    job = _publish(outbox)
+
+    assert job["status"] == PUBLISHED
+    assert list(fake.documents) == [job["doc_id"]]
+    assert _calls(fake, "POST", "/drive/v3/files") == 1
+    assert fake.text(job["doc_id"]).count("Scale support") == 1
+
+
+def test_batch_that_timed_out_is_not_applied_twice(outbox, fake):
+    # Create succeeds, the first batch is applied but its response is lost
+    fake.fail_with = [200, 0]
+
+    job = _publish(outbox)
+
+    assert job["status"] == PUBLISHED
+    assert fake.text(job["doc_id"]).count("Scale support") == 1
+    assert len(fake.batch_updates(job["doc_id"])) == 1
+
+
+def test_publishing_resumes_after_the_last_applied_batch(outbox, fake, monkeypatch):
+    monkeypatch.setattr(publish_outbox, "markdown_to_batches", functools.partial(
+        publish_outbox.markdown_to_batches, max_requests=1
+    ))
+    # create, insert text, then the heading style fails once
+    fake.fail_with = [200, 200, 503]
+
+    job = _publish(outbox)
+
+    assert job["status"] == PUBLISHED and job["batches_done"] == 3
+    sent = fake.batch_updates(job["doc_id"])
+    assert [list(batch[0]) for batch in sent] == [
+        ["insertText"], ["updateParagraphStyle"], ["updateParagraphStyle"], ["updateTextStyle"]
+    ]
+    assert fake.text(job["doc_id"]).count("Scale support") == 1
+
+
+def _lease(outbox: PublishOutbox, key: str, owner: str, updated_at: float) -> None:
+    with outbox._lock:
+        outbox._conn.execute(
+            "UPDATE publish_jobs SET status = ?, owner = ?, updated_at = ? WHERE key = ?",
+            (RUNNING, owner, updated_at, key),
+        )
+
+
+def test_only_expired_leases_are_reclaimed(outbox):
+    live = outbox.enqueue("markdown", "Live", "# Live")["key"]
+    stale = outbox.enqueue("markdown", "Stale", "# Stale")["key"]
+    _lease(outbox, live, "other-host:123", time.time())
+    _lease(outbox, stale, "other-host:123", time.time() - 3600)
+
+    with outbox._lock:
+        assert outbox._reclaim() == 1
+
+    assert outbox.get(live)["status"] == RUNNING
+    assert outbox.get(stale)["status"] == PENDING
+
+
+def test_batch_records_carry_document_urls(outbox, tmp_path):
+    outbox.start()
+    source = tmp_path / "problems.jsonl"
+    source.write_text('{"id": "a", "problem_statement": "Scale support"}\n', encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+
+    def solve(problem):
+        job = outbox.enqueue("markdown", "Plan", f"# Plan\n\n{problem}")
+        return f"Published: {HANDLE_PREFIX}{job['key']}"
+
+    run_batch(str(source), str(output), workers=1, run_fn=solve)
+
+    record = json.loads(output.read_text(encoding="utf-8"))
+    assert HANDLE_PREFIX not in record["result"]
+    assert "https://docs.google.com/document/d/" in record["result"]
+    assert record["publishes"][0]["status"] == PUBLISHED
+    assert publish_outbox.flush_publishes(timeout=5) == []
+
+
+def test_api_result_resolves_handles(outbox, tmp_path):
+    from starlette.testclient import TestClient
+
+    from problem_solving_research_agent.api import create_app
+    from problem_solving_research_agent.jobs import JobQueue, JobStore
+
+    outbox.start()
+
+    def solve(problem, run_id=None):
+        job = outbox.enqueue("markdown", "Plan", f"# Plan\n\n{problem}")
+        outbox.wait(job["key"], timeout=10)
+        return f"Published: {HANDLE_PREFIX}{job['key']}"
+
+    queue = JobQueue(JobStore(str(tmp_path / "jobs.sqlite3")), workers=1, run_fn=solve)
+    with TestClient(create_app(queue)) as client:
+        job_id = client.post("/jobs", json={"problem_statement": "Scale support"}).json()["id"]
+        assert queue.drain(timeout=10)
+        body = client.get(f"/jobs/{job_id}/result").json()
+
+    assert HANDLE_PREFIX not in body["result"]
+    assert "https://docs.google.com/document/d/" in body["result"]
+    assert [publish["status"] for publish in body["publishes"]] == [PUBLISHED]
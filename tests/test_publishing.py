@@ -0,0 +1,79 @@
+"""Fast publish: structured research rendered through the template and published to the Docs fake."""
+import pytest
+
+from problem_solving_research_agent import factory
+from problem_solving_research_agent.events import TOOL_COMPLETED, TOOL_STARTED, event_bus
+from problem_solving_research_agent.publishing import (
+    PUBLISHER,
+    ResearchReport,
+    TimelinePhase,
+    load_report,
+    publish_report,
+    render_report,
+)
+from problem_solving_research_agent.tools import google_clients
+from problem_solving_research_agent.tools.google_clients import GoogleClientPool
+from problem_solving_research_agent.tools.google_fake import FakeGoogleHttp
+
+REPORT = ResearchReport(
+    title="Scaling Customer Support",
+    executive_summary="Support volume doubles every year.\n",
+    problem_analysis="Tickets wait **two days** on average.",
+    research_summary="Self-service deflects a third of tickets.",
+    solution_steps=["Launch a help centre", "Route tickets by product area"],
+    implementation_timeline=[TimelinePhase(phase="Pilot", duration="2 weeks", milestones=["Help centre live"])],
+    resources=["[Support playbook](https://example.com/playbook)"],
+)
+
+
+def test_reports_fill_every_template_section_in_order():
+    document = render_report(REPORT)
+
+    headings = [line for line in document.splitlines() if line.startswith("#")]
+    assert headings == [
+        "# Scaling Customer Support", "## Executive Summary", "## Problem Analysis", "### Research Summary",
+        "## Step-by-Step Solution", "## Technical Recommendations", "## Implementation Timeline",
+        "## Resources & References", "## Next Steps",
+    ]
+    assert "$" not in document
+    assert "Support volume doubles every year.\n\n## Problem Analysis" in document
+    assert "1. Launch a help centre\n2. Route tickets by product area" in document
+    assert "- **Pilot** (2 weeks)\n\t- Help centre live" in document
+    assert "## Technical Recommendations\n\n_None._" in document
+    assert document.rstrip().endswith("## Next Steps\n\n_None._")
+
+
+def test_reports_load_from_fenced_json():
+    fenced = f"```json\n{REPORT.model_dump_json(indent=2)}\n```"
+
+    assert load_report(fenced) == REPORT
+    assert load_report(REPORT.model_dump_json()) == REPORT
+    assert load_report(REPORT) is REPORT
+
+
+def test_publish_report_creates_the_rendered_document(monkeypatch):
+    fake = FakeGoogleHttp()
+    monkeypatch.setattr(google_clients, "_pool", GoogleClientPool(http_factory=lambda: fake))
+    monkeypatch.setattr(factory, "_shared_tools", {})
+    monkeypatch.setenv("PUBLISH_OUTBOX_ENABLED", "false")
+    events = []
+    unsubscribe = event_bus.subscribe(lambda event: events.append(event))
+    try:
+        result = publish_report(REPORT.model_dump_json())
+    finally:
+        unsubscribe()
+
+    (doc_id,) = fake.documents
+    text = fake.text(doc_id)
+    assert "Scaling Customer Support" in text and "Route tickets by product area" in text
+    assert "**" not in text
+    assert result.startswith(render_report(REPORT))
+    assert f"https://docs.google.com/document/d/{doc_id}/edit" in result
+    assert [(event.type, event.data["agent"]) for event in events if event.type in (TOOL_STARTED, TOOL_COMPLETED)] == [
+        (TOOL_STARTED, PUBLISHER), (TOOL_COMPLETED, PUBLISHER)
+    ]
+
+
+def test_invalid_reports_are_rejected():
+    with pytest.raises(ValueError):
+        load_report('{"title": "Missing sections"}')
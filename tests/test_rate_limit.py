@@ -0,0 +1,151 @@
+"""Rate limiter: token buckets, priority order, adapting to responses, and the crewAI interceptor."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from problem_solving_research_agent import rate_limit
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer
+from problem_solving_research_agent.rate_limit import (
+    BATCH,
+    INTERACTIVE,
+    RateLimiter,
+    TokenBucket,
+    parse_duration,
+    retry_after,
+)
+
+
+def test_token_bucket_allows_a_burst_then_refills_at_its_rate():
+    bucket = TokenBucket(per_minute=120, burst_seconds=1.0)
+    assert bucket.capacity == 2
+
+    now = time.monotonic()
+    assert bucket.wait_time(2, now) == 0
+    bucket.take(2, now)
+    assert bucket.wait_time(1, now) == pytest.approx(0.5, abs=0.01)
+    assert bucket.wait_time(1, now + 0.25) == pytest.approx(0.25, abs=0.01)
+    # Asking for more than the bucket holds only waits for a full bucket
+    assert bucket.wait_time(10, now) == pytest.approx(1.0, abs=0.01)
+
+    bucket.lower_to(0, now + 2)
+    assert bucket.level == 0
+
+
+def test_an_unlimited_bucket_never_waits():
+    bucket = TokenBucket(per_minute=0)
+    bucket.take(1000, time.monotonic())
+    assert bucket.wait_time(1000, time.monotonic()) == 0
+
+
+def test_interactive_requests_are_served_before_earlier_batch_ones():
+    # One request every half second, none in reserve
+    limiter = RateLimiter(requests_per_minute=120, burst_seconds=0.5)
+    limiter.acquire(priority=INTERACTIVE)
+    served = []
+
+    def request(priority):
+        limiter.acquire(priority=priority)
+        served.append(priority)
+
+    threads = []
+    for priority in (BATCH, BATCH, INTERACTIVE):
+        threads.append(threading.Thread(target=request, args=(priority,)))
+        threads[-1].start()
+        # Queue them in this order
+        deadline = time.monotonic() + 5
+        while sum(limiter.stats()["queued"].values()) < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.001)
+    for thread in threads:
+        thread.join(5)
+
+    assert served == [INTERACTIVE, BATCH, BATCH]
+    assert limiter.stats()["queued"] == {INTERACTIVE: 0, BATCH: 0}
+
+
+def test_retry_after_pauses_every_caller():
+    limiter = RateLimiter()
+    limiter.observe(429, {"retry-after-ms": "300"})
+
+    assert limiter.stats()["rate_limited"] == 1
+    assert limiter.acquire() >= 0.25
+
+
+def test_backoff_grows_with_429s_and_decays_on_success():
+    limiter = RateLimiter(max_backoff=3.0)
+    for expected in (1.0, 2.0, 3.0):
+        limiter.observe(429, {})
+        assert limiter._backoff == expected
+    assert limiter.stats()["paused_seconds"] == pytest.approx(3.0, abs=0.1)
+
+    for expected in (1.5, 0.75, 0.375, 0.1875, 0.0):
+        limiter.observe(200, {})
+        assert limiter._backoff == expected
+
+
+def test_rate_limit_headers_lower_the_buckets_and_pause_when_exhausted():
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60000)
+    sent_at = time.monotonic()
+    limiter.observe(200, {
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "200ms",
+        "x-ratelimit-remaining-tokens": "100",
+        "x-ratelimit-reset-tokens": "1s",
+    }, sent_at)
+
+    assert limiter.requests.level < 1
+    assert limiter.tokens.level < 200
+    assert 0.1 < limiter.stats()["paused_seconds"] <= 0.2
+    assert limiter.acquire(tokens=50) >= 0.1
+
+
+def test_durations_and_retry_after_headers_are_parsed():
+    assert parse_duration("6m0s") == 360
+    assert parse_duration("1.5s") == 1.5
+    assert parse_duration("20ms") == pytest.approx(0.02)
+    assert parse_duration("soon") is None
+    assert retry_after({"retry-after": "2"}) == 2
+    assert retry_after({"retry-after-ms": "250", "retry-after": "2"}) == 0.25
+
+
+@pytest.fixture
+def limited_server(monkeypatch):
+    server = FakeLLMServer(token_delay=0.0, rate_limit=2, rate_window=0.5).start()
+    monkeypatch.setenv("LLM_RATE_LIMIT_ENABLED", "true")
+    yield server
+    server.stop()
+
+
+def _call_concurrently(server: FakeLLMServer, calls: int) -> list:
+    from crewai import LLM
+
+    llm = LLM(
+        model="gpt-4o-mini", base_url=server.base_url, api_key="test-placeholder",
+        interceptor=rate_limit.http_interceptor(),
+    )
+    with ThreadPoolExecutor(max_workers=calls) as pool:
+        return list(pool.map(lambda n: llm.call(f"Question {n}"), range(calls)))
+
+
+def test_interceptor_waits_out_429s_from_the_api(limited_server, monkeypatch):
+    limiter = RateLimiter()
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+
+    answers = _call_concurrently(limited_server, 4)
+
+    assert all(answers)
+    # The burst is rejected once; the retries wait for the pause instead of being rejected again
+    assert limiter.stats()["rate_limited"] == limited_server.rejected > 0
+    assert limiter.stats()["requests"] == len(limited_server.requests) + limited_server.rejected
+
+
+def test_interceptor_sized_to_the_api_limit_avoids_429s(limited_server, monkeypatch):
+    limiter = RateLimiter(requests_per_minute=120, burst_seconds=0.5)
+    monkeypatch.setattr(rate_limit, "_limiter", limiter)
+
+    answers = _call_concurrently(limited_server, 4)
+
+    assert all(answers)
+    assert limited_server.rejected == 0
+    assert limiter.stats()["waited"] >= 2
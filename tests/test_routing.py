@@ -0,0 +1,48 @@
+"""Routed LLM calls cascade on timeouts and retryable server errors."""
+import httpx
+import openai
+import pytest
+from crewai.llms.base_llm import BaseLLM
+
+from problem_solving_research_agent.routing import LatencyTracker, ModelOption, RoutedLLM, RoutePolicy
+
+
+class ScriptedLLM(BaseLLM):
+    """Raises ``error`` when set, otherwise answers with its model name."""
+
+    def __init__(self, model: str, error: Exception = None):
+        super().__init__(model=model)
+        object.__setattr__(self, "error", error)
+        object.__setattr__(self, "calls", 0)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        object.__setattr__(self, "calls", self.calls + 1)
+        if self.error is not None:
+            raise self.error
+        return self.model
+
+
+def _status_error(status: int) -> openai.APIStatusError:
+    request = httpx.Request("POST", "http://127.0.0.1/v1/chat/completions")
+    response = httpx.Response(status, request=request)
+    error_class = openai.InternalServerError if status >= 500 else openai.BadRequestError
+    return error_class("failed", response=response, body=None)
+
+
+def _routed(first_error: Exception) -> RoutedLLM:
+    policy = RoutePolicy(models=(ModelOption("gpt-4o"), ModelOption("gpt-4o-mini")), timeout_seconds=1.0)
+    candidates = {"gpt-4o": ScriptedLLM("gpt-4o", first_error), "gpt-4o-mini": ScriptedLLM("gpt-4o-mini")}
+    return RoutedLLM("test", policy, candidates, LatencyTracker())
+
+
+@pytest.mark.parametrize("error", [TimeoutError("timed out"), ConnectionError("refused"), _status_error(503)])
+def test_retryable_failures_cascade_to_the_next_model(error):
+    llm = _routed(error)
+    assert llm.call([{"role": "user", "content": "Plan"}]) == "gpt-4o-mini"
+
+
+def test_client_errors_are_raised():
+    llm = _routed(_status_error(400))
+    with pytest.raises(openai.BadRequestError):
+        llm.call([{"role": "user", "content": "Plan"}])
+    assert llm.candidates["gpt-4o-mini"].calls == 0
@@ -0,0 +1,58 @@
+"""Per-run token usage with LLMs shared across concurrent runs."""
+import threading
+
+import pytest
+
+from problem_solving_research_agent import factory
+from problem_solving_research_agent.events import TOKEN_USAGE, event_bus
+from problem_solving_research_agent.fake_llm_server import FakeLLMServer
+from problem_solving_research_agent.runner import run_problem
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    server = FakeLLMServer(token_delay=0.0, first_token_delay=0.01).start()
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "test-placeholder")
+    for name in ("RESULT_CACHE_ENABLED", "CHECKPOINTS_ENABLED", "KNOWLEDGE_ENABLED", "OUTPUT_SAVE_RUNS",
+                 "PUBLISH_OUTBOX_ENABLED"):
+        monkeypatch.setenv(name, "false")
+    monkeypatch.setenv("LLM_CACHE_MODE", "off")
+    monkeypatch.setenv("RESEARCH_FANOUT", "0")
+    # Fresh shared LLMs pointed at the fake server
+    monkeypatch.setattr(factory, "_shared_llms", {})
+    monkeypatch.setattr(factory, "_factory", None)
+    yield server
+    server.stop()
+
+
+def _usage_of(run_ids) -> dict:
+    usage = {}
+
+    def record(event):
+        if event.type == TOKEN_USAGE and event.run_id in run_ids:
+            usage[event.run_id] = event.data
+
+    return usage, event_bus.subscribe(record)
+
+
+def test_concurrent_runs_report_only_their_own_usage(fake_llm):
+    usage, unsubscribe = _usage_of({"solo", "first", "second"})
+    try:
+        run_problem("Scale support", use_cache=False, run_id="solo")
+        threads = [
+            threading.Thread(target=run_problem, args=("Scale support",), kwargs={"use_cache": False, "run_id": run})
+            for run in ("first", "second")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(60)
+    finally:
+        unsubscribe()
+
+    solo = usage["solo"]
+    assert solo["total_tokens"] > 0 and solo["requests"] > 0
+    # Both runs share every LLM instance, yet each reports what a run alone uses
+    assert usage["first"] == solo
+    assert usage["second"] == solo
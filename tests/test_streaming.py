@@ -0,0 +1,85 @@
+"""Answer streaming: filtering ReAct text, assembling chunks per run and late readers."""
+import threading
+
+from problem_solving_research_agent.events import LLM_CHUNK, LLM_COMPLETED, RUN_COMPLETED, event_bus, run_context
+from problem_solving_research_agent.streaming import ANSWER_SEPARATOR, AnswerFilter, AnswerStreams, RunStream
+
+
+def _feed(answer_filter: AnswerFilter, call_id: str, text: str, size: int = 3) -> str:
+    return "".join(answer_filter.feed(call_id, text[n:n + size]) for n in range(0, len(text), size))
+
+
+def test_react_calls_stream_only_their_final_answer():
+    answer_filter = AnswerFilter()
+
+    # Chunks split "Final Answer:" across their boundaries
+    text = _feed(answer_filter, "a", "Thought: I know it.\nFinal Answer: Hire two agents.")
+
+    assert text == "Hire two agents."
+    assert answer_filter.finish("a") == ""
+
+
+def test_tool_steps_without_a_final_answer_are_dropped():
+    answer_filter = AnswerFilter()
+
+    assert _feed(answer_filter, "a", 'Thought: Publish it.\nAction: Google Docs Creator\nAction Input: {}') == ""
+    assert answer_filter.finish("a") == ""
+
+
+def test_plain_answers_pass_through_and_calls_are_separated():
+    answer_filter = AnswerFilter()
+
+    first = _feed(answer_filter, "a", "## Summary\n\nScale support with agents.")
+    # Too short to classify until the call ends
+    assert answer_filter.feed("b", "Done.") == ""
+    second = answer_filter.finish("b")
+
+    assert first == "## Summary\n\nScale support with agents."
+    assert second == ANSWER_SEPARATOR + "Done."
+
+
+def test_interleaved_calls_are_filtered_independently():
+    answer_filter = AnswerFilter()
+    react = "Thought: ok\nFinal Answer: From the researcher."
+    plain = "A direct answer from the publisher."
+    received = {"react": "", "plain": ""}
+    for n in range(0, max(len(react), len(plain)), 4):
+        for call_id, text in (("react", react), ("plain", plain)):
+            received[call_id] += answer_filter.feed(call_id, text[n:n + 4])
+
+    assert received["plain"] == plain
+    assert received["react"] == ANSWER_SEPARATOR + "From the researcher."
+
+
+def test_late_readers_get_the_backlog_then_live_text():
+    stream = RunStream()
+    stream.feed("a", "An answer long enough to classify. ")
+    received = []
+    reader = threading.Thread(target=lambda: received.extend(stream.iter_text(idle_timeout=5)))
+    reader.start()
+
+    stream.feed("a", "More text.")
+    stream.close()
+    reader.join(5)
+
+    assert "".join(received) == stream.text() == "An answer long enough to classify. More text."
+    assert len(stream) == len(stream.text())
+    assert stream.wait_for_text(len(stream), timeout=0)
+
+
+def test_answer_streams_assemble_chunks_per_run():
+    streams = AnswerStreams(max_runs=2)
+    for run_id, words in (("run-1", "First run answer text here"), ("run-2", "Second run answer text here")):
+        with run_context(run_id):
+            for word in words.split(" "):
+                event_bus.publish(LLM_CHUNK, call_id="call", chunk=word + " ")
+            event_bus.publish(LLM_COMPLETED, call_id="call")
+            event_bus.publish(RUN_COMPLETED)
+
+    assert streams.find("run-1").text() == "First run answer text here "
+    assert streams.find("run-2").done
+
+    # A third run drops the oldest stream; looking one up never creates it
+    streams.get("run-3")
+    assert streams.find("run-1") is None
+    assert streams.find("run-4") is None and streams.find("run-2") is not None